@@ -0,0 +1,221 @@
+from typing import List, Tuple, Union
+import zlib
+import numpy as np
+import pandas as pd
+
+from data.data_loader import DataLoader
+from data.search_index import tokenize
+import config
+
+# Number of words per shingle
+SHINGLE_SIZE = 3
+# Number of hash functions of the MinHash signatures, split into bands of
+# BAND_ROWS values for locality-sensitive hashing. Two issues become
+# candidates if all values of one of their bands agree, which is likely
+# once their similarity exceeds about (1 / bands) ** (1 / BAND_ROWS)
+NUM_HASHES = 128
+BAND_ROWS = 4
+# Shingles occurring in more than this fraction of the issues (e.g., of an
+# issue template), and in more than MIN_SHINGLE_LIMIT issues, are ignored
+# so that issues are not similar only by them
+MAX_SHINGLE_FREQUENCY = 0.05
+MIN_SHINGLE_LIMIT = 10
+# Buckets with more issues link each of them to the first one only,
+# instead of producing every pair
+MAX_BUCKET_PAIRS = 100
+
+
+class DuplicateAnalysis:
+    """
+    Finds clusters of likely duplicate issues: issues whose titles and
+    bodies share most of their shingles (runs of consecutive words).
+    Outputs the findings to standard out.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # Estimated Jaccard similarity above which issues are considered duplicates
+        self.threshold: float = config.get_parameter('ENPM611_PROJECT_DUPLICATE_THRESHOLD') or 0.5
+
+    def run(self):
+        loader = DataLoader()
+        threshold = float(self.threshold)
+        clusters = loader.get_result('near_duplicates', {'threshold': threshold},
+                                     lambda: self.find_clusters(loader, threshold))
+        print(f"Clusters of likely duplicate issues (similarity >= {self.threshold}): {len(clusters)}")
+        if clusters:
+            df = pd.DataFrame([[len(cluster), round(similarity, 2), ', '.join(map(str, cluster))]
+                               for cluster, similarity in clusters],
+                              columns=['Issues', 'Similarity', 'Issue Numbers'])
+            print(df.head(50).to_string(index=False))
+
+    def find_clusters(self, loader: DataLoader, threshold: float) -> List[Tuple[List[Union[int, str]], float]]:
+        if loader.has_columns():
+            # Only the numbers, repositories, titles and bodies are read from the cache
+            dataset = loader.get_columns()
+            numbers = issue_names(dataset['number'].tolist(), dataset.text('repository'))
+            texts = [f'{title or ""} {text or ""}' for title, text in zip(dataset.text('title'), dataset.text('text'))]
+        else:
+            issues = loader.get_issues()
+            numbers = issue_names([issue.number for issue in issues], [issue.repository for issue in issues])
+            texts = [f'{issue.title or ""} {issue.text or ""}' for issue in issues]
+        return find_near_duplicates(numbers, texts, threshold)
+
+
+def issue_names(numbers: List[int], repositories: List[str]) -> List[Union[int, str]]:
+    """
+    The numbers of the issues, or 'repository#number' if the issues come
+    from more than one repository (numbers are only unique per repository).
+    """
+    if len({repository for repository in repositories if repository is not None}) <= 1:
+        return numbers
+    return [f'{repository}#{number}' if repository is not None else str(number)
+            for number, repository in zip(numbers, repositories)]
+
+
+def shingle_hashes(texts: List[str], size: int = SHINGLE_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hashes the distinct shingles of each text (the whole text if it has
+    fewer words). Returns the hashes and the offsets of the hashes of each
+    text: those of text i are [offsets[i]:offsets[i+1]].
+    """
+    hashes = []
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    for i, text in enumerate(texts):
+        words = tokenize(text)
+        shingles = {' '.join(words[j:j + size]) for j in range(max(1, len(words) - size + 1))} if words else set()
+        hashes.extend(zlib.crc32(shingle.encode('utf-8')) for shingle in shingles)
+        offsets[i + 1] = len(hashes)
+    return np.array(hashes, dtype=np.uint64), offsets
+
+
+def drop_frequent_shingles(hashes: np.ndarray, offsets: np.ndarray, max_frequency: float = MAX_SHINGLE_FREQUENCY):
+    """
+    Removes the shingles occurring in more than max_frequency of the texts
+    (and in more than MIN_SHINGLE_LIMIT texts).
+    """
+    num_texts = len(offsets) - 1
+    _, inverse, counts = np.unique(hashes, return_inverse=True, return_counts=True)
+    keep = counts[inverse.ravel()] <= max(MIN_SHINGLE_LIMIT, max_frequency * num_texts)
+    rows = np.repeat(np.arange(num_texts), np.diff(offsets))
+    new_offsets = np.zeros(num_texts + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows[keep], minlength=num_texts), out=new_offsets[1:])
+    return hashes[keep], new_offsets
+
+
+def minhash_signatures(hashes: np.ndarray, offsets: np.ndarray, num_hashes: int = NUM_HASHES,
+                       seed: int = 611) -> np.ndarray:
+    """
+    MinHash signature of each text: for each of num_hashes hash functions,
+    the minimum hash of its shingles. The hash functions are multiply-shift
+    hashes of the 32-bit shingle hashes, applied in chunks to all shingles
+    at once. Texts without shingles get the maximum value everywhere.
+    """
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(1, 2**63, size=num_hashes, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    increments = rng.integers(0, 2**63, size=num_hashes, dtype=np.uint64)
+    num_texts = len(offsets) - 1
+    signatures = np.full((num_texts, num_hashes), np.iinfo(np.uint32).max, dtype=np.uint32)
+    nonempty = np.flatnonzero(np.diff(offsets) > 0)
+    if len(nonempty) == 0:
+        return signatures
+    # Keep the intermediate (shingles x chunk) matrix at about 64 MB
+    chunk = max(1, min(num_hashes, 2**23 // max(1, len(hashes))))
+    for start in range(0, num_hashes, chunk):
+        values = (hashes[:, None] * multipliers[None, start:start + chunk] + increments[None, start:start + chunk]) \
+            >> np.uint64(32)
+        signatures[nonempty, start:start + chunk] = np.minimum.reduceat(values, offsets[nonempty], axis=0)
+    return signatures
+
+
+def candidate_pairs(signatures: np.ndarray, band_rows: int = BAND_ROWS) -> np.ndarray:
+    """
+    Locality-sensitive hashing: the pairs (i, j), i < j, of texts whose
+    signatures agree on all values of at least one band.
+    """
+    num_texts, num_hashes = signatures.shape
+    pairs = []
+    for start in range(0, num_hashes - band_rows + 1, band_rows):
+        band = np.ascontiguousarray(signatures[:, start:start + band_rows])
+        keys = band.view(np.dtype((np.void, band.dtype.itemsize * band_rows))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        inverse = inverse.ravel()
+        shared = counts[inverse] > 1
+        rows = np.flatnonzero(shared)
+        rows = rows[np.argsort(inverse[rows], kind='stable')]
+        bounds = np.flatnonzero(np.r_[True, inverse[rows][1:] != inverse[rows][:-1], True])
+        for first, end in zip(bounds[:-1], bounds[1:]):
+            bucket = rows[first:end]
+            if len(bucket) > MAX_BUCKET_PAIRS:
+                pairs.append(np.column_stack([np.full(len(bucket) - 1, bucket[0]), bucket[1:]]))
+            else:
+                i, j = np.triu_indices(len(bucket), 1)
+                pairs.append(np.column_stack([bucket[i], bucket[j]]))
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.concatenate(pairs).astype(np.int64)
+    # Texts without shingles share the maximum signature but are not similar
+    empty = np.all(signatures == np.iinfo(np.uint32).max, axis=1)
+    pairs = pairs[~empty[pairs[:, 0]] & ~empty[pairs[:, 1]]]
+    return np.unique(pairs, axis=0)
+
+
+def similarities(signatures: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """
+    Estimated Jaccard similarity of the pairs: the fraction of agreeing signature values.
+    """
+    if len(pairs) == 0:
+        return np.zeros(0)
+    return (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+
+
+def cluster_pairs(num_texts: int, pairs: np.ndarray, scores: np.ndarray) -> List[Tuple[List[int], float]]:
+    """
+    Groups the texts connected by the pairs. Returns the clusters (indices
+    of their texts) with the average similarity of their pairs, largest
+    and most similar first.
+    """
+    parents = list(range(num_texts))
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    for i, j in pairs.tolist():
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parents[max(root_i, root_j)] = min(root_i, root_j)
+    members = {}
+    totals = {}
+    for (i, j), score in zip(pairs.tolist(), scores.tolist()):
+        root = find(i)
+        members.setdefault(root, set()).update((i, j))
+        count, total = totals.get(root, (0, 0.0))
+        totals[root] = (count + 1, total + score)
+    clusters = [(sorted(members[root]), totals[root][1] / totals[root][0]) for root in members]
+    return sorted(clusters, key=lambda cluster: (-len(cluster[0]), -cluster[1], cluster[0]))
+
+
+def find_near_duplicates(numbers: List[int], texts: List[str], threshold: float = 0.5,
+                         num_hashes: int = NUM_HASHES, band_rows: int = BAND_ROWS) -> List[Tuple[List[int], float]]:
+    """
+    Returns clusters of the numbers of texts (title and body of the issues)
+    whose estimated similarity is at least threshold, each with the average
+    similarity of its pairs, largest and most similar first.
+    """
+    hashes, offsets = drop_frequent_shingles(*shingle_hashes(texts))
+    signatures = minhash_signatures(hashes, offsets, num_hashes)
+    pairs = candidate_pairs(signatures, band_rows)
+    scores = similarities(signatures, pairs)
+    similar = scores >= threshold
+    clusters = cluster_pairs(len(texts), pairs[similar], scores[similar])
+    return [([numbers[i] for i in cluster], score) for cluster, score in clusters]
+
+
+if __name__ == '__main__':
+    # Invoke run method when running this module directly
+    DuplicateAnalysis().run()
@@ -0,0 +1,157 @@
+"""
+Distributions of the time to close an issue and of the time to assign
+a user to an issue, overall, per label and per creator. Each distribution
+is summarized by a mergeable quantile sketch, so they are computed in a
+single pass with bounded memory per breakdown, shard by shard, and stored
+with the issue cache so that later runs do not go over the issues again.
+"""
+
+from datetime import datetime
+from typing import Dict, List
+
+import pandas as pd
+
+from analysis.mapreduce import map_reduce
+from analysis.sketches import QuantileSketch, combine_sketches
+from data.data_loader import DataLoader
+from models.model import Issue
+
+TIME_TO_CLOSE = 'time_to_close'
+TIME_TO_ASSIGN = 'time_to_assign'
+METRICS = [TIME_TO_CLOSE, TIME_TO_ASSIGN]
+# Name under which the sketches are stored with the issue cache
+DERIVED_NAME = 'duration_sketches'
+
+
+def _days(start:datetime, end:datetime) -> float:
+    if not isinstance(start, datetime) or not isinstance(end, datetime):
+        return None
+    return (end - start).total_seconds() / 86400
+
+
+class DurationSketches:
+    """
+    Quantile sketches of the durations (in days) of each metric,
+    overall and per label and per creator.
+    """
+
+    def __init__(self, k:int=200):
+        """
+        Constructor
+        """
+        self.k:int = k
+        self.overall:Dict[str, QuantileSketch] = {metric: QuantileSketch(k) for metric in METRICS}
+        self.by_label:Dict[str, Dict[str, QuantileSketch]] = {metric: {} for metric in METRICS}
+        self.by_creator:Dict[str, Dict[str, QuantileSketch]] = {metric: {} for metric in METRICS}
+
+    def add(self, metric:str, days:float, labels:List[str], creator:str):
+        self.overall[metric].add(days)
+        for label in set(labels):
+            self.by_label[metric].setdefault(label, QuantileSketch(self.k)).add(days)
+        if creator is not None:
+            self.by_creator[metric].setdefault(creator, QuantileSketch(self.k)).add(days)
+
+    def add_issue(self, issue:Issue):
+        """
+        Adds the time to close (from creation to the last 'closed' event of
+        a closed issue) and the times to assign (from creation to each
+        'assigned' event of an issue with assignees) of the issue.
+        """
+        closed_date = None
+        for event in issue.events:
+            if event.event_type == 'closed':
+                closed_date = event.event_date
+            elif event.event_type == 'assigned' and issue.assignees:
+                days = _days(issue.created_date, event.event_date)
+                if days is not None:
+                    self.add(TIME_TO_ASSIGN, days, issue.labels, issue.creator)
+        if issue.state == 'closed':
+            days = _days(issue.created_date, closed_date)
+            if days is not None:
+                self.add(TIME_TO_CLOSE, days, issue.labels, issue.creator)
+
+    def merge(self, other:'DurationSketches') -> 'DurationSketches':
+        merged = DurationSketches(max(self.k, other.k))
+        for metric in METRICS:
+            merged.overall[metric] = self.overall[metric].merge(other.overall[metric])
+            merged.by_label[metric] = combine_sketches(self.by_label[metric], other.by_label[metric])
+            merged.by_creator[metric] = combine_sketches(self.by_creator[metric], other.by_creator[metric])
+        return merged
+
+    def get(self, metric:str, label:str=None, creator:str=None) -> QuantileSketch:
+        """
+        Returns the sketch of a metric, for a label or a creator if given
+        (an empty sketch if there is no such duration).
+        """
+        if label is not None:
+            return self.by_label[metric].get(label, QuantileSketch(self.k))
+        if creator is not None:
+            return self.by_creator[metric].get(creator, QuantileSketch(self.k))
+        return self.overall[metric]
+
+    def summary(self, metric:str, by:str=None, top_n:int=None) -> pd.DataFrame:
+        """
+        Count, p50, p90 and p99 (in days) of a metric, overall or per 'label'
+        or 'creator' (only the top_n keys with the most durations, if given).
+        """
+        if by is None:
+            sketches = {'all': self.overall[metric]}
+        else:
+            sketches = self.by_label[metric] if by == 'label' else self.by_creator[metric]
+        keys = sorted(sketches, key=lambda key: sketches[key].count, reverse=True)[:top_n]
+        rows = [[sketches[key].count] + sketches[key].quantiles([0.5, 0.9, 0.99]) for key in keys]
+        return pd.DataFrame(rows, index=pd.Index(keys, name=by), columns=['count', 'p50', 'p90', 'p99'])
+
+    def to_json(self):
+        return {
+            'k': self.k,
+            'overall': {metric: sketch.to_json() for metric, sketch in self.overall.items()},
+            'by_label': {metric: {key: sketch.to_json() for key, sketch in sketches.items()}
+                         for metric, sketches in self.by_label.items()},
+            'by_creator': {metric: {key: sketch.to_json() for key, sketch in sketches.items()}
+                           for metric, sketches in self.by_creator.items()},
+        }
+
+    @staticmethod
+    def from_json(jobj) -> 'DurationSketches':
+        durations = DurationSketches(jobj['k'])
+        durations.overall = {metric: QuantileSketch.from_json(sketch) for metric, sketch in jobj['overall'].items()}
+        durations.by_label = {metric: {key: QuantileSketch.from_json(sketch) for key, sketch in sketches.items()}
+                              for metric, sketches in jobj['by_label'].items()}
+        durations.by_creator = {metric: {key: QuantileSketch.from_json(sketch) for key, sketch in sketches.items()}
+                                for metric, sketches in jobj['by_creator'].items()}
+        return durations
+
+
+def map_duration_sketches(issues:List[Issue]) -> DurationSketches:
+    """
+    Map step: sketches of the durations of the issues.
+    """
+    durations = DurationSketches()
+    for issue in issues:
+        durations.add_issue(issue)
+    return durations
+
+
+def stored_duration_sketches(loader:DataLoader) -> DurationSketches:
+    """
+    Returns the duration sketches stored with the issue cache if they are
+    current, None otherwise (without going over the issues).
+    """
+    jobj = loader.get_derived(DERIVED_NAME)
+    return None if jobj is None else DurationSketches.from_json(jobj)
+
+
+def get_duration_sketches(loader:DataLoader, issues:List[Issue]=None) -> DurationSketches:
+    """
+    Returns the duration sketches stored with the issue cache if they are
+    current, otherwise computes them from the issues (loaded if not given)
+    and stores them with the cache.
+    """
+    durations = stored_duration_sketches(loader)
+    if durations is not None:
+        return durations
+    durations = map_reduce(issues if issues is not None else loader.get_issues(),
+                           map_duration_sketches, combine_sketches)
+    loader.save_derived(DERIVED_NAME, durations.to_json())
+    return durations
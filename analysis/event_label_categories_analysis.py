@@ -1,10 +1,13 @@
 from typing import List, Dict
+from functools import partial
 import matplotlib.pyplot as plt
 import pandas as pd
 
+from analysis.mapreduce import map_reduce, combine_counts
 from data.data_loader import DataLoader
 from models.model import Issue
 import config
+import results
 
 class EventLabelCategoriesAnalysis:
     """
@@ -29,21 +32,11 @@ class EventLabelCategoriesAnalysis:
         if not label_prefix.endswith('/'):
             label_prefix += '/'
         
-        # Load all issues using the DataLoader
-        issues: List[Issue] = DataLoader().get_issues()
+        loader = DataLoader()
         
         # Dictionary to hold label event counts
-        label_event_counts: Dict[str, int] = {}
-        
-        # Iterate through each event in each issue
-        for issue in issues:
-            for event in issue.events:
-                if event.event_type == 'labeled' and event.label:
-                    label = event.label.lower()
-                    # Check if the label starts with the specified prefix
-                    if label.startswith(label_prefix):
-                        label_clean = label.replace(label_prefix, '')
-                        label_event_counts[label_clean] = label_event_counts.get(label_clean, 0) + 1
+        label_event_counts: Dict[str, int] = loader.get_result(
+            'label_events', {'label_prefix': label_prefix}, lambda: self.count_label_events(loader, label_prefix))
         
         if not label_event_counts:
             print(f"No label events found with prefix '{label_prefix}' in the issues data.")
@@ -75,7 +68,43 @@ class EventLabelCategoriesAnalysis:
                          textcoords="offset points",
                          ha='center', va='bottom', fontsize=9, fontweight='bold')
         
-        plt.show()
+        results.show('label_category_events', data=(label_prefix, df_sorted))
+
+    def count_label_events(self, loader: DataLoader, label_prefix: str) -> Dict[str, int]:
+        """
+        Counts the label events per label with the prefix (without the prefix).
+        """
+        # Use the label event counts maintained with the issue cache when they are current
+        aggregates = loader.get_aggregates()
+        if aggregates is None:
+            # Load all issues using the DataLoader
+            issues: List[Issue] = loader.get_issues()
+            return map_reduce(issues, partial(map_label_events, label_prefix=label_prefix), combine_counts)
+        label_event_counts: Dict[str, int] = {}
+        for label, count in aggregates.labeled_events.items():
+            if label.startswith(label_prefix):
+                label_clean = label.replace(label_prefix, '')
+                label_event_counts[label_clean] = label_event_counts.get(label_clean, 0) + count
+        return label_event_counts
+
+
+def map_label_events(issues: List[Issue], label_prefix: str) -> Dict[str, int]:
+    """
+    Map step: counts the label events of the issues for labels with the prefix.
+    """
+    label_event_counts: Dict[str, int] = {}
+    
+    # Iterate through each event in each issue
+    for issue in issues:
+        for event in issue.events:
+            if event.event_type == 'labeled' and event.label:
+                label = event.label.lower()
+                # Check if the label starts with the specified prefix
+                if label.startswith(label_prefix):
+                    label_clean = label.replace(label_prefix, '')
+                    label_event_counts[label_clean] = label_event_counts.get(label_clean, 0) + 1
+    
+    return label_event_counts
 
 if __name__ == '__main__':
     # Invoke run method when running this module directly
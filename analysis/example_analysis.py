@@ -1,12 +1,16 @@
 
 from typing import List
+from functools import partial
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from analysis.mapreduce import map_reduce
+from analysis.sketches import TopK, combine_sketches
 from data.data_loader import DataLoader
 from models.model import Issue,Event
 import config as config
+import results
 
 class ExampleAnalysis:
     """
@@ -20,6 +24,8 @@ class ExampleAnalysis:
         """
         # Parameter is passed in via command line (--user)
         self.USER:str = config.get_parameter('user')
+        # Parameter is passed in via command line (--approximate)
+        self.APPROXIMATE:bool = config.get_parameter('approximate') is True
     
     def run(self):
         """
@@ -28,15 +34,14 @@ class ExampleAnalysis:
         Note: this is just an example analysis. You should replace the code here
         with your own implementation and then implement two more such analyses.
         """
-        issues:List[Issue] = DataLoader().get_issues()
+        loader = DataLoader()
+        top_n:int = 50
+        total_events, num_issues, top_creators = loader.get_result(
+            'example', {'user': self.USER, 'approximate': self.APPROXIMATE, 'top_n': top_n},
+            lambda: self.compute(loader.get_issues(), top_n))
         
         ### BASIC STATISTICS
-        # Calculate the total number of events for a specific user (if specified in command line args)
-        total_events:int = 0
-        for issue in issues:
-            total_events += len([e for e in issue.events if self.USER is None or e.author == self.USER])
-        
-        output:str = f'Found {total_events} events across {len(issues)} issues'
+        output:str = f'Found {total_events} events across {num_issues} issues'
         if self.USER is not None:
             output += f' for {self.USER}.'
         else:
@@ -46,19 +51,48 @@ class ExampleAnalysis:
 
         ### BAR CHART
         # Display a graph of the top 50 creators of issues
-        top_n:int = 50
-        # Create a dataframe (with only the creator's name) to make statistics a lot easier
-        df = pd.DataFrame.from_records([{'creator':issue.creator} for issue in issues])
-        # Determine the number of issues for each creator and generate a bar chart of the top N
-        df_hist = df.groupby(df["creator"]).value_counts().nlargest(top_n).plot(kind="bar", figsize=(14,8), title=f"Top {top_n} issue creators")
+        df_hist = top_creators.plot(kind="bar", figsize=(14,8), title=f"Top {top_n} issue creators")
         # Set axes labels
         df_hist.set_xlabel("Creator Names")
         df_hist.set_ylabel("# of issues created")
         # Plot the chart
-        plt.show() 
+        results.show('top_creators', data=(top_n, top_creators))
+
+    def compute(self, issues:List[Issue], top_n:int):
+        """
+        Counts the events (of the user, if specified in command line args)
+        and the issues of the top N creators.
+        """
+        # Calculate the total number of events for a specific user
+        total_events:int = 0
+        for issue in issues:
+            total_events += len([e for e in issue.events if self.USER is None or e.author == self.USER])
+        
+        if self.APPROXIMATE:
+            # Estimate the top N creators with a bounded-memory sketch instead of counting every creator
+            sketch:TopK = map_reduce(issues, partial(map_creator_sketch, top_n=top_n), combine_sketches)
+            top_creators = pd.Series(dict(sketch.top(top_n)), name='count')
+            top_creators.index.name = 'creator'
+        else:
+            # Create a dataframe (with only the creator's name) to make statistics a lot easier
+            df = pd.DataFrame.from_records([{'creator':issue.creator} for issue in issues])
+            # Determine the number of issues for each creator
+            top_creators = df.groupby(df["creator"]).value_counts().nlargest(top_n)
+        return total_events, len(issues), top_creators
                         
     
 
+def map_creator_sketch(issues:List[Issue], top_n:int) -> TopK:
+    """
+    Map step: sketch of the number of issues per creator.
+    """
+    sketch = TopK(top_n)
+    for issue in issues:
+        if issue.creator is not None:
+            sketch.add(issue.creator)
+    return sketch
+
+
 if __name__ == '__main__':
     # Invoke run method when running this module directly
     ExampleAnalysis().run()
\ No newline at end of file
@@ -0,0 +1,160 @@
+from typing import Dict
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from analysis.timeline_analysis import events_of_type
+from data.columnar import ColumnarIssues
+from data.data_loader import DataLoader
+import config
+import results
+
+# Number of labels shown in the breakdown by label
+TOP_LABELS = 15
+
+
+class FirstResponseAnalysis:
+    """
+    Measures how quickly issues get a first response: the time from the
+    creation of an issue to the first comment by someone other than its
+    creator. Outputs the findings to standard out, broken down by label
+    and by month of creation, and generates a line chart of the monthly
+    median.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # Parameters are passed in via command line (--user, --label)
+        self.user: str = config.get_parameter('user')
+        self.label: str = config.get_parameter('label')
+
+    def run(self):
+        loader = DataLoader()
+        summary, labels, months = loader.get_result('first_response', {'user': self.user, 'label': self.label},
+                                                    lambda: self.compute(loader))
+        if summary['issues'] == 0:
+            print("No issues found.")
+            return
+
+        print(f"Time to first response of {summary['issues']} issues:")
+        print(f"Responded to: {summary['responded']} ({summary['response_rate']:.1%})")
+        if summary['responded']:
+            print(f"Median: {summary['median_hours']:.1f} hours, 90th percentile: {summary['p90_hours']:.1f} hours")
+        print(f"\nTime to first response by label (in hours, top {TOP_LABELS} labels):")
+        print(format_breakdown(labels.head(TOP_LABELS)))
+        print("\nTime to first response by month of creation (in hours):")
+        print(format_breakdown(months))
+
+        plt.figure(figsize=(14, 7))
+        plt.plot(months.index, months['median_hours'], marker='o', label='Median')
+        plt.plot(months.index, months['p90_hours'], linestyle='--', label='90th percentile')
+        plt.yscale('log')
+        plt.xlabel('Month of Creation')
+        plt.ylabel('Time to First Response (hours)')
+        plt.title('Time to First Response by Month')
+        step = max(1, len(months) // 24)
+        plt.xticks(ticks=range(0, len(months), step), labels=months.index[::step], rotation=45, ha='right')
+        plt.legend()
+        plt.grid(True, linestyle='--', alpha=0.5)
+        plt.tight_layout()
+        results.show('first_response', data=months)
+
+    def compute(self, loader: DataLoader):
+        dataset = loader.get_dataset(user=self.user, label=self.label)
+        hours = first_response_hours(dataset)
+        return response_summary(hours), by_label(dataset, hours), by_month(dataset, hours)
+
+
+def first_response_hours(dataset: ColumnarIssues) -> np.ndarray:
+    """
+    Hours from the creation of each issue to its first comment by an
+    author other than its creator (NaN if there is none). Comments are
+    taken in the order of their dates, not of the events, and comments
+    dated before the creation are ignored.
+    """
+    num_rows = len(dataset)
+    event_offsets = dataset['event_offsets']
+    event_rows = np.repeat(np.arange(num_rows), np.diff(event_offsets))
+    event_authors = dataset['event_author']
+    event_dates = dataset['event_date']
+    created = dataset['created_date']
+    # Comments by someone other than the creator, dated after the creation
+    responses = events_of_type(dataset, 'commented') \
+        & (event_authors >= 0) & (event_authors != dataset['creator'][event_rows]) \
+        & (event_dates >= created[event_rows].astype(event_dates.dtype))
+    rows = event_rows[responses]
+    dates = event_dates[responses]
+    # The earliest response of each issue comes first within its rows
+    order = np.lexsort((dates, rows))
+    rows, dates = rows[order], dates[order]
+    first = np.r_[True, rows[1:] != rows[:-1]] if len(rows) else np.zeros(0, dtype=bool)
+    first_response = np.full(num_rows, np.datetime64('NaT'), dtype=event_dates.dtype)
+    first_response[rows[first]] = dates[first]
+    return (first_response - created.astype(event_dates.dtype)) / np.timedelta64(1, 'h')
+
+
+def response_summary(hours: np.ndarray) -> Dict:
+    """
+    Number of issues and of responded issues, the response rate and the
+    median and 90th percentile of the hours to the first response.
+    """
+    responded = hours[~np.isnan(hours)]
+    return {
+        'issues': len(hours),
+        'responded': len(responded),
+        'response_rate': len(responded) / len(hours) if len(hours) else 0.0,
+        'median_hours': float(np.median(responded)) if len(responded) else np.nan,
+        'p90_hours': float(np.percentile(responded, 90)) if len(responded) else np.nan,
+    }
+
+
+def breakdown(keys: np.ndarray, hours: np.ndarray) -> pd.DataFrame:
+    """
+    The response statistics of the issues (hours) grouped by keys.
+    """
+    df = pd.DataFrame({'key': keys, 'hours': hours})
+    grouped = df.groupby('key', sort=True)['hours']
+    stats = pd.DataFrame({
+        'issues': grouped.size(),
+        'responded': grouped.count(),
+        'median_hours': grouped.median(),
+        'p90_hours': grouped.quantile(0.9),
+    })
+    stats['response_rate'] = stats['responded'] / stats['issues']
+    stats.index.name = None
+    return stats
+
+
+def format_breakdown(stats: pd.DataFrame) -> str:
+    return stats.assign(response_rate=stats['response_rate'].map('{:.1%}'.format)) \
+        .to_string(float_format='{:.1f}'.format)
+
+
+def by_label(dataset: ColumnarIssues, hours: np.ndarray) -> pd.DataFrame:
+    """
+    Response statistics per label (an issue counts for each of its labels),
+    labels with the most issues first.
+    """
+    label_offsets = dataset['label_offsets']
+    label_ids = dataset['label_ids']
+    label_hours = np.repeat(hours, np.diff(label_offsets))
+    names = np.array(dataset.labels.values + [None], dtype=object)[label_ids]
+    stats = breakdown(names, label_hours)
+    return stats.sort_values('issues', ascending=False, kind='stable')
+
+
+def by_month(dataset: ColumnarIssues, hours: np.ndarray) -> pd.DataFrame:
+    """
+    Response statistics per month of creation.
+    """
+    created = dataset['created_date']
+    has_month = ~np.isnat(created)
+    months = np.datetime_as_string(created[has_month].astype('datetime64[M]'), unit='M')
+    return breakdown(months, hours[has_month])
+
+
+if __name__ == '__main__':
+    # Invoke run method when running this module directly
+    FirstResponseAnalysis().run()
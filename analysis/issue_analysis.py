@@ -1,8 +1,14 @@
 import config as config
+import results
 from typing import List
 from collections import defaultdict
+from functools import partial
+from analysis.mapreduce import map_reduce, combine_counts, combine_lists
+from analysis.sketches import TopK, combine_sketches
+from analysis.duration_sketches import DurationSketches, TIME_TO_ASSIGN, get_duration_sketches, stored_duration_sketches
 from data.data_loader import DataLoader
 import matplotlib.pyplot as plt
+import numpy as np
 
 from models.model import Issue
 
@@ -19,9 +25,19 @@ class IssueAnalysis:
         # Parameter is passed in via command line (--user)
         self.user:str = config.get_parameter('user')
         self.label:str = config.get_parameter('label')
+        # Parameter is passed in via command line (--approximate)
+        self.approximate:bool = config.get_parameter('approximate') is True
+        # Counts maintained with the issue cache (if enabled and current)
+        self.aggregates = None
+        # Quantile sketches of the times to assign (and to close), if available
+        self.durations:DurationSketches = None
     
     def run(self):
-        issues:List[Issue] = DataLoader().get_issues()
+        loader = DataLoader()
+        self.aggregates = loader.get_aggregates()
+        issues:List[Issue] = loader.get_issues()
+        # The sketches cost a pass over the issues: only built in approximate mode, otherwise used if stored
+        self.durations = get_duration_sketches(loader, issues) if self.approximate else stored_duration_sketches(loader)
         
         #==========Find the ratio of open and closed issues============
         analysis_open_closed_ratio(self,issues)
@@ -38,38 +54,62 @@ class IssueAnalysis:
             time_to_assign_user_label(self,issues)
 
 
-def time_to_assign_user_label(self, issues):
+def map_assign_times(issues, label=None):
+    # Map step: months from creation to each assignment of the issues (with the label, if given)
     assignedtime = []
     for issue in issues:
-        for label in issue.labels:
-            if label == self.label and issue.assignees:
+        matches = 1 if label is None else len([l for l in issue.labels if l == label])
+        for _ in range(matches):
+            if issue.assignees:
                 for event in issue.events:
                     if event.event_type== "assigned":
                         assignedtime.append((event.event_date - issue.created_date).total_seconds()/(86400*30))
+    return assignedtime
+
+def time_to_assign_user_label(self, issues):
     plt.figure(figsize=(10, 6))  # Set figure size for better visibility
-    plt.hist(assignedtime, bins=40, color='skyblue', edgecolor='black')
+    if self.approximate:
+        counts, edges = assign_sketch_histogram(self.durations.get(TIME_TO_ASSIGN, label=self.label))
+    else:
+        assignedtime = map_reduce(issues, partial(map_assign_times, label=self.label), combine_lists)
+        counts, edges = np.histogram(np.asarray(assignedtime, dtype=np.float64), bins=40)
+    plot_histogram(counts, edges)
     plt.xlabel('Time to Assign (Months)')
     plt.ylabel('Number of Issues')
     plt.title('Distribution of Time to Assign Issues (Label = '+self.label+')')
-    plt.show()
+    if self.durations is not None:
+        print('Time to assign a user in days (Label = '+self.label+'):')
+        print(self.durations.summary(TIME_TO_ASSIGN, by='label').reindex([self.label]).to_string())
+    results.show('time_to_assign_label', data=(self.label, counts, edges))
 
 def time_to_assign_user(self,issues):
-    assignedtime = []
-    for issue in issues:
-        if issue.assignees:
-            for event in issue.events:
-                if event.event_type== "assigned":
-                    assignedtime.append((event.event_date - issue.created_date).total_seconds()/(86400*30))
-    print(len(assignedtime))
-
     plt.figure(figsize=(10, 6))
 
     # Create a histogram to show the distribution of assignment times
-    plt.hist(assignedtime, bins=40, color='skyblue', edgecolor='black')
+    if self.approximate:
+        counts, edges = assign_sketch_histogram(self.durations.get(TIME_TO_ASSIGN))
+    else:
+        assignedtime = map_reduce(issues, map_assign_times, combine_lists)
+        print(len(assignedtime))
+        counts, edges = np.histogram(np.asarray(assignedtime, dtype=np.float64), bins=40)
+    plot_histogram(counts, edges)
     plt.xlabel('Time to Assign a User (Months)')
     plt.ylabel('Number of Issues')
     plt.title('Distribution of Time to Assign Issues')
-    plt.show()      
+    if self.durations is not None:
+        print('Time to assign a user in days:')
+        print(self.durations.summary(TIME_TO_ASSIGN).to_string())
+        print(self.durations.summary(TIME_TO_ASSIGN, by='label', top_n=10).to_string())
+    results.show('time_to_assign', data=(counts, edges))
+
+def assign_sketch_histogram(sketch):
+    # Histogram of the times to assign (in months) from the bins of the sketch
+    counts, edges = sketch.histogram(bins=40)
+    return counts, edges / 30
+
+def plot_histogram(counts, edges):
+    # Draws binned counts like plt.hist would, without handing it every sample
+    plt.bar(edges[:-1], counts, width=np.diff(edges), align='edge', color='skyblue', edgecolor='black')
 
 def analysis_open_closed_ratio(self,issues):
     open_issue_count = 0
@@ -87,19 +127,30 @@ def analysis_open_closed_ratio(self,issues):
     plt.pie([open_issue_count, closed_issue_count], labels=["open issue","closed issue"], autopct='%1.1f%%', startangle=140)
     plt.title('Status of Issues')
     plt.axis('equal')
-    plt.show()
+    results.show('open_closed_ratio', data=[open_issue_count, closed_issue_count])
 
 def top_labels(self,issues):
-    all_labels = find_labels(self,issues)
     label_title:List[str] = []
     label_count:List[int]= []
-    for label,count in all_labels[0:5]:
-        label_title.append(label)
-        label_count.append(count)
-    #Combining all other issues in one category i.e. others
-    others_count = 0
-    for label,count in all_labels[5:]:
-        others_count += count
+    if self.approximate and self.aggregates is None:
+        #Estimating the top 5 labels with a bounded-memory sketch
+        sketch = map_reduce(issues, map_label_sketch, combine_sketches)
+        for label,count in sketch.top(5):
+            label_title.append(label)
+            label_count.append(count)
+        others_count = max(0, sketch.total - sum(label_count))
+    else:
+        if self.approximate:
+            # The aggregates of the issue cache already hold the exact counts, a sketch would only be less accurate
+            print('Top 5 labels: exact counts from the issue cache aggregates')
+        all_labels = find_labels(self,issues)
+        for label,count in all_labels[0:5]:
+            label_title.append(label)
+            label_count.append(count)
+        #Combining all other issues in one category i.e. others
+        others_count = 0
+        for label,count in all_labels[5:]:
+            others_count += count
     
     label_title.append("all other labels")
     label_count.append(others_count)
@@ -112,7 +163,7 @@ def top_labels(self,issues):
     plt.ylabel("Counts")
     plt.xticks(rotation=45, ha="right")
     plt.tight_layout()
-    plt.show() 
+    results.show('top_labels', data=(label_title, label_count))
 
 def assignee_ratio(self,issues):
     no_assignee_in_issue = 0
@@ -127,14 +178,31 @@ def assignee_ratio(self,issues):
     plt.pie([no_assignee_in_issue, assignee_in_issue], labels=["No Assignee", "Have assignee"], autopct='%1.1f%%', startangle=140)
     plt.title('Ratio of assignee and no assignee')
     plt.axis('equal')
-    plt.show()
-        
-def find_labels(self, issues):
+    results.show('assignee_ratio', data=[no_assignee_in_issue, assignee_in_issue])
+
+
+def map_label_counts(issues):
+    # Map step: number of issues carrying each label
     label_counts = defaultdict(int)
     # Iterate over each Issue object in the list
     for issue in issues:
         for label in issue.labels:
             label_counts[label] += 1
+    return label_counts
+
+def map_label_sketch(issues):
+    # Map step: sketch of the number of issues carrying each label
+    sketch = TopK(5)
+    for issue in issues:
+        for label in issue.labels:
+            sketch.add(label)
+    return sketch
+
+def find_labels(self, issues):
+    if self.aggregates is not None:
+        label_counts = self.aggregates.label_totals
+    else:
+        label_counts = map_reduce(issues, map_label_counts, combine_counts)
     sorted_labels = sorted(label_counts.items(), key=lambda x: x[1], reverse=True)
     return sorted_labels
 
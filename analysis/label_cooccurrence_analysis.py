@@ -0,0 +1,166 @@
+from typing import List, Tuple
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from data.columnar import ColumnarIssues
+from data.data_loader import DataLoader
+import config
+import results
+
+# Number of label pairs listed, and of labels in the heatmap
+TOP_PAIRS = 20
+TOP_LABELS = 15
+# Largest label x label matrix counted densely (about 4000 labels)
+MAX_DENSE_PAIRS = 2**24
+
+
+class LabelCooccurrenceAnalysis:
+    """
+    Finds the labels that are used together: for each pair of labels, the
+    number of issues carrying both, their lift (how much more often they
+    occur together than if they were independent) and their Jaccard
+    similarity. Outputs the most frequent pairs (or, with --label, the
+    labels most often used with that label) to standard out and generates
+    a heatmap of the co-occurrences of the top labels.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # Parameters are passed in via command line (--user, --label)
+        self.user: str = config.get_parameter('user')
+        self.label: str = config.get_parameter('label')
+
+    def run(self):
+        loader = DataLoader()
+        label_counts, pairs = loader.get_result('label_cooccurrence', {'user': self.user},
+                                                lambda: self.compute(loader))
+        if pairs.empty:
+            print("No issues with more than one label found.")
+            return
+
+        if self.label is not None:
+            partners = pairs[(pairs['label_a'] == self.label) | (pairs['label_b'] == self.label)]
+            partners = partners.assign(label=np.where(partners['label_a'] == self.label,
+                                                      partners['label_b'], partners['label_a']))
+            print(f"Labels used together with '{self.label}' ({label_counts.get(self.label, 0)} issues):")
+            table = partners[['label', 'issues', 'lift', 'jaccard']]
+        else:
+            print(f"Top {TOP_PAIRS} label pairs:")
+            table = pairs
+        print(table.head(TOP_PAIRS).to_string(index=False, float_format='{:.2f}'.format))
+
+        top_labels = label_counts.index[:TOP_LABELS].tolist()
+        matrix = cooccurrence_matrix(label_counts, pairs, top_labels)
+        fig, ax = plt.subplots(figsize=(12, 10))
+        image = ax.imshow(matrix, cmap='Blues')
+        ax.set_xticks(range(len(top_labels)), labels=top_labels, rotation=45, ha='right')
+        ax.set_yticks(range(len(top_labels)), labels=top_labels)
+        for i in range(len(top_labels)):
+            for j in range(len(top_labels)):
+                ax.text(j, i, int(matrix[i, j]), ha='center', va='center', fontsize=8,
+                        color='white' if matrix[i, j] > matrix.max() / 2 else 'black')
+        fig.colorbar(image, ax=ax, label='Number of Issues')
+        ax.set_title(f'Co-occurrence of the Top {len(top_labels)} Labels')
+        plt.tight_layout()
+        results.show('label_cooccurrence', data=(top_labels, matrix))
+
+    def compute(self, loader: DataLoader) -> Tuple[pd.Series, pd.DataFrame]:
+        return label_cooccurrence(loader.get_dataset(user=self.user))
+
+
+def incidence(dataset: ColumnarIssues) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    The sparse issue x label incidence matrix in CSR form: the offsets of
+    the labels of each issue and their column, numbering only the labels
+    in use (in order of their ids), with the names of the columns.
+    Repeated labels of an issue count once.
+    """
+    label_offsets = dataset['label_offsets']
+    label_rows = np.repeat(np.arange(len(dataset)), np.diff(label_offsets))
+    label_ids = dataset['label_ids']
+    # Missing labels (-1) are left out
+    label_rows, label_ids = label_rows[label_ids >= 0], label_ids[label_ids >= 0]
+    used = np.flatnonzero(np.bincount(label_ids, minlength=len(dataset.labels.values)))
+    column_of = np.zeros(len(dataset.labels.values), dtype=np.int64)
+    column_of[used] = np.arange(len(used))
+    # Distinct (issue, column) entries, sorted by issue
+    entries = np.unique(label_rows * len(used) + column_of[label_ids])
+    rows, columns = entries // max(1, len(used)), entries % max(1, len(used))
+    offsets = np.zeros(len(dataset) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(dataset)), out=offsets[1:])
+    return offsets, columns, [dataset.labels.values[label_id] for label_id in used.tolist()]
+
+
+def cooccurrence_pairs(offsets: np.ndarray, columns: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The nonzero entries (a, b, count) with a < b of the label x label
+    co-occurrence matrix, the product of the transposed incidence matrix
+    with itself: every issue contributes the pairs of its labels.
+    """
+    counts = np.diff(offsets)
+    # Each label entry is paired with every label entry of its issue
+    partners = np.repeat(counts, counts)
+    first = np.repeat(np.arange(len(columns)), partners)
+    pair_starts = np.cumsum(partners) - partners
+    within = np.arange(len(first)) - np.repeat(pair_starts, partners)
+    second = np.repeat(offsets[:-1], counts * counts) + within
+    a, b = columns[first], columns[second]
+    upper = a < b
+    num_columns = int(columns.max()) + 1 if len(columns) else 1
+    keys = a[upper].astype(np.int64) * num_columns + b[upper]
+    if num_columns * num_columns <= MAX_DENSE_PAIRS:
+        # Few labels: count into the dense matrix instead of sorting the pairs
+        pair_counts = np.bincount(keys, minlength=num_columns * num_columns)
+        keys = np.flatnonzero(pair_counts)
+        pair_counts = pair_counts[keys]
+    else:
+        keys, pair_counts = np.unique(keys, return_counts=True)
+    return keys // num_columns, keys % num_columns, pair_counts
+
+
+def label_cooccurrence(dataset: ColumnarIssues) -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    The number of issues carrying each label (most used first), and the
+    pairs of labels used together with the number of issues carrying both,
+    their lift and their Jaccard similarity (most frequent pairs first).
+    """
+    offsets, columns, names = incidence(dataset)
+    totals = np.bincount(columns, minlength=len(names))
+    a, b, together = cooccurrence_pairs(offsets, columns)
+    num_issues = len(dataset)
+    names = np.array(names, dtype=object)
+    pairs = pd.DataFrame({
+        'label_a': names[a] if len(a) else [],
+        'label_b': names[b] if len(b) else [],
+        'issues': together,
+        'lift': together * num_issues / (totals[a] * totals[b]).astype(np.float64),
+        'jaccard': together / (totals[a] + totals[b] - together).astype(np.float64),
+    })
+    pairs = pairs.sort_values(['issues', 'lift', 'label_a', 'label_b'], ascending=[False, False, True, True],
+                              kind='stable').reset_index(drop=True)
+    label_counts = pd.Series(totals, index=names, name='issues')
+    label_counts = label_counts.iloc[np.lexsort((np.arange(len(totals)), -totals))]
+    return label_counts, pairs
+
+
+def cooccurrence_matrix(label_counts: pd.Series, pairs: pd.DataFrame, labels: List[str]) -> np.ndarray:
+    """
+    Dense co-occurrence matrix of the given labels, with the number of
+    issues carrying each label on the diagonal.
+    """
+    index = {label: i for i, label in enumerate(labels)}
+    matrix = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    for i, label in enumerate(labels):
+        matrix[i, i] = label_counts[label]
+    selected = pairs[pairs['label_a'].isin(index) & pairs['label_b'].isin(index)]
+    for label_a, label_b, count in zip(selected['label_a'], selected['label_b'], selected['issues']):
+        matrix[index[label_a], index[label_b]] = matrix[index[label_b], index[label_a]] = count
+    return matrix
+
+
+if __name__ == '__main__':
+    # Invoke run method when running this module directly
+    LabelCooccurrenceAnalysis().run()
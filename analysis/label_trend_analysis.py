@@ -1,10 +1,17 @@
-from typing import List, Dict
+from typing import List, Dict, Set, Tuple
+from functools import partial
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import math
 
+from analysis.mapreduce import map_reduce, map_reduce_columns, combine_nested_counts
+from analysis.sketches import TopK, HyperLogLog, combine_sketches
+from data.columnar import ColumnarIssues
 from data.data_loader import DataLoader
 from models.model import Issue
+import config
+import results
 
 class LabelTrendAnalysis:
     """
@@ -12,27 +19,21 @@ class LabelTrendAnalysis:
     Outputs the findings to standard out and generates a line chart for top labels.
     """
 
-    def run(self):
-        issues: List[Issue] = DataLoader().get_issues()
-
-        # Dictionary to hold label usage per month
-        label_trend: Dict[str, Dict[str, int]] = {}
+    def __init__(self):
+        """
+        Constructor
+        """
+        # Parameter is passed in via command line (--approximate)
+        self.approximate: bool = config.get_parameter('approximate') is True
 
-        for issue in issues:
-            created_month = issue.created_date.strftime('%Y-%m') if issue.created_date else None
-            if not created_month:
-                continue  # Skip if creation date is missing
-
-            for label in issue.labels:
-                if label not in label_trend:
-                    label_trend[label] = {}
-                if created_month not in label_trend[label]:
-                    label_trend[label][created_month] = 0
-                label_trend[label][created_month] += 1
+    def run(self):
+        loader = DataLoader()
+        # Distinct creators per label and month are only estimated in approximate mode
+        label_trend, distinct_creators = loader.get_result('label_trend', {'approximate': self.approximate},
+                                                           lambda: self.count_label_trend(loader))
 
         # Calculate total label usage to identify top labels
-        total_label_usage = {label: sum(months.values()) for label, months in label_trend.items()}
-        top_labels = sorted(total_label_usage, key=total_label_usage.get, reverse=True)[:5]  # Top 5 labels
+        top_labels = find_top_labels(label_trend)
 
         # Filtering label_trend to include only top labels
         top_label_trend = {label: label_trend[label] for label in top_labels}
@@ -48,6 +49,13 @@ class LabelTrendAnalysis:
         print("Label Trend Over Time (Top 5 Labels):")
         print(df_sorted.to_string())
 
+        if distinct_creators is not None:
+            distinct_dict: Dict[str, Dict[str, int]] = {label: {} for label in top_labels}
+            for (label, month), creators in distinct_creators.items():
+                distinct_dict[label][month] = creators.estimate()
+            print("Distinct Issue Creators per Month (Top 5 Labels, approximate):")
+            print(pd.DataFrame(distinct_dict).fillna(0).sort_index().to_string())
+
         # Prepare for plotting
         months = df_sorted.index.tolist()
         num_months = len(months)
@@ -69,8 +77,150 @@ class LabelTrendAnalysis:
         plt.legend(title='Labels', bbox_to_anchor=(1.05, 1), loc='upper left')
         plt.grid(True, linestyle='--', alpha=0.5)
         plt.tight_layout()
-        plt.show()
+        results.show('label_trend', data=df_sorted)
+
+    def count_label_trend(self, loader: DataLoader) -> Tuple[Dict[str, Dict[str, int]], Dict[Tuple[str, str], HyperLogLog]]:
+        """
+        Counts the labels per month of creation of the issues, and in
+        approximate mode estimates the distinct creators of the top labels.
+        """
+        # Use the counts maintained with the issue cache when they are current
+        aggregates = loader.get_aggregates()
+        if aggregates is not None or loader.has_columns():
+            if aggregates is not None:
+                label_trend = aggregates.label_month
+            else:
+                # Only the creation dates and labels are read from the cache, never the event columns
+                label_trend = map_reduce_columns(loader.get_columns(), map_label_trend_columns, combine_nested_counts)
+            if not self.approximate:
+                return label_trend, None
+            # The counts are exact, only the distinct creators of the top labels are estimated
+            top_label_set = set(find_top_labels(label_trend))
+            if loader.has_columns():
+                distinct_creators = map_reduce_columns(
+                    loader.get_columns(), partial(map_distinct_creators_columns, labels=top_label_set), combine_sketches)
+            else:
+                distinct_creators = map_reduce(
+                    loader.get_issues(), partial(map_distinct_creators, labels=top_label_set), combine_sketches)
+            return label_trend, distinct_creators
+        if self.approximate:
+            # Find the top labels with a sketch, then only count the months of those labels
+            issues: List[Issue] = loader.get_issues()
+            sketch: TopK = map_reduce(issues, map_label_trend_sketch, combine_sketches)
+            top_label_set = {label for label, _ in sketch.top(5)}
+            label_trend = map_reduce(issues, partial(map_label_trend, labels=top_label_set), combine_nested_counts)
+            distinct_creators = map_reduce(issues, partial(map_distinct_creators, labels=top_label_set), combine_sketches)
+            return label_trend, distinct_creators
+        return map_reduce(loader.get_issues(), map_label_trend, combine_nested_counts), None
+
+
+def find_top_labels(label_trend: Dict[str, Dict[str, int]], n: int = 5) -> List[str]:
+    """
+    The n labels used most often over all months.
+    """
+    total_label_usage = {label: sum(months.values()) for label, months in label_trend.items()}
+    return sorted(total_label_usage, key=total_label_usage.get, reverse=True)[:n]
+
+
+def map_label_trend(issues: List[Issue], labels: Set[str] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Map step: counts the labels of the issues per month of creation
+    (only the given labels, if any).
+    """
+    # Dictionary to hold label usage per month
+    label_trend: Dict[str, Dict[str, int]] = {}
+
+    for issue in issues:
+        created_month = issue.created_date.strftime('%Y-%m') if issue.created_date else None
+        if not created_month:
+            continue  # Skip if creation date is missing
+
+        for label in issue.labels:
+            if labels is not None and label not in labels:
+                continue
+            if label not in label_trend:
+                label_trend[label] = {}
+            if created_month not in label_trend[label]:
+                label_trend[label][created_month] = 0
+            label_trend[label][created_month] += 1
+
+    return label_trend
+
 
+def map_label_trend_sketch(issues: List[Issue]) -> TopK:
+    """
+    Map step: sketch of the label usage of the issues with a creation date.
+    """
+    sketch = TopK(5)
+    for issue in issues:
+        if issue.created_date:
+            for label in issue.labels:
+                sketch.add(label)
+    return sketch
+
+
+def map_distinct_creators(issues: List[Issue], labels: Set[str]) -> Dict[Tuple[str, str], HyperLogLog]:
+    """
+    Map step: sketches of the distinct creators of the issues per label and month of creation.
+    """
+    creators: Dict[Tuple[str, str], HyperLogLog] = {}
+    for issue in issues:
+        if not issue.created_date:
+            continue
+        created_month = issue.created_date.strftime('%Y-%m')
+        for label in issue.labels:
+            if label in labels:
+                if (label, created_month) not in creators:
+                    creators[(label, created_month)] = HyperLogLog(precision=10)
+                creators[(label, created_month)].add(issue.creator)
+    return creators
+
+
+def map_label_trend_columns(dataset: ColumnarIssues, start: int, end: int) -> Dict[str, Dict[str, int]]:
+    """
+    Map step over the rows [start, end) of the columnar dataset, with the
+    same result as map_label_trend. Only issue-level columns are read.
+    """
+    label_offsets = dataset['label_offsets'][start:end + 1]
+    label_ids = dataset['label_ids'][label_offsets[0]:label_offsets[-1]]
+    months = dataset['created_date'][start:end].astype('datetime64[M]')
+
+    # Month of creation of the issue of every label, skipping issues without a creation date
+    label_months = np.repeat(months, np.diff(label_offsets))
+    has_month = ~np.isnat(label_months)
+    pairs, counts = np.unique(np.stack([label_ids[has_month], label_months[has_month].astype(np.int64)]),
+                              axis=1, return_counts=True)
+
+    label_trend: Dict[str, Dict[str, int]] = {}
+    month_names = np.datetime_as_string(pairs[1].astype('datetime64[M]'), unit='M')
+    for label_id, month, count in zip(pairs[0].tolist(), month_names.tolist(), counts.tolist()):
+        label_trend.setdefault(dataset.labels.values[label_id], {})[month] = count
+    return label_trend
+
+
+def map_distinct_creators_columns(dataset: ColumnarIssues, start: int, end: int,
+                                  labels: Set[str]) -> Dict[Tuple[str, str], HyperLogLog]:
+    """
+    Map step over the rows [start, end) of the columnar dataset, with the
+    same result as map_distinct_creators.
+    """
+    label_offsets = dataset['label_offsets'][start:end + 1]
+    label_ids = dataset['label_ids'][label_offsets[0]:label_offsets[-1]]
+    counts = np.diff(label_offsets)
+    label_months = np.repeat(dataset['created_date'][start:end].astype('datetime64[M]'), counts)
+    label_creators = np.repeat(dataset['creator'][start:end], counts)
+
+    label_set_ids = [dataset.labels.lookup(label) for label in labels]
+    selected = np.isin(label_ids, [i for i in label_set_ids if i >= 0]) & ~np.isnat(label_months)
+    month_names = np.datetime_as_string(label_months[selected], unit='M')
+    creators: Dict[Tuple[str, str], HyperLogLog] = {}
+    for label_id, month, creator in zip(label_ids[selected].tolist(), month_names.tolist(),
+                                        label_creators[selected].tolist()):
+        key = (dataset.labels.values[label_id], month)
+        if key not in creators:
+            creators[key] = HyperLogLog(precision=10)
+        creators[key].add(dataset.users.decode(creator))
+    return creators
 
 
 if __name__ == '__main__':
@@ -0,0 +1,137 @@
+"""
+Sharded map-reduce execution for the counting phases of the analyses.
+
+An analysis declares a map step, which computes a partial result (e.g.,
+counts) over a shard of the issues, and an associative combine step,
+which merges two partial results. Large inputs are partitioned into
+shards that are mapped in a process pool; small inputs are mapped
+serially since starting worker processes would cost more than the work.
+
+Issue objects have to be pickled to reach the workers. For the columnar
+dataset, map_reduce_columns instead places the columns in shared memory
+and only sends row ranges to the workers.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from typing import Callable, Dict, List, TypeVar
+
+import config as config
+from data.columnar import ColumnarIssues
+from data.shared_columns import SharedColumns, attach, get_attached
+
+T = TypeVar('T')
+
+# Below this number of items, the map step runs in the current process
+DEFAULT_PARALLEL_THRESHOLD = 50000
+# Number of shards per worker process, to even out unequal shards
+SHARDS_PER_WORKER = 4
+
+
+def _int_parameter(name:str, default:int) -> int:
+    try:
+        return int(config.get_parameter(name))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_workers() -> int:
+    """
+    Number of worker processes (ENPM611_PROJECT_WORKERS, defaults to the number of cores).
+    """
+    return max(1, _int_parameter('ENPM611_PROJECT_WORKERS', os.cpu_count() or 1))
+
+
+def get_parallel_threshold() -> int:
+    """
+    Minimum number of items to run in parallel (ENPM611_PROJECT_PARALLEL_THRESHOLD).
+    """
+    return _int_parameter('ENPM611_PROJECT_PARALLEL_THRESHOLD', DEFAULT_PARALLEL_THRESHOLD)
+
+
+def shard(items:List, num_shards:int) -> List[List]:
+    """
+    Partitions the items into at most num_shards contiguous shards of similar size.
+    """
+    num_shards = max(1, min(num_shards, len(items)))
+    size, remainder = divmod(len(items), num_shards)
+    shards = []
+    start = 0
+    for i in range(num_shards):
+        end = start + size + (1 if i < remainder else 0)
+        shards.append(items[start:end])
+        start = end
+    return shards
+
+
+def map_reduce(items:List, map_step:Callable[[List], T], combine_step:Callable[[T, T], T],
+               workers:int=None, threshold:int=None) -> T:
+    """
+    Applies the map step to shards of the items and merges the partial
+    results with the combine step. The steps must be module-level functions
+    (or functools.partial objects of them) so that they can be sent to the
+    worker processes.
+    """
+    workers = workers if workers is not None else get_workers()
+    threshold = threshold if threshold is not None else get_parallel_threshold()
+    if workers <= 1 or len(items) < max(threshold, 2):
+        return map_step(items)
+    shards = shard(items, workers * SHARDS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+        partials = list(executor.map(map_step, shards))
+    return reduce(combine_step, partials)
+
+
+def _map_shared_rows(map_step:Callable, token:str, start:int, end:int):
+    return map_step(get_attached(token), start, end)
+
+
+def map_reduce_columns(dataset:ColumnarIssues, map_step:Callable[[ColumnarIssues, int, int], T],
+                       combine_step:Callable[[T, T], T], workers:int=None, threshold:int=None) -> T:
+    """
+    Like map_reduce, but for the columnar dataset. The map step receives the
+    dataset and a range of rows [start, end). In parallel execution, the
+    workers attach to the columns in shared memory, so the cost of starting
+    a worker does not depend on the size of the dataset.
+    """
+    workers = workers if workers is not None else get_workers()
+    threshold = threshold if threshold is not None else get_parallel_threshold()
+    if workers <= 1 or len(dataset) < max(threshold, 2):
+        return map_step(dataset, 0, len(dataset))
+    bounds = [(s.start, s.stop) for s in shard(range(len(dataset)), workers * SHARDS_PER_WORKER)]
+    with SharedColumns(dataset) as shared:
+        # Each worker attaches to the shared columns once, when it starts
+        with ProcessPoolExecutor(max_workers=min(workers, len(bounds)),
+                                 initializer=attach, initargs=(shared.handle,)) as executor:
+            partials = list(executor.map(_map_shared_rows, [map_step] * len(bounds),
+                                         [shared.handle.token] * len(bounds),
+                                         [start for start, _ in bounds], [end for _, end in bounds]))
+    return reduce(combine_step, partials)
+
+
+def combine_counts(first:Dict, second:Dict) -> Dict:
+    """
+    Merges two dictionaries of counts.
+    """
+    merged = dict(first)
+    for key, count in second.items():
+        merged[key] = merged.get(key, 0) + count
+    return merged
+
+
+def combine_nested_counts(first:Dict[str, Dict], second:Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    Merges two dictionaries of dictionaries of counts (e.g., per label per month).
+    """
+    merged = dict(first)
+    for key, counts in second.items():
+        merged[key] = combine_counts(merged[key], counts) if key in merged else dict(counts)
+    return merged
+
+
+def combine_lists(first:List, second:List) -> List:
+    """
+    Concatenates two lists of samples (e.g., the values of a histogram).
+    """
+    return first + second
@@ -4,8 +4,10 @@ from data.data_loader import DataLoader
 
 from typing import List
 import matplotlib.pyplot as plt
+from analysis.mapreduce import map_reduce, combine_lists
 from data.data_loader import DataLoader
 from models.model import Issue
+import results
 
 class ReopenedIssueAnalysis:
 
@@ -13,7 +15,10 @@ class ReopenedIssueAnalysis:
 
     def __init__(self):
 
-        self.issues: List[Issue] = DataLoader().get_issues()
+        loader = DataLoader()
+        #counts maintained with the issue cache, the issues are only loaded if they are not current
+        self.aggregates = loader.get_aggregates()
+        self.issues: List[Issue] = loader.get_issues() if self.aggregates is None else None
         self.reopened_issues_count = 0
         self.reopened_issues_details = []
 
@@ -21,43 +26,28 @@ class ReopenedIssueAnalysis:
 
     #to analyze reopened issues
 
-        for issue in self.issues:
-            closed = False
-            reopened = False
-            for event in issue.events:
-                if event.event_type == 'closed':
-                    closed = True
-                elif event.event_type == 'reopened':
-                    reopened = True
-            
-            #if issue was both closed and then has event type reopened as well, then we store the details of the issue
-
-            if closed and reopened:
-                self.reopened_issues_count += 1
-                self.reopened_issues_details.append({
-                    'issue_id' : issue.number,
-                    'title': issue.title,
-                    'labels': issue.labels
-                })
+        if self.aggregates is not None:
+            self.reopened_issues_count = self.aggregates.reopened_count
+            return
+
+        self.reopened_issues_details = map_reduce(self.issues, map_reopened_issues, combine_lists)
+        self.reopened_issues_count = len(self.reopened_issues_details)
 
     def display_summary(self):
         #to display analysis summary
 
         print(f"Total issues that were reopened after closing: {self.reopened_issues_count}")
-        label_counts = {}
-        for issue in self.reopened_issues_details:
-            for label in issue['labels']:
-                if label in label_counts:
-                    label_counts[label] += 1
-                else:
-                    label_counts[label] = 1
+        label_counts = self.count_reopened_labels()
         
         print("Reopened Issues by Label: ")
         for label, count in label_counts.items():
             print(f"{label}: {count}")
 
-    def plot_reopened_issues(self):
-        #to plot a bar chart of reopened issues against what label they have
+    def count_reopened_labels(self):
+        #to count the reopened issues per label
+
+        if self.aggregates is not None:
+            return dict(self.aggregates.reopened_labels)
 
         label_counts = {}
         for issue in self.reopened_issues_details:
@@ -66,6 +56,12 @@ class ReopenedIssueAnalysis:
                     label_counts[label] += 1
                 else:
                     label_counts[label] = 1
+        return label_counts
+
+    def plot_reopened_issues(self):
+        #to plot a bar chart of reopened issues against what label they have
+
+        label_counts = self.count_reopened_labels()
         
         labels = list(label_counts.keys())
         counts = list(label_counts.values())
@@ -100,11 +96,11 @@ class ReopenedIssueAnalysis:
                 label.set_fontweight('bold')
 
         plt.tight_layout()
-        plt.show(block=False) #non-blocking show so that second plot can show too
+        results.show('reopened_by_label', block=False, data=label_counts) #non-blocking show so that second plot can show too
 
     def plot_reopened_pichart(self):
 
-        total_no_of_issues = len(self.issues)
+        total_no_of_issues = self.aggregates.issue_count if self.aggregates is not None else len(self.issues)
         reopened_issues = self.reopened_issues_count
         non_reopened_issues = total_no_of_issues - reopened_issues
 
@@ -123,7 +119,7 @@ class ReopenedIssueAnalysis:
             pad=30  # Move the title higher by adding padding
         )
         plt.axis('equal')  # Equal aspect ratio to ensure that the pie chart is drawn as a circle.
-        plt.show()
+        results.show('reopened_ratio', data=sizes)
 
 
 
@@ -136,6 +132,31 @@ class ReopenedIssueAnalysis:
             self.plot_reopened_issues()
             self.plot_reopened_pichart()
 
+
+def map_reopened_issues(issues):
+
+    #map step: details of the issues that were closed and then reopened
+
+    details = []
+    for issue in issues:
+        closed = False
+        reopened = False
+        for event in issue.events:
+            if event.event_type == 'closed':
+                closed = True
+            elif event.event_type == 'reopened':
+                reopened = True
+        
+        #if issue was both closed and then has event type reopened as well, then we store the details of the issue
+
+        if closed and reopened:
+            details.append({
+                'issue_id' : issue.number,
+                'title': issue.title,
+                'labels': issue.labels
+            })
+    return details
+
 if __name__ == '__main__':
 # Run the analysis when the script is executed
     ReopenedIssueAnalysis().run()
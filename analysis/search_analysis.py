@@ -0,0 +1,73 @@
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+
+from data.data_loader import DataLoader
+from data.issue_filter import FilterTerm, IssueFilter
+import config
+import profiling
+
+class SearchAnalysis:
+    """
+    Searches the titles, bodies and comments of the issues (see
+    data/search_index.py for the query syntax) and lists the best
+    matching issues. Outputs the findings to standard out.
+    """
+
+    def __init__(self, query: str = None):
+        """
+        Constructor
+        """
+        # Parameters are passed in via command line (--query, --user, --label)
+        self.query: str = query if query is not None else config.get_parameter('query')
+        self.user: str = config.get_parameter('user')
+        self.label: str = config.get_parameter('label')
+
+    def run(self):
+        if not self.query:
+            print("No query specified. Please provide a query with the --query flag.")
+            return
+        results = search(str(self.query), user=self.user, label=self.label)
+        print(f"Issues matching '{self.query}': {len(results)}")
+        if results:
+            top_results = results[:20]
+            df = pd.DataFrame([[number, round(score, 2), title] for number, score, title in top_results],
+                              columns=['Issue', 'Score', 'Title'])
+            print(df.to_string(index=False))
+
+
+def search(query: str, user: str = None, label: str = None, limit: int = None,
+           loader: DataLoader = None) -> List[Tuple[int, float, str]]:
+    """
+    Returns the number, BM25 score and title of the issues matching the
+    query, best first. Only issues matching the filter expression and
+    involving the user (as creator or author of an event) and/or carrying
+    the label, if given, are returned.
+    """
+    loader = loader or DataLoader()
+    dataset, index = loader.get_search_index()
+    terms = list(loader.filter.terms)
+    if user:
+        terms.append(FilterTerm('user', values=[user]))
+    if label:
+        terms.append(FilterTerm('label', values=[label]))
+    mask = IssueFilter(terms=terms).mask(dataset) if terms else None
+    with profiling.timed('search'):
+        results = index.search(query, mask=mask, limit=limit)
+    rows = np.array([row for row, _ in results], dtype=np.int64)
+    numbers = dataset['number'][rows].tolist()
+    titles = dataset.text('title', rows.tolist())
+    return [(number, score, title) for number, (_, score), title in zip(numbers, results, titles)]
+
+
+def search_issues(query: str, user: str = None, label: str = None, limit: int = None,
+                  loader: DataLoader = None) -> List[int]:
+    """
+    Returns the numbers of the issues matching the query, best first.
+    """
+    return [number for number, _, _ in search(query, user, label, limit, loader)]
+
+
+if __name__ == '__main__':
+    # Invoke run method when running this module directly
+    SearchAnalysis().run()
@@ -0,0 +1,358 @@
+"""
+Approximate, bounded-memory summaries for the approximate mode of the
+analyses (--approximate). All sketches are mergeable, so they can be
+built per shard by a map step and combined afterwards.
+
+Error bounds, for a stream of N items:
+
+- SpaceSaving(capacity m): every item with a frequency above N/m is
+  kept, and each reported count overestimates the true count by at
+  most N/m (the exact bound per item is kept in `errors`).
+- CountMinSketch(width w, depth d): an estimate never underestimates
+  and exceeds the true count by more than e*N/w with probability at
+  most exp(-d).
+- TopK combines both: Space-Saving picks the candidates, and each count
+  is the smaller of the two overestimates.
+- HyperLogLog(precision p): the relative standard error of the distinct
+  count is 1.04/sqrt(2^p), e.g., 1.6% for p=12 and 3.3% for p=10.
+- QuantileSketch(k): the rank of a reported quantile is off by about
+  1.7/k of N, i.e., under 1% for the default k=200, using O(k) memory.
+"""
+
+import hashlib
+import heapq
+import math
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+_MASK64 = (1 << 64) - 1
+
+
+def hash64(item:Hashable, seed:int=0) -> int:
+    """
+    Stable 64-bit hash (unlike hash(), it is the same in every process).
+    """
+    digest = hashlib.blake2b(str(item).encode('utf-8'), digest_size=8, salt=seed.to_bytes(8, 'little')).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class SpaceSaving:
+    """
+    Space-Saving summary keeping at most `capacity` items with their
+    (over-)estimated counts. The item with the smallest count is found
+    with a min-heap holding one entry per item; entries are only brought
+    up to date when they reach the top, so an increment is O(1) and an
+    eviction O(log capacity) amortized.
+    """
+
+    def __init__(self, capacity:int=100):
+        """
+        Constructor
+        """
+        self.capacity:int = capacity
+        self.counts:Dict[Hashable, int] = {}
+        # Maximum overestimation of each count
+        self.errors:Dict[Hashable, int] = {}
+        self.total:int = 0
+        # [count, insertion number, item]; the count may be lower than the current count of the item
+        self._heap:List[list] = []
+        self._insertions:int = 0
+
+    def _push(self, item:Hashable):
+        self._insertions += 1
+        heapq.heappush(self._heap, [self.counts[item], self._insertions, item])
+
+    def _pop_smallest(self) -> Hashable:
+        """
+        Removes the entry of the item with the smallest count from the heap and returns the item.
+        """
+        while True:
+            entry = self._heap[0]
+            count = self.counts[entry[2]]
+            if entry[0] == count:
+                return heapq.heappop(self._heap)[2]
+            # Outdated entry, move it to its current count
+            entry[0] = count
+            heapq.heapreplace(self._heap, entry)
+
+    def add(self, item:Hashable, count:int=1):
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+            self._push(item)
+        else:
+            # Replace the item with the smallest count
+            smallest = self._pop_smallest()
+            minimum = self.counts.pop(smallest)
+            del self.errors[smallest]
+            self.counts[item] = minimum + count
+            self.errors[item] = minimum
+            self._push(item)
+
+    def merge(self, other:'SpaceSaving') -> 'SpaceSaving':
+        """
+        Merges two summaries. An item missing from one summary may have
+        occurred up to that summary's minimum count times.
+        """
+        merged = SpaceSaving(max(self.capacity, other.capacity))
+        self_min = min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+        other_min = min(other.counts.values()) if len(other.counts) >= other.capacity else 0
+        counts = {}
+        errors = {}
+        for item in set(self.counts) | set(other.counts):
+            counts[item] = self.counts.get(item, self_min) + other.counts.get(item, other_min)
+            errors[item] = self.errors.get(item, self_min) + other.errors.get(item, other_min)
+        for item in sorted(counts, key=counts.get, reverse=True)[:merged.capacity]:
+            merged.counts[item] = counts[item]
+            merged.errors[item] = errors[item]
+            merged._push(item)
+        merged.total = self.total + other.total
+        return merged
+
+    def top(self, k:int) -> List[Tuple[Hashable, int]]:
+        return sorted(self.counts.items(), key=lambda x: x[1], reverse=True)[:k]
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch estimating the count of any item.
+    """
+
+    def __init__(self, width:int=2048, depth:int=5):
+        """
+        Constructor
+        """
+        self.width:int = width
+        self.depth:int = depth
+        self.table:np.ndarray = np.zeros((depth, width), dtype=np.int64)
+        self.total:int = 0
+
+    def _cells(self, item:Hashable) -> List[int]:
+        # Derive the row hashes from two independent hashes
+        first = hash64(item, 1)
+        second = hash64(item, 2) | 1
+        return [((first + row * second) & _MASK64) % self.width for row in range(self.depth)]
+
+    def add(self, item:Hashable, count:int=1):
+        self.table[np.arange(self.depth), self._cells(item)] += count
+        self.total += count
+
+    def estimate(self, item:Hashable) -> int:
+        return int(self.table[np.arange(self.depth), self._cells(item)].min())
+
+    def merge(self, other:'CountMinSketch') -> 'CountMinSketch':
+        merged = CountMinSketch(self.width, self.depth)
+        merged.table = self.table + other.table
+        merged.total = self.total + other.total
+        return merged
+
+
+class TopK:
+    """
+    Approximate top-K items of a stream, with Space-Saving choosing the
+    candidates and Count-Min tightening their counts.
+    """
+
+    def __init__(self, k:int, capacity:int=None, width:int=2048, depth:int=5):
+        """
+        Constructor
+        """
+        self.k:int = k
+        self.candidates:SpaceSaving = SpaceSaving(capacity or max(10 * k, 100))
+        self.sketch:CountMinSketch = CountMinSketch(width, depth)
+
+    def add(self, item:Hashable, count:int=1):
+        self.candidates.add(item, count)
+        self.sketch.add(item, count)
+
+    @property
+    def total(self) -> int:
+        return self.sketch.total
+
+    def merge(self, other:'TopK') -> 'TopK':
+        merged = TopK(max(self.k, other.k))
+        merged.candidates = self.candidates.merge(other.candidates)
+        merged.sketch = self.sketch.merge(other.sketch)
+        return merged
+
+    def top(self, k:int=None) -> List[Tuple[Hashable, int]]:
+        counts = {item: min(count, self.sketch.estimate(item)) for item, count in self.candidates.counts.items()}
+        return sorted(counts.items(), key=lambda x: x[1], reverse=True)[:k or self.k]
+
+
+class HyperLogLog:
+    """
+    HyperLogLog estimating the number of distinct items.
+    """
+
+    def __init__(self, precision:int=12):
+        """
+        Constructor
+        """
+        self.precision:int = precision
+        self.registers:np.ndarray = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, item:Hashable):
+        value = hash64(item)
+        index = value >> (64 - self.precision)
+        remainder = (value << self.precision) & _MASK64
+        # Position of the leftmost 1-bit in the remaining bits
+        rank = (64 - self.precision + 1) if remainder == 0 else (64 - remainder.bit_length() + 1)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other:'HyperLogLog') -> 'HyperLogLog':
+        merged = HyperLogLog(self.precision)
+        merged.registers = np.maximum(self.registers, other.registers)
+        return merged
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros > 0:
+            # Small range correction (linear counting)
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class QuantileSketch:
+    """
+    KLL sketch of the distribution of numeric values. Values are kept in
+    a hierarchy of compactors: when a compactor is full, it is sorted and
+    every other value moves to the next compactor with twice the weight.
+    """
+
+    def __init__(self, k:int=200):
+        """
+        Constructor
+        """
+        self.k:int = k
+        self.compactors:List[List[float]] = [[]]
+        # Alternates which half of a compactor is kept, per level
+        self.offsets:List[int] = [0]
+        self.count:int = 0
+        self.min:float = None
+        self.max:float = None
+
+    def _capacity(self, level:int) -> int:
+        # Lower levels get geometrically smaller capacities
+        return max(2, int(math.ceil(self.k * (2 / 3) ** (len(self.compactors) - level - 1))))
+
+    def _compress(self):
+        while sum(len(items) for items in self.compactors) > sum(self._capacity(level) for level in range(len(self.compactors))):
+            for level, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self.compactors.append([])
+                        self.offsets.append(0)
+                    items.sort()
+                    # Keep the largest value here if the number of values is odd
+                    kept = [items.pop()] if len(items) % 2 else []
+                    self.compactors[level + 1].extend(items[self.offsets[level]::2])
+                    self.offsets[level] ^= 1
+                    self.compactors[level] = kept
+                    break
+
+    def add(self, value:float):
+        if value is None or math.isnan(value):
+            return
+        value = float(value)
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.compactors[0].append(value)
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def update(self, values:Sequence[float]):
+        """
+        Adds many values at once.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.min = float(values.min()) if self.min is None else min(self.min, float(values.min()))
+        self.max = float(values.max()) if self.max is None else max(self.max, float(values.max()))
+        # Add in chunks, so that memory stays bounded for large inputs
+        for start in range(0, len(values), self.k):
+            self.compactors[0].extend(values[start:start + self.k].tolist())
+            self._compress()
+
+    def merge(self, other:'QuantileSketch') -> 'QuantileSketch':
+        merged = QuantileSketch(max(self.k, other.k))
+        levels = max(len(self.compactors), len(other.compactors))
+        merged.compactors = [(self.compactors[level] if level < len(self.compactors) else []) +
+                             (other.compactors[level] if level < len(other.compactors) else [])
+                             for level in range(levels)]
+        merged.offsets = [0] * levels
+        merged.count = self.count + other.count
+        bounds = [value for value in [self.min, other.min] if value is not None]
+        merged.min = min(bounds) if bounds else None
+        bounds = [value for value in [self.max, other.max] if value is not None]
+        merged.max = max(bounds) if bounds else None
+        merged._compress()
+        return merged
+
+    def _weighted(self) -> Tuple[np.ndarray, np.ndarray]:
+        values = np.array([value for items in self.compactors for value in items], dtype=np.float64)
+        weights = np.array([1 << level for level, items in enumerate(self.compactors) for _ in items], dtype=np.float64)
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def quantiles(self, qs:Sequence[float]) -> List[float]:
+        """
+        Estimates the values at the given quantiles (between 0 and 1).
+        """
+        if self.count == 0:
+            return [None] * len(qs)
+        values, weights = self._weighted()
+        ranks = np.cumsum(weights)
+        positions = np.searchsorted(ranks, np.asarray(qs, dtype=np.float64) * ranks[-1], side='left')
+        result = values[np.minimum(positions, len(values) - 1)]
+        # The exact extremes are known
+        result = np.where(np.asarray(qs) <= 0, self.min, np.where(np.asarray(qs) >= 1, self.max, result))
+        return result.tolist()
+
+    def quantile(self, q:float) -> float:
+        return self.quantiles([q])[0]
+
+    def histogram(self, bins:int=40) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Estimates the number of values per bin, as numpy.histogram does
+        (bins of equal width between the minimum and the maximum).
+        """
+        if self.count == 0:
+            return np.zeros(bins, dtype=np.int64), np.linspace(0, 1, bins + 1)
+        values, weights = self._weighted()
+        counts, edges = np.histogram(values, bins=bins, range=(self.min, self.max), weights=weights)
+        return np.round(counts).astype(np.int64), edges
+
+    def to_json(self) -> Dict:
+        return dict(vars(self))
+
+    @staticmethod
+    def from_json(jobj:Dict) -> 'QuantileSketch':
+        sketch = QuantileSketch(jobj['k'])
+        for name in vars(sketch):
+            setattr(sketch, name, jobj[name])
+        return sketch
+
+
+def combine_sketches(first, second):
+    """
+    Combine step for map steps that return a sketch (or a dictionary of sketches).
+    """
+    if isinstance(first, dict):
+        merged = dict(first)
+        for key, sketch in second.items():
+            merged[key] = merged[key].merge(sketch) if key in merged else sketch
+        return merged
+    return first.merge(second)
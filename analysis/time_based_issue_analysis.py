@@ -1,9 +1,12 @@
 from typing import List
 from numpy import average
+import numpy as np
 import pandas as pd
 import plotly.express as px
 
 import config as config
+import results
+from analysis.duration_sketches import DurationSketches, TIME_TO_CLOSE, get_duration_sketches, stored_duration_sketches
 from data.data_loader import DataLoader
 from models.model import Issue
 
@@ -21,9 +24,14 @@ class TimeBasedIssueAnalysis:
         """
         # Parameter is passed in via command line (--user)
         self.user:str = config.get_parameter('user')
+        # Parameter is passed in via command line (--approximate)
+        self.approximate:bool = config.get_parameter('approximate') is True
+        # Quantile sketches of the times to close (and to assign), if available
+        self.durations:DurationSketches = None
     
     def run(self):
-        issues:List[Issue] = DataLoader().get_issues()
+        loader = DataLoader()
+        issues:List[Issue] = loader.get_issues()
         open_issues = []
         closed_issues = []
 
@@ -37,6 +45,11 @@ class TimeBasedIssueAnalysis:
 
         closed_issues_df = self.create_dataframe(closed_issues)
 
+        # The sketches cost a pass over the issues: only built in approximate mode, otherwise used if stored
+        self.durations = get_duration_sketches(loader, issues) if self.approximate else stored_duration_sketches(loader)
+        if self.durations is not None:
+            self.print_time_to_close_quantiles(self.user)
+
         if self.user != None:
             self.analyse_based_on_user(self.user, closed_issues_df)
         else:
@@ -78,7 +91,7 @@ class TimeBasedIssueAnalysis:
         closed_issues_df['time_diff_in_days'] = closed_issues_df['time_taken'].dt.days
 
         # Calculate the time difference in months
-        closed_issues_df['time_diff_in_months'] = closed_issues_df['time_diff_in_days'].apply(self.get_approx_months)
+        closed_issues_df['time_diff_in_months'] = approx_months(closed_issues_df['time_diff_in_days'])
 
         print(closed_issues_df.head())
         print()
@@ -103,7 +116,7 @@ class TimeBasedIssueAnalysis:
         fig = px.bar(labels_df,
                         title=f"Top 20 Labels")
 
-        fig.show()
+        results.show_plotly(fig, 'top_20_labels')
 
         closed_issues_sorted = closed_issues_df.sort_values(by='time_diff_in_days', ascending=False)
 
@@ -113,9 +126,9 @@ class TimeBasedIssueAnalysis:
         print("******** Duplicates ********")
         print(duplicates)
 
-        closed_issues_sorted_without_duplicates = closed_issues_sorted.drop_duplicates(subset=['creator'], keep='first')
-
-        df = closed_issues_sorted_without_duplicates[:500].sample(frac=1).reset_index(drop=True)
+        # One bar per creator: the longest time to close of the 500 creators with the longest ones
+        df = longest_per_creator(closed_issues_df).nlargest(500, 'time_diff_in_days')
+        df = df[['creator', 'time_diff_in_months', 'labels']].sample(frac=1).reset_index(drop=True)
 
         fig = px.bar(df,
                 x='creator',
@@ -126,11 +139,21 @@ class TimeBasedIssueAnalysis:
                 labels ={'creator': 'Creator',
                          'time_diff_in_months': 'Time Taken in Months'})
 
-        fig.show()
+        results.show_plotly(fig, 'time_to_close')
 
     def get_approx_months(self, time_diff):
-        return int(round(time_diff / 30, 0))
-    
+        return int(approx_months(time_diff))
+
+    def print_time_to_close_quantiles(self, user=None):
+        # Percentiles of the time taken to close issues, from the quantile sketches
+        if user != None:
+            print(f"Time taken by user '{user}' to close issues (in days):")
+            print(self.durations.summary(TIME_TO_CLOSE, by='creator').reindex([user]).to_string())
+        else:
+            print("Time taken to close issues (in days):")
+            print(self.durations.summary(TIME_TO_CLOSE).to_string())
+            print(self.durations.summary(TIME_TO_CLOSE, by='label', top_n=20).to_string())
+
     def analyse_based_on_user(self, user, closed_issues_df):
         # Create a dataframe with only information about the selected users
         user_df = closed_issues_df[closed_issues_df['creator'] == user]
@@ -141,19 +164,33 @@ class TimeBasedIssueAnalysis:
             average_time_taken = average(user_df['time_diff_in_days'])
             print(f"The average time taken by user: '{user}' is {average_time_taken} days.")
 
-            fig = px.bar(user_df,
+            # Issues with the same labels and time to close form one segment of the stacked bar of their labels
+            segments = user_df.groupby(['labels', 'time_diff_in_days']).size().rename('issues').reset_index()
+            segments['time_to_close'] = segments['time_diff_in_days'] * segments['issues']
+            fig = px.bar(segments,
                 x='labels',
-                y='time_diff_in_days',
+                y='time_to_close',
                 color='time_diff_in_days',
+                hover_data=['issues'],
                 title=f"Time Taken by '{user}' to Close Issues (in days)",
-                labels={'time_diff_in_days':'Time Taken to Close Issues',
+                labels={'time_to_close':'Time Taken to Close Issues',
+                        'time_diff_in_days':'Time Taken to Close Issues',
                         'labels': 'Issue Label'})
 
-            fig.show()
+            results.show_plotly(fig, 'user_time_to_close')
 
         else:
             print(f"The average time taken by user '{user}' can not be calculated as the user is not present in the dataset.")
 
+def approx_months(time_diff):
+    # Days to the nearest number of months (of 30 days), for a number or a whole column
+    months = np.round(np.asarray(time_diff) / 30).astype(int)
+    return pd.Series(months, index=time_diff.index) if isinstance(time_diff, pd.Series) else months
+
+def longest_per_creator(closed_issues_df):
+    # The issue of each creator that took the longest to close
+    return closed_issues_df.loc[closed_issues_df.groupby('creator', sort=False)['time_diff_in_days'].idxmax()]
+
 if __name__ == '__main__':
     # Invoke run method when running this module directly
     TimeBasedIssueAnalysis().run()
\ No newline at end of file
@@ -0,0 +1,169 @@
+from typing import Tuple
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from data.columnar import ColumnarIssues, STATE_CODES
+from data.data_loader import DataLoader
+from models.model import State
+import config
+import results
+
+# Kinds of state transitions
+OPENED = 1
+CLOSED = 0
+
+
+class TimelineAnalysis:
+    """
+    Reconstructs when each issue was open from its creation and its
+    'closed' and 'reopened' events, and shows the open backlog: the
+    number of open issues at the end of each day.
+    Outputs the findings to standard out and generates a line chart.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # Parameters are passed in via command line (--user, --label)
+        self.user: str = config.get_parameter('user')
+        self.label: str = config.get_parameter('label')
+
+    def run(self):
+        loader = DataLoader()
+        backlog = loader.get_result('open_backlog', {'user': self.user, 'label': self.label},
+                                    lambda: self.compute_backlog(loader))
+        title = 'Open Issues'
+        if self.label is not None:
+            title += f" with Label '{self.label}'"
+        if self.user is not None:
+            title += f" involving '{self.user}'"
+        if backlog.empty:
+            print(f"{title}: no issues found.")
+            return
+
+        peak_day = backlog.idxmax()
+        print(f"{title} on {backlog.index[-1].date()}: {backlog.iloc[-1]}")
+        print(f"Largest backlog: {backlog.max()} open issues on {peak_day.date()}")
+        print("Open issues at the end of each month:")
+        # Grouped by month rather than resampled, as the month-end alias differs between pandas versions
+        monthly = backlog.groupby(backlog.index.to_period('M')).last()
+        monthly.index = monthly.index.strftime('%Y-%m')
+        print(monthly.to_string())
+
+        plt.figure(figsize=(14, 7))
+        plt.plot(backlog.index, backlog.values, color='tab:blue')
+        plt.fill_between(backlog.index, backlog.values, alpha=0.2, color='tab:blue')
+        plt.xlabel('Date')
+        plt.ylabel('Number of Open Issues')
+        plt.title(f"{title} over Time")
+        plt.grid(True, linestyle='--', alpha=0.5)
+        plt.tight_layout()
+        results.show('open_backlog', data=backlog)
+
+    def compute_backlog(self, loader: DataLoader) -> pd.Series:
+        dataset = loader.get_dataset(user=self.user, label=self.label)
+        _, starts, ends = state_intervals(dataset)
+        return open_backlog(starts, ends)
+
+
+def events_of_type(dataset: ColumnarIssues, name: str) -> np.ndarray:
+    """
+    Mask of the events of the given type. Unknown types are -1, like
+    events without a type, so a type that does not occur matches no event.
+    """
+    type_id = dataset.event_types.lookup(name)
+    if type_id < 0:
+        return np.zeros(len(dataset['event_type']), dtype=bool)
+    return dataset['event_type'] == type_id
+
+
+def state_transitions(dataset: ColumnarIssues) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The changes of state of the issues in order: the row of the issue,
+    the date and the kind (OPENED for the creation and 'reopened' events,
+    CLOSED for 'closed' events), sorted by row and date. At the same
+    date, the creation comes first and events keep their order.
+    Repeated transitions to the same state, and closing issues that were
+    never opened, are dropped, so each issue alternates between OPENED
+    and CLOSED, starting with OPENED.
+    """
+    num_rows = len(dataset)
+    event_offsets = dataset['event_offsets']
+    event_dates = dataset['event_date']
+    event_rows = np.repeat(np.arange(num_rows), np.diff(event_offsets))
+    closed = events_of_type(dataset, 'closed')
+    reopened = events_of_type(dataset, 'reopened')
+    is_transition = (closed | reopened) & ~np.isnat(event_dates)
+
+    created = dataset['created_date']
+    has_created = ~np.isnat(created)
+    rows = np.concatenate([np.flatnonzero(has_created), event_rows[is_transition]])
+    dates = np.concatenate([created[has_created], event_dates[is_transition]])
+    kinds = np.concatenate([np.full(int(has_created.sum()), OPENED, dtype=np.int8),
+                            np.where(reopened[is_transition], OPENED, CLOSED).astype(np.int8)])
+    # Creations before events, events in their order
+    sequence = np.concatenate([np.full(int(has_created.sum()), -1), np.flatnonzero(is_transition)])
+    order = np.lexsort((sequence, dates, rows))
+    rows, dates, kinds = rows[order], dates[order], kinds[order]
+
+    # Keep the transitions that change the state (an issue starts in neither state)
+    first = np.r_[True, rows[1:] != rows[:-1]] if len(rows) else np.zeros(0, dtype=bool)
+    previous = np.r_[-1, kinds[:-1]] if len(kinds) else kinds
+    keep = np.where(first, kinds == OPENED, kinds != previous)
+    return rows[keep], dates[keep], kinds[keep]
+
+
+def state_intervals(dataset: ColumnarIssues) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The intervals during which the issues were open: the row of the issue,
+    the start and the end of each interval (NaT while still open). Issues
+    that are closed without a 'closed' event after their last opening are
+    taken to be closed at their last update.
+    """
+    rows, dates, kinds = state_transitions(dataset)
+    # After an opening, the next transition of the same issue (if any) is its closing
+    opened = np.flatnonzero(kinds == OPENED)
+    has_close = opened + 1 < len(rows)
+    has_close[has_close] = rows[opened[has_close] + 1] == rows[opened[has_close]]
+    starts = dates[opened]
+    ends = np.full(len(opened), np.datetime64('NaT'), dtype=dates.dtype)
+    ends[has_close] = dates[opened[has_close] + 1]
+
+    interval_rows = rows[opened]
+    closed_state = dataset['state'][interval_rows] == STATE_CODES[State.closed]
+    missing_close = ~has_close & closed_state
+    ends[missing_close] = dataset['updated_date'][interval_rows[missing_close]].astype(dates.dtype)
+    return interval_rows, starts, ends
+
+
+def open_backlog(starts: np.ndarray, ends: np.ndarray, until: np.datetime64 = None) -> pd.Series:
+    """
+    Number of open issues at the end of each day, from the first opening
+    to the last transition (or until, if given): a sweep over +1 for each
+    opening and -1 for each closing, summed up day by day.
+    """
+    if len(starts) == 0:
+        return pd.Series(dtype=np.int64)
+    start_days = starts.astype('datetime64[D]')
+    end_days = ends.astype('datetime64[D]')
+    closed = ~np.isnat(end_days)
+    first_day = start_days.min()
+    last_day = max(start_days.max(), end_days[closed].max()) if closed.any() else start_days.max()
+    if until is not None:
+        last_day = np.datetime64(until, 'D')
+    num_days = int((last_day - first_day).astype(np.int64)) + 1
+    # Closings after the last day do not affect the curve
+    end_offsets = (end_days[closed] - first_day).astype(np.int64)
+    end_offsets = end_offsets[end_offsets < num_days]
+    start_offsets = (start_days - first_day).astype(np.int64)
+    start_offsets = start_offsets[start_offsets < num_days]
+    deltas = np.bincount(start_offsets, minlength=num_days) - np.bincount(end_offsets, minlength=num_days)
+    days = pd.date_range(pd.Timestamp(first_day), periods=num_days, freq='D')
+    return pd.Series(np.cumsum(deltas), index=days, name='open')
+
+
+if __name__ == '__main__':
+    # Invoke run method when running this module directly
+    TimelineAnalysis().run()
@@ -1,10 +1,15 @@
 from typing import List, Dict
+from functools import partial
 import matplotlib.pyplot as plt
 import pandas as pd
+import numpy as np
 
+from analysis.mapreduce import map_reduce, map_reduce_columns, combine_counts
+from data.columnar import ColumnarIssues
 from data.data_loader import DataLoader
 from models.model import Issue
 import config
+import results
 
 class UserSpecificIssueAnalysis:
     """
@@ -18,35 +23,16 @@ class UserSpecificIssueAnalysis:
             print("No user specified. Please provide a user with the --user flag.")
             return
         
-        issues: List[Issue] = DataLoader().get_issues()
-        
-        # Initialize counters
-        created_count = 0
-        commented_count = 0
-        labeled_count = 0
-        closed_count = 0
+        loader = DataLoader()
+        interactions = loader.get_result('user_interactions', {'user': user},
+                                         lambda: self.count_interactions(loader, user))
+        created_count = interactions['created']
+        commented_count = interactions['commented']
+        labeled_count = interactions['labeled']
+        closed_count = interactions['closed']
         
         # Dictionary to hold label-wise interaction counts
-        label_interactions: Dict[str, int] = {}
-        
-        for issue in issues:
-            # Check if user created the issue
-            if issue.creator == user:
-                created_count += 1
-            
-            # Iterate through events
-            for event in issue.events:
-                if event.author == user:
-                    if event.event_type == 'commented':
-                        commented_count += 1
-                    elif event.event_type == 'labeled':
-                        labeled_count += 1
-                    elif event.event_type == 'closed':
-                        closed_count += 1
-                
-                # Count label interactions
-                if event.author == user and event.label:
-                    label_interactions[event.label] = label_interactions.get(event.label, 0) + 1
+        label_interactions: Dict[str, int] = interactions['labels']
         
         # Output to standard out
         print(f"Insights for User: {user}")
@@ -67,7 +53,93 @@ class UserSpecificIssueAnalysis:
             plt.title(f"Label Interactions by User '{user}'")
             plt.yticks(fontsize=9)
             plt.tight_layout()
-            plt.show()
+            results.show('user_label_interactions', data=(user, df_labels))
+
+    def count_interactions(self, loader: DataLoader, user: str) -> Dict:
+        """
+        Counts the interactions of the user with the issues.
+        """
+        if loader.has_columns():
+            # Count over the columns of the issue cache, without creating issue objects
+            return map_reduce_columns(loader.get_columns(), partial(map_user_interactions_columns, user=user),
+                                      combine_user_interactions)
+        # Only issues the user interacted with can contribute to the counts,
+        # so the filter is pushed down to the loader (and SQL, if enabled)
+        issues: List[Issue] = loader.get_issues(user=user)
+        return map_reduce(issues, partial(map_user_interactions, user=user), combine_user_interactions)
+
+
+def map_user_interactions(issues: List[Issue], user: str) -> Dict:
+    """
+    Map step: counts the interactions of the user with the issues.
+    """
+    # Initialize counters
+    interactions = {'created': 0, 'commented': 0, 'labeled': 0, 'closed': 0, 'labels': {}}
+    
+    for issue in issues:
+        # Check if user created the issue
+        if issue.creator == user:
+            interactions['created'] += 1
+        
+        # Iterate through events
+        for event in issue.events:
+            if event.author == user:
+                if event.event_type == 'commented':
+                    interactions['commented'] += 1
+                elif event.event_type == 'labeled':
+                    interactions['labeled'] += 1
+                elif event.event_type == 'closed':
+                    interactions['closed'] += 1
+            
+            # Count label interactions
+            if event.author == user and event.label:
+                interactions['labels'][event.label] = interactions['labels'].get(event.label, 0) + 1
+    
+    return interactions
+
+
+def map_user_interactions_columns(dataset: ColumnarIssues, start: int, end: int, user: str) -> Dict:
+    """
+    Map step over the rows [start, end) of the columnar dataset, with the
+    same result as map_user_interactions.
+    """
+    interactions = {'created': 0, 'commented': 0, 'labeled': 0, 'closed': 0, 'labels': {}}
+    user_id = dataset.users.lookup(user)
+    if user_id < 0:
+        return interactions
+    
+    interactions['created'] = int(np.count_nonzero(dataset['creator'][start:end] == user_id))
+    
+    # Events of the user within the rows
+    event_offsets = dataset['event_offsets']
+    events = slice(event_offsets[start], event_offsets[end])
+    by_user = dataset['event_author'][events] == user_id
+    event_types = dataset['event_type'][events][by_user]
+    for name in ('commented', 'labeled', 'closed'):
+        # Unknown event types are -1, like events without a type
+        type_id = dataset.event_types.lookup(name)
+        if type_id >= 0:
+            interactions[name] = int(np.count_nonzero(event_types == type_id))
+    
+    # Count label interactions (empty labels do not count)
+    event_labels = dataset['event_label'][events][by_user]
+    empty_label = dataset.labels.lookup('')
+    event_labels = event_labels[(event_labels >= 0) & (event_labels != empty_label)]
+    label_counts = np.bincount(event_labels)
+    for label_id in np.flatnonzero(label_counts):
+        interactions['labels'][dataset.labels.values[label_id]] = int(label_counts[label_id])
+    
+    return interactions
+
+
+def combine_user_interactions(first: Dict, second: Dict) -> Dict:
+    """
+    Combine step: merges the interaction counts of two shards.
+    """
+    merged = combine_counts({k: v for k, v in first.items() if k != 'labels'},
+                            {k: v for k, v in second.items() if k != 'labels'})
+    merged['labels'] = combine_counts(first['labels'], second['labels'])
+    return merged
             
             
 if __name__ == '__main__':
@@ -0,0 +1,50 @@
+"""
+Compares loading a synthetic export from JSON with reading it from
+Parquet and Arrow tables: the size on disk, the time to read all columns
+of the columnar dataset and the time to read only the label columns.
+Requires pyarrow.
+
+Usage: python -m benchmarks.bench_arrow_tables [num_issues]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_export
+from data.arrow_tables import read_tables, table_files, write_tables
+from data.columnar import ColumnarIssues
+from data.export_file import load_export
+from models.model import Issue
+
+LABEL_COLUMNS = ['label_offsets', 'label_ids']
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main(num_issues:int=20000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'issues.json')
+        write_export(path, num_issues)
+        dataset, json_seconds = timed(lambda: ColumnarIssues.from_issues(
+            [Issue(jissue) for jissue in load_export(path)]))
+        print(f'{num_issues} issues')
+        print(f"{'source':<8} {'size (MB)':>10} {'all columns (s)':>16} {'labels only (s)':>16}")
+        print(f"{'json':<8} {os.path.getsize(path) / 2**20:>10.1f} {json_seconds:>16.3f} {json_seconds:>16.3f}")
+        for table_format in ['parquet', 'arrow']:
+            table_dir = os.path.join(tmpdir, table_format)
+            write_tables(dataset, table_dir, table_format)
+            size = sum(os.path.getsize(file) for file in table_files(table_dir).values())
+            _, all_seconds = timed(lambda: read_tables(table_dir, columns=list(dataset.columns)))
+            _, label_seconds = timed(lambda: read_tables(table_dir, columns=LABEL_COLUMNS))
+            print(f'{table_format:<8} {size / 2**20:>10.1f} {all_seconds:>16.3f} {label_seconds:>16.3f}')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 20000)
@@ -0,0 +1,50 @@
+"""
+Compares loading the export uncompressed and compressed with gzip, bzip2
+and xz (decompressed while it is read): file size, load time and peak
+memory allocated by Python during the load (tracemalloc).
+
+Usage: python -m benchmarks.bench_compressed_input [num_issues]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_export
+from data.export_file import COMPRESSIONS, load_export
+
+
+def measure(path:str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    jissues = load_export(path)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(jissues), seconds, peak
+
+
+def main(num_issues:int=20000):
+    export = json.dumps(generate_export(num_issues))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = {'none': os.path.join(tmpdir, 'issues.json')}
+        with open(paths['none'], 'w', encoding='utf-8') as fout:
+            fout.write(export)
+        for extension, opener in COMPRESSIONS.items():
+            paths[extension] = paths['none'] + extension
+            with opener(paths[extension], 'wt', encoding='utf-8') as fout:
+                fout.write(export)
+
+        print(f"{'compression':<12} {'size (MB)':>10} {'load (s)':>10} {'peak (MB)':>10}")
+        for name, path in paths.items():
+            count, seconds, peak = measure(path)
+            print(f'{name:<12} {os.path.getsize(path) / 2**20:>10.1f} {seconds:>10.3f} {peak / 2**20:>10.1f}')
+        print(f'{count} issues')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 20000)
@@ -0,0 +1,58 @@
+"""
+Compares computing the time to first response of every issue, with its
+breakdowns by label and month, over the columns of a synthetic export
+with a loop over the events of each issue object.
+
+Usage: python -m benchmarks.bench_first_response [num_issues]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from analysis.first_response_analysis import by_label, by_month, first_response_hours
+from benchmarks.synthetic import generate_export
+from data.columnar import ColumnarIssues
+from models.model import Issue
+
+
+def loop_hours(issues):
+    """
+    Hours to the first response of each issue, from the issue objects (the baseline).
+    """
+    hours = []
+    for issue in issues:
+        first = None
+        for event in issue.events:
+            if event.event_type == 'commented' and event.author is not None and event.author != issue.creator \
+                    and event.event_date is not None and event.event_date >= issue.created_date:
+                if first is None or event.event_date < first:
+                    first = event.event_date
+        hours.append((first - issue.created_date).total_seconds() / 3600 if first is not None else np.nan)
+    return np.array(hours)
+
+
+def main(num_issues:int=200000):
+    issues = [Issue(jissue) for jissue in generate_export(num_issues)]
+    dataset = ColumnarIssues.from_issues(issues)
+    print(f'{num_issues} issues, {len(dataset["event_type"])} events')
+
+    start = time.perf_counter()
+    hours = first_response_hours(dataset)
+    hours_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    labels, months = by_label(dataset, hours), by_month(dataset, hours)
+    breakdown_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = loop_hours(issues)
+    loop_seconds = time.perf_counter() - start
+
+    print(f'first responses:     {hours_seconds:.3f} s ({np.count_nonzero(~np.isnan(hours))} responded)')
+    print(f'label/month groups:  {breakdown_seconds:.3f} s ({len(labels)} labels, {len(months)} months)')
+    print(f'loop over events:    {loop_seconds:.3f} s (same hours: {np.allclose(hours, expected, equal_nan=True)})')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 200000)
@@ -0,0 +1,55 @@
+"""
+Compares a full load of the export with an incremental ingestion
+into the issue cache after a small fraction of the issues changed.
+
+Usage: python -m benchmarks.bench_incremental_ingest [num_issues] [changed_fraction]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_export, generate_issue
+from data.issue_cache import IssueCache
+from models.model import Issue
+
+
+def main(num_issues:int=20000, changed_fraction:float=0.01):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        export_path = os.path.join(tmpdir, 'issues.json')
+        export = generate_export(num_issues)
+        with open(export_path, 'w') as fout:
+            json.dump(export, fout)
+        cache = IssueCache(os.path.join(tmpdir, 'cache'))
+        cache.ingest(export_path)
+
+        # Change some issues and add a few new ones
+        rng = random.Random(1)
+        for index in rng.sample(range(num_issues), int(num_issues * changed_fraction)):
+            export[index] = generate_issue(rng, export[index]['number'])
+            export[index]['updated_date'] = '2030-01-01T00:00:00+00:00'
+        export += [generate_issue(rng, num_issues + i + 1) for i in range(int(num_issues * changed_fraction))]
+        with open(export_path, 'w') as fout:
+            json.dump(export, fout)
+
+        start = time.perf_counter()
+        with open(export_path, 'r') as fin:
+            full = [Issue(i) for i in json.load(fin)]
+        full_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, report = cache.ingest(export_path)
+        incremental_seconds = time.perf_counter() - start
+
+        print(f'{len(full)} issues, {report}')
+        print(f'Full load:             {full_seconds:8.3f}s')
+        print(f'Incremental ingestion: {incremental_seconds:8.3f}s')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 20000,
+         float(args[1]) if len(args) > 1 else 0.01)
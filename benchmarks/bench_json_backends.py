@@ -0,0 +1,36 @@
+"""
+Compares the installed JSON backends on the same export: the time to
+parse the export and the time to also construct the Issue objects.
+
+Usage: python -m benchmarks.bench_json_backends [num_issues]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_export
+from data.export_file import load_export
+from data.json_backend import available_backends
+from models.model import Issue
+
+
+def main(num_issues:int=20000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'issues.json')
+        write_export(path, num_issues)
+        print(f'{num_issues} issues, {os.path.getsize(path) / 2**20:.1f} MB')
+        print(f"{'backend':<10} {'parse (s)':>10} {'issues (s)':>11}")
+        for backend in available_backends():
+            start = time.perf_counter()
+            jissues = load_export(path, backend)
+            parsed = time.perf_counter() - start
+            [Issue(jissue) for jissue in jissues]
+            total = time.perf_counter() - start
+            print(f'{backend:<10} {parsed:>10.3f} {total:>11.3f}')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 20000)
@@ -0,0 +1,50 @@
+"""
+Compares counting the label pairs of a synthetic export with the product
+of its incidence matrix over the columns, with a double loop over the
+labels of each issue object.
+
+Usage: python -m benchmarks.bench_label_cooccurrence [num_issues]
+"""
+
+import itertools
+import sys
+import time
+
+from analysis.label_cooccurrence_analysis import label_cooccurrence
+from benchmarks.synthetic import generate_export
+from data.columnar import ColumnarIssues
+from models.model import Issue
+
+
+def loop_pairs(issues):
+    """
+    Number of issues carrying each pair of labels, from the issue objects (the baseline).
+    """
+    pairs = {}
+    for issue in issues:
+        for pair in itertools.combinations(sorted(set(issue.labels)), 2):
+            pairs[pair] = pairs.get(pair, 0) + 1
+    return pairs
+
+
+def main(num_issues:int=200000):
+    issues = [Issue(jissue) for jissue in generate_export(num_issues)]
+    dataset = ColumnarIssues.from_issues(issues)
+    print(f'{num_issues} issues, {len(dataset["label_ids"])} labels')
+
+    start = time.perf_counter()
+    label_counts, pairs = label_cooccurrence(dataset)
+    matrix_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = loop_pairs(issues)
+    loop_seconds = time.perf_counter() - start
+
+    actual = {tuple(sorted(pair)): count
+              for *pair, count in zip(pairs['label_a'], pairs['label_b'], pairs['issues'])}
+    print(f'incidence product: {matrix_seconds:.3f} s ({len(label_counts)} labels, {len(pairs)} pairs)')
+    print(f'loop over labels:  {loop_seconds:.3f} s (same counts: {actual == expected})')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 200000)
@@ -0,0 +1,67 @@
+"""
+Compares answering a label query ('kind/bug AND area/installer AND NOT
+status/duplicate') over a synthetic export with the bitmaps of the label
+index, with a scan of the label columns per label and with a loop over
+the issue objects.
+
+Usage: python -m benchmarks.bench_label_index [num_issues] [repeats]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_export
+from data.columnar import ColumnarIssues
+from data.issue_filter import parse_filter
+from data.label_index import LabelIndex
+from models.model import Issue
+
+QUERY = 'kind/bug AND area/installer AND NOT status/duplicate'
+
+
+def scan_mask(dataset:ColumnarIssues) -> np.ndarray:
+    """
+    The rows matching the query, scanning the label columns once per label (the baseline).
+    """
+    label_offsets = dataset['label_offsets']
+    rows = np.repeat(np.arange(len(dataset)), np.diff(label_offsets))
+
+    def carrying(label):
+        result = np.zeros(len(dataset), dtype=bool)
+        result[rows[dataset['label_ids'] == dataset.labels.lookup(label)]] = True
+        return result
+    return carrying('kind/bug') & carrying('area/installer') & ~carrying('status/duplicate')
+
+
+def timed(function, repeats:int):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return result, (time.perf_counter() - start) / repeats
+
+
+def main(num_issues:int=200000, repeats:int=20):
+    issues = [Issue(jissue) for jissue in generate_export(num_issues)]
+    dataset = ColumnarIssues.from_issues(issues)
+    issue_filter = parse_filter(f'labels:"{QUERY}"')
+    print(f'{num_issues} issues, {len(dataset["label_ids"])} labels, query: {QUERY}')
+
+    index, build_seconds = timed(lambda: LabelIndex.build(dataset), 1)
+    dataset.label_index = index
+    bitmap, bitmap_seconds = timed(lambda: issue_filter.terms[0].bitmap(index), repeats)
+    mask, mask_seconds = timed(lambda: issue_filter.mask(dataset), repeats)
+    expected, scan_seconds = timed(lambda: scan_mask(dataset), repeats)
+    matches, loop_seconds = timed(lambda: [issue_filter.matches(issue) for issue in issues], 1)
+
+    print(f'build index:         {build_seconds * 1000:.1f} ms ({index.bitmaps.nbytes / 2**10:.0f} KB)')
+    print(f'bitmap query:        {bitmap_seconds * 1000:.3f} ms ({LabelIndex.count(bitmap)} issues)')
+    print(f'bitmap query + mask: {mask_seconds * 1000:.3f} ms')
+    print(f'column scan:         {scan_seconds * 1000:.3f} ms (same rows: {np.array_equal(mask, expected)})')
+    print(f'loop over issues:    {loop_seconds * 1000:.1f} ms (same rows: {np.array_equal(mask, matches)})')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 200000, int(args[1]) if len(args) > 1 else 20)
@@ -0,0 +1,48 @@
+"""
+Compares reading the exports of several repositories one after the other
+and concurrently in a process pool (ENPM611_PROJECT_WORKERS), parsing the
+issues in the reading process. The concurrent load is bounded below by
+the time of the largest export.
+
+Usage: python -m benchmarks.bench_multi_export [num_repositories] [issues_per_repository]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_export
+from data.export_file import get_load_workers, load_exports
+from models.model import Issue
+
+
+def measure(path:str, workers:int) -> float:
+    start = time.perf_counter()
+    load_exports(path, parse=Issue, workers=workers)
+    return time.perf_counter() - start
+
+
+def main(num_repositories:int=8, issues_per_repository:int=5000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i in range(num_repositories):
+            jissues = generate_export(issues_per_repository, seed=i)
+            for jissue in jissues:
+                jissue['url'] = jissue['url'].replace('python-poetry/poetry', f'org/repo{i}')
+            with open(os.path.join(tmpdir, f'repo{i}.json'), 'w', encoding='utf-8') as fout:
+                json.dump(jissues, fout)
+
+        workers = get_load_workers()
+        largest = measure(os.path.join(tmpdir, 'repo0.json'), 1)
+        serial = measure(tmpdir, 1)
+        concurrent = measure(tmpdir, workers)
+        print(f'{num_repositories} repositories x {issues_per_repository} issues, {workers} workers')
+        print(f"{'largest export':<16} {largest:>8.3f} s")
+        print(f"{'serial':<16} {serial:>8.3f} s")
+        print(f"{'concurrent':<16} {concurrent:>8.3f} s  ({serial / concurrent:.1f}x)")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 8, int(args[1]) if len(args) > 1 else 5000)
@@ -0,0 +1,64 @@
+"""
+Measures near-duplicate detection on synthetic issues with injected
+near-duplicates: the time of each step, the number of candidate pairs
+found by locality-sensitive hashing and the share of the injected
+duplicates found, compared with comparing the signatures of all pairs
+(only up to 10000 issues).
+
+Usage: python -m benchmarks.bench_near_duplicates [num_issues] [num_duplicates]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from analysis.duplicate_analysis import (candidate_pairs, cluster_pairs, drop_frequent_shingles,
+                                         minhash_signatures, shingle_hashes, similarities)
+from benchmarks.synthetic import generate_export
+
+THRESHOLD = 0.5
+
+
+def main(num_issues:int=50000, num_duplicates:int=500):
+    rng = random.Random(611)
+    texts = [f"{jissue['title']} {jissue['text']}" for jissue in generate_export(num_issues)]
+    expected = set()
+    for source in rng.sample(range(num_issues), num_duplicates):
+        words = texts[source].split()
+        for _ in range(2):
+            words[rng.randrange(len(words))] = rng.choice(words)
+        expected.add((source, len(texts)))
+        texts.append(' '.join(words))
+
+    start = time.perf_counter()
+    hashes, offsets = drop_frequent_shingles(*shingle_hashes(texts))
+    shingled = time.perf_counter()
+    signatures = minhash_signatures(hashes, offsets)
+    signed = time.perf_counter()
+    pairs = candidate_pairs(signatures)
+    scores = similarities(signatures, pairs)
+    clusters = cluster_pairs(len(texts), pairs[scores >= THRESHOLD], scores[scores >= THRESHOLD])
+    done = time.perf_counter()
+    found = {(i, j) for i, j in pairs[scores >= THRESHOLD].tolist()}
+    print(f'{len(texts)} issues, {len(hashes)} shingles, {num_duplicates} injected duplicates')
+    print(f'shingles:    {shingled - start:>8.2f} s')
+    print(f'signatures:  {signed - shingled:>8.2f} s')
+    print(f'lsh+cluster: {done - signed:>8.2f} s  ({len(pairs)} candidates, {len(clusters)} clusters, '
+          f'{len(found & expected) / len(expected):.1%} of the duplicates found)')
+
+    if len(texts) <= 10000:
+        start = time.perf_counter()
+        all_found = set()
+        for i in range(len(texts) - 1):
+            scores = (signatures[i + 1:] == signatures[i]).mean(axis=1)
+            all_found.update((i, i + 1 + j) for j in np.flatnonzero(scores >= THRESHOLD).tolist())
+        print(f'all pairs:   {time.perf_counter() - start:>8.2f} s  '
+              f'({len(texts) * (len(texts) - 1) // 2} pairs, {len(all_found & expected) / len(expected):.1%} '
+              f'of the duplicates found)')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 50000, int(args[1]) if len(args) > 1 else 500)
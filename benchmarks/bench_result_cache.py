@@ -0,0 +1,58 @@
+"""
+Compares computing the results of some analyses (loading the export
+first) with returning them from the result cache on a repeated run.
+
+Usage: python -m benchmarks.bench_result_cache [num_issues]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import config
+import data.data_loader as data_loader
+from analysis.duplicate_analysis import DuplicateAnalysis
+from analysis.label_trend_analysis import LabelTrendAnalysis
+from analysis.user_specific_issue_analysis import UserSpecificIssueAnalysis
+from benchmarks.synthetic import generate_export
+from data.data_loader import DataLoader
+
+ANALYSES = [
+    ('user_interactions', {'user': 'user1'}, lambda loader: UserSpecificIssueAnalysis().count_interactions(loader, 'user1')),
+    ('label_trend', {'approximate': False}, lambda loader: LabelTrendAnalysis().count_label_trend(loader)),
+    ('near_duplicates', {'threshold': 0.5}, lambda loader: DuplicateAnalysis().find_clusters(loader, 0.5)),
+]
+
+
+def measure(name:str, params:dict, compute) -> float:
+    """
+    Time to get a result in a fresh run (no issues held in memory), in seconds.
+    """
+    data_loader._ISSUES = None
+    start = time.perf_counter()
+    loader = DataLoader()
+    loader.get_result(name, params, lambda: compute(loader))
+    return time.perf_counter() - start
+
+
+def main(num_issues:int=20000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        export_path = os.path.join(tmpdir, 'issues.json')
+        with open(export_path, 'w') as fout:
+            json.dump(generate_export(num_issues), fout)
+        config.set_parameter('ENPM611_PROJECT_DATA_PATH', export_path)
+        config.set_parameter('ENPM611_PROJECT_RESULT_CACHE_PATH', os.path.join(tmpdir, 'results'))
+
+        timings = [(name, measure(name, params, compute), measure(name, params, compute))
+                   for name, params, compute in ANALYSES]
+        print(f'{num_issues} issues')
+        print(f"{'analysis':<18} {'computed (s)':>13} {'cached (s)':>11}")
+        for name, computed, cached in timings:
+            print(f'{name:<18} {computed:>13.3f} {cached:>11.4f}')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 20000)
@@ -0,0 +1,52 @@
+"""
+Measures building the full-text search index and answering queries
+(single words, several words, phrases, and restricted to a label) over
+a synthetic export, returning all matches or only the best 20.
+
+Usage: python -m benchmarks.bench_search [num_issues]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_export
+from data.columnar import ColumnarIssues
+from data.issue_filter import parse_filter
+from data.search_index import SearchIndex
+from models.model import Issue
+
+QUERIES = ['resolver', 'lock dependency wheel', '"dependency resolver"', '"poetry install fails"']
+
+
+def measure(index:SearchIndex, query:str, mask:np.ndarray, limit:int=None, repeat:int=5) -> float:
+    """
+    Median time of a query, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        index.search(query, mask=mask, limit=limit)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main(num_issues:int=200000):
+    dataset = ColumnarIssues.from_issues([Issue(jissue) for jissue in generate_export(num_issues)])
+    start = time.perf_counter()
+    index = SearchIndex.build(dataset)
+    print(f'{num_issues} issues, {len(index.terms)} terms, {len(index.arrays["positions"])} positions')
+    print(f'build: {time.perf_counter() - start:.2f} s')
+
+    mask = parse_filter('label:kind/bug').mask(dataset)
+    print(f"{'query':<26} {'label':<9} {'matches':>8} {'all (ms)':>9} {'top 20 (ms)':>12}")
+    for query in QUERIES:
+        for label, query_mask in [('', None), ('kind/bug', mask)]:
+            matches = len(index.search(query, mask=query_mask))
+            print(f'{query:<26} {label:<9} {matches:>8} {measure(index, query, query_mask) * 1000:>9.1f} '
+                  f'{measure(index, query, query_mask, 20) * 1000:>12.1f}')
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 200000)
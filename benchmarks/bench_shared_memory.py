@@ -0,0 +1,64 @@
+"""
+Measures the cost of starting worker processes on the issue dataset,
+once by sending the dataset to every worker (pickling) and once by
+attaching the workers to the columns in shared memory. With shared
+memory, the cost does not depend on the size of the dataset.
+
+Usage: python -m benchmarks.bench_shared_memory [workers]
+"""
+
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from benchmarks.synthetic import generate_export
+from data.columnar import ColumnarIssues
+from data.shared_columns import SharedColumns, attach, get_attached
+from models.model import Issue
+
+
+def _count_pickled(dataset:ColumnarIssues) -> int:
+    return len(dataset)
+
+
+def _count_shared(token:str) -> int:
+    return len(get_attached(token))
+
+
+def _start_pickled(dataset:ColumnarIssues, workers:int) -> float:
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(_count_pickled, [dataset] * workers))
+    return time.perf_counter() - start
+
+
+def _start_shared(dataset:ColumnarIssues, workers:int):
+    """
+    Returns the time to copy the dataset into shared memory (once per
+    dataset) and the time to start the workers attached to it.
+    """
+    start = time.perf_counter()
+    with SharedColumns(dataset) as shared:
+        copied = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach, initargs=(shared.handle,)) as executor:
+            list(executor.map(_count_shared, [shared.handle.token] * workers))
+        started = time.perf_counter()
+    return copied - start, started - copied
+
+
+def main(workers:int=4):
+    base = ColumnarIssues.from_issues([Issue(jissue) for jissue in generate_export(5000)])
+    print(f'Starting {workers} workers')
+    print(f'{"issues":>10} {"pickled":>10} {"shm copy":>10} {"shared":>10}')
+    for factor in (1, 4, 16, 64):
+        # Scale the dataset up by repeating its rows
+        dataset = base.take(np.tile(np.arange(len(base)), factor))
+        pickled = _start_pickled(dataset, workers)
+        copied, shared = _start_shared(dataset, workers)
+        print(f'{len(dataset):>10} {pickled:>9.3f}s {copied:>9.3f}s {shared:>9.3f}s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
@@ -0,0 +1,68 @@
+"""
+Measures reconstructing the open intervals of every issue and the open
+backlog curve over the columns of a synthetic export, compared with
+counting the open issues of each day by iterating over the issue objects.
+
+Usage: python -m benchmarks.bench_timeline [num_issues]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from analysis.timeline_analysis import open_backlog, state_intervals
+from benchmarks.synthetic import generate_export
+from data.columnar import ColumnarIssues
+from models.model import Issue
+
+
+def loop_backlog(issues, days):
+    """
+    Open issues at the end of each day, from the events of each issue (the baseline).
+    """
+    ends = [np.datetime64(day, 'D') + 1 for day in days]
+    counts = []
+    for end in ends:
+        count = 0
+        for issue in issues:
+            if issue.created_date is None or np.datetime64(issue.created_date.replace(tzinfo=None), 'us') >= end:
+                continue
+            is_open = True
+            for event in issue.events:
+                if event.event_date is not None and np.datetime64(event.event_date.replace(tzinfo=None), 'us') < end:
+                    if event.event_type == 'closed':
+                        is_open = False
+                    elif event.event_type == 'reopened':
+                        is_open = True
+            count += is_open
+        counts.append(count)
+    return counts
+
+
+def main(num_issues:int=200000):
+    issues = [Issue(jissue) for jissue in generate_export(num_issues)]
+    dataset = ColumnarIssues.from_issues(issues)
+    print(f'{num_issues} issues, {len(dataset["event_type"])} events')
+
+    start = time.perf_counter()
+    rows, starts, ends = state_intervals(dataset)
+    intervals_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    backlog = open_backlog(starts, ends)
+    backlog_seconds = time.perf_counter() - start
+    print(f'intervals: {len(rows)} in {intervals_seconds:.3f} s')
+    print(f'backlog:   {len(backlog)} days in {backlog_seconds:.3f} s')
+
+    # The baseline only computes a few days, extrapolated to all days
+    sample_days = backlog.index[::len(backlog) // 5][:5]
+    start = time.perf_counter()
+    expected = loop_backlog(issues, sample_days)
+    loop_seconds = (time.perf_counter() - start) / len(sample_days) * len(backlog)
+    print(f'loop over issues (estimated): {loop_seconds:.0f} s')
+    print(f'matches the loop on {len(sample_days)} sampled days: {expected == backlog[sample_days].tolist()}')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if len(args) > 0 else 200000)
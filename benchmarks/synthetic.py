@@ -0,0 +1,77 @@
+"""
+Generates synthetic issue exports with the same structure as the
+poetry export, so that the loaders and analyses can be benchmarked
+at sizes larger than the real data.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict
+
+LABELS = ['kind/bug', 'kind/feature', 'kind/question', 'kind/enhancement', 'kind/documentation',
+          'status/triage', 'status/confirmed', 'status/duplicate', 'status/wontfix', 'status/waiting-on-response',
+          'area/installer', 'area/cli', 'area/solver', 'area/venv', 'area/publishing', 'area/docs']
+EVENT_TYPES = ['commented', 'labeled', 'unlabeled', 'assigned', 'closed', 'reopened', 'mentioned', 'subscribed']
+WORDS = ['poetry', 'install', 'lock', 'dependency', 'resolver', 'version', 'python', 'error', 'fails',
+         'virtualenv', 'publish', 'package', 'plugin', 'cache', 'update', 'solver', 'marker', 'wheel']
+
+
+def _date(moment:datetime) -> str:
+    return moment.strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+
+def _sentence(rng:random.Random, length:int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+
+def generate_issue(rng:random.Random, number:int, num_users:int=500) -> Dict:
+    """
+    Generates one issue (as it appears in the JSON export).
+    """
+    start = datetime(2018, 1, 1, tzinfo=timezone.utc)
+    created = start + timedelta(minutes=rng.randrange(60 * 24 * 365 * 6))
+    creator = f'user{rng.randrange(num_users)}'
+    labels = rng.sample(LABELS, rng.randrange(0, 4))
+    events = []
+    moment = created
+    closed = False
+    for _ in range(rng.randrange(0, 12)):
+        moment += timedelta(minutes=rng.randrange(1, 60 * 24 * 30))
+        event_type = rng.choice(EVENT_TYPES)
+        event = {'event_type': event_type, 'author': f'user{rng.randrange(num_users)}', 'event_date': _date(moment)}
+        if event_type in ('labeled', 'unlabeled'):
+            event['label'] = rng.choice(LABELS)
+        if event_type == 'commented':
+            event['comment'] = _sentence(rng, rng.randrange(5, 40))
+        closed = (event_type == 'closed') or (closed and event_type != 'reopened')
+        events.append(event)
+    return {
+        'url': f'https://github.com/python-poetry/poetry/issues/{number}',
+        'creator': creator,
+        'labels': labels,
+        'state': 'closed' if closed else 'open',
+        'assignees': [f'user{rng.randrange(num_users)}'] if rng.random() < 0.2 else [],
+        'title': _sentence(rng, rng.randrange(3, 10)),
+        'text': _sentence(rng, rng.randrange(10, 80)),
+        'number': number,
+        'created_date': _date(created),
+        'updated_date': _date(moment),
+        'timeline_url': f'https://api.github.com/repos/python-poetry/poetry/issues/{number}/timeline',
+        'events': events,
+    }
+
+
+def generate_export(num_issues:int, seed:int=611) -> List[Dict]:
+    rng = random.Random(seed)
+    return [generate_issue(rng, number) for number in range(1, num_issues + 1)]
+
+
+def write_export(path:str, num_issues:int, seed:int=611):
+    with open(path, 'w') as fout:
+        json.dump(generate_export(num_issues, seed), fout)
+
+
+if __name__ == '__main__':
+    import sys
+    write_export(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 10000)
@@ -10,6 +10,12 @@ config parameters.
 '''
 
 _config = None
+# Parameter name -> (raw environment value or None, typed value): the typed
+# snapshot of the parameters read so far. An entry is valid while the
+# environment still holds the raw value it was parsed from.
+_snapshot = {}
+# Snapshot value of parameters that are neither set nor in the config file
+_MISSING = object()
 
 
 def _init_config(path=None):
@@ -17,7 +23,7 @@ def _init_config(path=None):
     if _config is not None:
         return
 
-    filepath = _get_default_path()
+    filepath = path or _config_path
     if filepath is None:
         logger.info('Initializing empty config')
         _config = {}
@@ -55,18 +61,20 @@ def get_parameter(parameter_name, default=None):
     Preference is given to environment variables, and then to the config file.
     """
     _init_config()
-    if parameter_name in os.environ:
-        value = os.environ.get(parameter_name)
-        if value.startswith("json:"):
-            value = value[5:]
-        return convert_to_typed_value(value)
-    if parameter_name not in _config:
+    raw = os.environ.get(parameter_name)
+    cached = _snapshot.get(parameter_name)
+    if cached is None or cached[0] != raw:
+        if raw is not None:
+            value = convert_to_typed_value(raw[5:] if raw.startswith("json:") else raw)
+        else:
+            value = _config.get(parameter_name, _MISSING)
+        cached = _snapshot[parameter_name] = (raw, value)
+    if cached[1] is _MISSING:
         if default:
             return default
         logger.info(f"Config parameter {parameter_name} is not specified")
         return None
-    else:
-        return _config[parameter_name]
+    return cached[1]
 
 
 def convert_to_typed_value(value):
@@ -98,8 +106,26 @@ def set_parameter(name, value):
     _init_config()
     if isinstance(value, str):
         os.environ[name] = value
+        invalidate(name)
     else:
-        os.environ[name] = "json:{0}".format(json.dumps(value))
+        # Written to the environment for subprocesses, but the typed value
+        # is kept so that it is not parsed back from JSON on every access
+        raw = "json:{0}".format(json.dumps(value))
+        os.environ[name] = raw
+        _snapshot[name] = (raw, value)
+
+
+def invalidate(name=None):
+    """
+    Drops a parameter (or all parameters) from the typed snapshot, so that
+    it is read again from the environment or the config file. Parameters
+    changed through set_parameter are invalidated automatically; this is
+    only needed after modifying the config file or a typed value in place.
+    """
+    if name is None:
+        _snapshot.clear()
+    else:
+        _snapshot.pop(name, None)
 
 
 def overwrite_from_args(args):
@@ -108,6 +134,7 @@ def overwrite_from_args(args):
     can be accessed the same way through the config. It adds any parameters
     that are missing and overwrites parameters that already exist.
     """
+    invalidate()
     try:
         for name, value in vars(args).iteritems():
             if value is not None:
@@ -121,3 +148,7 @@ def overwrite_from_args(args):
                 set_parameter(name, value)
     except:
         pass
+
+
+# The config file is searched for once, when the module is loaded
+_config_path = _get_default_path()
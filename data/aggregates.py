@@ -0,0 +1,91 @@
+"""
+Materialized aggregates over the issues. The counts used by the label
+trend, label, label event and reopened issue analyses are stored next
+to the issue cache and kept up to date by applying only the changes of
+each ingestion: the contribution of an updated or removed issue is
+subtracted and the contribution of a new or updated issue is added.
+"""
+
+from typing import List, Dict
+
+from models.model import Issue
+
+
+def _add(counts:Dict[str, int], key:str, amount:int):
+    """
+    Adds to a count, dropping the key when it reaches zero so that the
+    result is the same as counting from scratch.
+    """
+    value = counts.get(key, 0) + amount
+    if value == 0:
+        counts.pop(key, None)
+    else:
+        counts[key] = value
+
+
+class MaterializedAggregates:
+    """
+    Per-label-per-month counts, label totals, label event counts and
+    reopened issue counts over all issues of the dataset.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.issue_count:int = 0
+        # Number of issues carrying each label
+        self.label_totals:Dict[str, int] = {}
+        # Number of issues carrying each label, per month of creation
+        self.label_month:Dict[str, Dict[str, int]] = {}
+        # Number of 'labeled' events per (lower-cased) label
+        self.labeled_events:Dict[str, int] = {}
+        # Number of issues that were closed and reopened, and their labels
+        self.reopened_count:int = 0
+        self.reopened_labels:Dict[str, int] = {}
+
+    @staticmethod
+    def from_issues(issues:List[Issue]) -> 'MaterializedAggregates':
+        aggregates = MaterializedAggregates()
+        aggregates.add_issues(issues)
+        return aggregates
+
+    def add_issues(self, issues:List[Issue], sign:int=1):
+        """
+        Adds the contribution of the issues to the counts, or
+        removes it if sign is -1.
+        """
+        for issue in issues:
+            self.issue_count += sign
+            created_month = issue.created_date.strftime('%Y-%m') if issue.created_date else None
+            for label in issue.labels:
+                _add(self.label_totals, label, sign)
+                if created_month:
+                    months = self.label_month.setdefault(label, {})
+                    _add(months, created_month, sign)
+                    if not months:
+                        del self.label_month[label]
+
+            closed = False
+            reopened = False
+            for event in issue.events:
+                if event.event_type == 'labeled' and event.label:
+                    _add(self.labeled_events, event.label.lower(), sign)
+                if event.event_type == 'closed':
+                    closed = True
+                elif event.event_type == 'reopened':
+                    reopened = True
+            if closed and reopened:
+                self.reopened_count += sign
+                for label in issue.labels:
+                    _add(self.reopened_labels, label, sign)
+
+    def to_json(self) -> Dict:
+        return dict(vars(self))
+
+    @staticmethod
+    def from_json(jobj:Dict) -> 'MaterializedAggregates':
+        aggregates = MaterializedAggregates()
+        for name in vars(aggregates):
+            setattr(aggregates, name, jobj[name])
+        return aggregates
@@ -0,0 +1,383 @@
+"""
+Import and export of the parsed issues as Apache Arrow tables, so that
+tools built on Arrow (pandas, Polars, DuckDB, Spark, ...) can use them
+without parsing the JSON export, and so that the issues can be loaded
+from them much faster than from JSON.
+
+A table directory holds four tables, all either Parquet files
+(.parquet, compressed with zstd) or Arrow IPC files (.arrow, compressed
+with lz4):
+
+- issues: one row per issue, in the order of the export: issue_id (the
+  row), number, repository, state, creator, created_date, updated_date,
+  url, title, text, timeline_url
+- labels: issue_id, label
+- assignees: issue_id, assignee
+- events: issue_id, event_type, author, event_date, label, comment
+
+Repeated strings are dictionary-encoded and dates are UTC timestamps.
+The schema metadata of the issues table holds the users, labels and
+event types of the dataset ('vocabularies', as JSON), since Parquet
+only keeps the dictionary values a column uses.
+The tables are built from the columns of the columnar dataset and read
+back into them without going through issue objects. When reading, a
+column of the dataset is only read from the tables when it is first
+accessed, so analyses working on columns only read what they use.
+
+pyarrow is optional; it is imported when tables are read or written.
+"""
+
+import json
+import os
+from collections.abc import Mapping
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from data.columnar import (ColumnarIssues, Vocabulary, CHILD_COLUMNS, EVENT_TEXT_COLUMNS, ISSUE_COLUMNS,
+                           ISSUE_TEXT_COLUMNS, STATES, STATE_CODES)
+
+# Table format -> file extension
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+TABLES = ['issues', 'labels', 'assignees', 'events']
+
+# Columns of the dataset read from a column of a table: (table, column)
+_SOURCES = {
+    'number': ('issues', 'number'),
+    'state': ('issues', 'state'),
+    'creator': ('issues', 'creator'),
+    'created_date': ('issues', 'created_date'),
+    'updated_date': ('issues', 'updated_date'),
+    'url': ('issues', 'url'),
+    'repository': ('issues', 'repository'),
+    'title': ('issues', 'title'),
+    'text': ('issues', 'text'),
+    'timeline_url': ('issues', 'timeline_url'),
+    'label_ids': ('labels', 'label'),
+    'assignee_ids': ('assignees', 'assignee'),
+    'event_type': ('events', 'event_type'),
+    'event_author': ('events', 'author'),
+    'event_date': ('events', 'event_date'),
+    'event_label': ('events', 'label'),
+    'event_comment': ('events', 'comment'),
+}
+# Offsets columns of the dataset and the table of their children
+_CHILD_TABLES = {'label_offsets': 'labels', 'assignee_offsets': 'assignees', 'event_offsets': 'events'}
+# Schema metadata key of the vocabularies in the issues table
+_VOCABULARIES_KEY = b'vocabularies'
+
+
+def _pyarrow():
+    """
+    Imports pyarrow, raising an ImportError that says how to install it.
+    """
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('Reading and writing Parquet/Arrow tables requires pyarrow (pip install pyarrow)')
+    return pyarrow
+
+
+def table_files(path:str) -> Dict[str, str]:
+    """
+    The files of the tables in a directory (by table name), or an empty
+    dictionary if it is not a table directory.
+    """
+    if not os.path.isdir(path):
+        return {}
+    for extension in FORMATS.values():
+        files = {name: os.path.join(path, name + extension) for name in TABLES}
+        if all(os.path.isfile(file) for file in files.values()):
+            return files
+    return {}
+
+
+def is_table_dir(path:str) -> bool:
+    return bool(path) and bool(table_files(path))
+
+
+def _strings(pa, data:np.ndarray, offsets:np.ndarray, null:np.ndarray):
+    """
+    Arrow strings over the packed text of a column, without decoding it.
+    """
+    null = np.asarray(null, dtype=bool)
+    buffers = [pa.py_buffer(np.packbits(~null, bitorder='little')),
+               pa.py_buffer(np.ascontiguousarray(offsets, dtype=np.int64)),
+               pa.py_buffer(np.ascontiguousarray(data, dtype=np.uint8))]
+    return pa.Array.from_buffers(pa.large_string(), len(null), buffers, null_count=int(null.sum()))
+
+
+def _text(pa, dataset:ColumnarIssues, name:str):
+    c = dataset.columns
+    return _strings(pa, c[name + '_data'], c[name + '_offsets'], c[name + '_null'])
+
+
+def _dictionary(pa, ids:np.ndarray, values:List[str]):
+    ids = np.asarray(ids, dtype=np.int32)
+    return pa.DictionaryArray.from_arrays(pa.array(ids, type=pa.int32(), mask=ids < 0),
+                                          pa.array(values, type=pa.string()))
+
+
+def _timestamps(pa, dates:np.ndarray):
+    dates = np.asarray(dates).astype('datetime64[us]')
+    return pa.array(dates.view(np.int64), type=pa.timestamp('us', tz='UTC'), mask=np.isnat(dates))
+
+
+def _child_ids(offsets:np.ndarray) -> np.ndarray:
+    return np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+
+
+def to_tables(dataset:ColumnarIssues) -> Dict:
+    """
+    Builds the Arrow tables of the dataset, with the issues in the order of the export.
+    """
+    pa = _pyarrow()
+    positions = np.asarray(dataset['export_position'])
+    if np.any(positions[1:] < positions[:-1]):
+        dataset = dataset.take(np.argsort(positions, kind='stable'))
+    c = dataset.columns
+    users, labels = dataset.users.values, dataset.labels.values
+    states = [STATES[code].value for code in sorted(STATES)]
+    issues = pa.table({
+        'issue_id': pa.array(np.arange(len(dataset), dtype=np.int64)),
+        'number': pa.array(np.asarray(c['number'], dtype=np.int64)),
+        'repository': pa.compute.dictionary_encode(_text(pa, dataset, 'repository')),
+        'state': _dictionary(pa, c['state'], states),
+        'creator': _dictionary(pa, c['creator'], users),
+        'created_date': _timestamps(pa, c['created_date']),
+        'updated_date': _timestamps(pa, c['updated_date']),
+        'url': _text(pa, dataset, 'url'),
+        'title': _text(pa, dataset, 'title'),
+        'text': _text(pa, dataset, 'text'),
+        'timeline_url': _text(pa, dataset, 'timeline_url'),
+    })
+    vocabularies = {'users': users, 'labels': labels, 'event_types': dataset.event_types.values}
+    issues = issues.replace_schema_metadata({_VOCABULARIES_KEY: json.dumps(vocabularies).encode('utf-8')})
+    label_rows = pa.table({
+        'issue_id': pa.array(_child_ids(c['label_offsets'])),
+        'label': _dictionary(pa, c['label_ids'], labels),
+    })
+    assignees = pa.table({
+        'issue_id': pa.array(_child_ids(c['assignee_offsets'])),
+        'assignee': _dictionary(pa, c['assignee_ids'], users),
+    })
+    events = pa.table({
+        'issue_id': pa.array(_child_ids(c['event_offsets'])),
+        'event_type': _dictionary(pa, c['event_type'], dataset.event_types.values),
+        'author': _dictionary(pa, c['event_author'], users),
+        'event_date': _timestamps(pa, c['event_date']),
+        'label': _dictionary(pa, c['event_label'], labels),
+        'comment': _text(pa, dataset, 'event_comment'),
+    })
+    return {'issues': issues, 'labels': label_rows, 'assignees': assignees, 'events': events}
+
+
+def write_tables(dataset:ColumnarIssues, path:str, table_format:str='parquet'):
+    """
+    Writes the tables of the dataset to a directory as Parquet ('parquet')
+    or Arrow IPC ('arrow') files. Raises a ValueError for other formats.
+    """
+    if table_format not in FORMATS:
+        raise ValueError(f"Unknown table format '{table_format}', expected one of {', '.join(FORMATS)}")
+    pa = _pyarrow()
+    os.makedirs(path, exist_ok=True)
+    for name, table in to_tables(dataset).items():
+        file = os.path.join(path, name + FORMATS[table_format])
+        if table_format == 'parquet':
+            pa.parquet.write_table(table, file + '.tmp', compression='zstd')
+        else:
+            pa.feather.write_feather(table, file + '.tmp', compression='lz4')
+        os.replace(file + '.tmp', file)
+    # Tables of the other format would shadow or mix with the new ones
+    for extension in FORMATS.values():
+        if extension != FORMATS[table_format]:
+            for name in TABLES:
+                if os.path.exists(os.path.join(path, name + extension)):
+                    os.remove(os.path.join(path, name + extension))
+
+
+class TableColumns(Mapping):
+    """
+    Mapping from column name of the columnar dataset to array that reads
+    the table columns backing a column when it is first accessed. Strings
+    are encoded with the vocabularies of the dataset.
+    """
+
+    def __init__(self, path:str, users:Vocabulary, labels:Vocabulary, event_types:Vocabulary):
+        """
+        Constructor
+        """
+        self.files:Dict[str, str] = table_files(path)
+        if not self.files:
+            raise FileNotFoundError(f'No Parquet or Arrow tables found in {path}')
+        self.vocabularies:Dict[str, Vocabulary] = {
+            'creator': users, 'assignee_ids': users, 'event_author': users,
+            'label_ids': labels, 'event_label': labels, 'event_type': event_types,
+        }
+        self.names:List[str] = list(ISSUE_COLUMNS)
+        for name in ISSUE_TEXT_COLUMNS + EVENT_TEXT_COLUMNS:
+            self.names += [name + '_data', name + '_offsets', name + '_null']
+        for offsets_name, children in CHILD_COLUMNS.items():
+            self.names += [offsets_name] + children
+        self._loaded:Dict[str, np.ndarray] = {}
+        # Child table -> order of its rows by issue (None if already ordered)
+        self._orders:Dict[str, np.ndarray] = {}
+        self._num_rows:int = None
+
+    def _read(self, table:str, column:str):
+        """
+        Reads one column of a table as a single Arrow array.
+        """
+        pa = _pyarrow()
+        file = self.files[table]
+        if file.endswith(FORMATS['parquet']):
+            values = pa.parquet.read_table(file, columns=[column])
+        else:
+            values = pa.feather.read_table(file, columns=[column], memory_map=True)
+        return values.unify_dictionaries().column(0).combine_chunks()
+
+    def num_rows(self) -> int:
+        if self._num_rows is None:
+            pa = _pyarrow()
+            file = self.files['issues']
+            if file.endswith(FORMATS['parquet']):
+                self._num_rows = pa.parquet.ParquetFile(file).metadata.num_rows
+            else:
+                with pa.memory_map(file) as source:
+                    reader = pa.ipc.open_file(source)
+                    self._num_rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        return self._num_rows
+
+    def fill_vocabularies(self):
+        """
+        Adds the strings of the tables to the vocabularies, so that they
+        are complete before any column is read. Tables without vocabularies
+        in their metadata have their dictionary-encoded columns read instead.
+        """
+        pa = _pyarrow()
+        file = self.files['issues']
+        if file.endswith(FORMATS['parquet']):
+            metadata = pa.parquet.read_schema(file).metadata
+        else:
+            with pa.memory_map(file) as source:
+                metadata = pa.ipc.open_file(source).schema.metadata
+        if metadata and _VOCABULARIES_KEY in metadata:
+            vocabularies = json.loads(metadata[_VOCABULARIES_KEY])
+            for name, vocabulary in [('users', self.vocabularies['creator']),
+                                     ('labels', self.vocabularies['label_ids']),
+                                     ('event_types', self.vocabularies['event_type'])]:
+                for value in vocabularies[name]:
+                    vocabulary.encode(value)
+        else:
+            for name in self.vocabularies:
+                self[name]
+
+    def _ids(self, values, vocabulary:Vocabulary) -> np.ndarray:
+        """
+        The ids of strings in the vocabulary (-1 for nulls).
+        """
+        pa = _pyarrow()
+        if not pa.types.is_dictionary(values.type):
+            values = pa.compute.dictionary_encode(values)
+        remap = np.array([vocabulary.encode(value) for value in values.dictionary.to_pylist()] + [-1],
+                         dtype=np.int32)
+        return remap[pa.compute.fill_null(values.indices, -1).to_numpy(zero_copy_only=False)]
+
+    def _child_order(self, offsets_name:str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reads the issue ids of a child table and returns the offsets of the
+        children of each issue, and the order of the rows by issue.
+        """
+        table = _CHILD_TABLES[offsets_name]
+        issue_ids = self._read(table, 'issue_id').to_numpy(zero_copy_only=False).astype(np.int64)
+        order = None
+        if np.any(issue_ids[1:] < issue_ids[:-1]):
+            order = np.argsort(issue_ids, kind='stable')
+        offsets = np.zeros(self.num_rows() + 1, dtype=np.int64)
+        np.cumsum(np.bincount(issue_ids, minlength=self.num_rows()), out=offsets[1:])
+        return offsets, order
+
+    def _load(self, name:str) -> Dict[str, np.ndarray]:
+        pa = _pyarrow()
+        base = name.rsplit('_', 1)[0] if name.endswith(('_data', '_offsets', '_null')) else name
+        if name in _CHILD_TABLES:
+            offsets, self._orders[_CHILD_TABLES[name]] = self._child_order(name)
+            return {name: offsets}
+        if name == 'export_position':
+            return {name: np.arange(self.num_rows(), dtype=np.int64)}
+        if base == 'updated_raw':
+            # The raw dates of the JSON export are not kept in the tables
+            return {'updated_raw_data': np.zeros(0, dtype=np.uint8),
+                    'updated_raw_offsets': np.zeros(self.num_rows() + 1, dtype=np.int64),
+                    'updated_raw_null': np.ones(self.num_rows(), dtype=bool)}
+
+        table, column = _SOURCES[base]
+        values = self._read(table, column)
+        if table != 'issues':
+            if table not in self._orders:
+                # The order of the children comes with their offsets
+                self[[o for o, t in _CHILD_TABLES.items() if t == table][0]]
+            if self._orders[table] is not None:
+                values = values.take(pa.array(self._orders[table]))
+        if base in ISSUE_TEXT_COLUMNS or base in EVENT_TEXT_COLUMNS:
+            values = values.cast(pa.large_string())
+            _, offsets_buffer, data_buffer = values.buffers()
+            offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[values.offset:values.offset + len(values) + 1] \
+                if len(values) else np.zeros(1, dtype=np.int64)
+            data = np.frombuffer(data_buffer, dtype=np.uint8)[offsets[0]:offsets[-1]] \
+                if data_buffer is not None else np.zeros(0, dtype=np.uint8)
+            return {base + '_data': data, base + '_offsets': offsets - offsets[0],
+                    base + '_null': values.is_null().to_numpy(zero_copy_only=False)}
+        if name in ('created_date', 'updated_date', 'event_date'):
+            dates = values.cast(pa.timestamp('us', tz='UTC')).cast(pa.int64())
+            dates = pa.compute.fill_null(dates, np.iinfo(np.int64).min).to_numpy(zero_copy_only=False)
+            return {name: dates.view('datetime64[us]')}
+        if name == 'state':
+            codes = {state.value: code for state, code in STATE_CODES.items()}
+            return {name: np.array([codes.get(value, -1) for value in values.cast(pa.string()).to_pylist()],
+                                   dtype=np.int8)}
+        if name == 'number':
+            return {name: values.to_numpy(zero_copy_only=False).astype(np.int64)}
+        dtype = np.int16 if name == 'event_type' else np.int32
+        return {name: self._ids(values, self.vocabularies[name]).astype(dtype)}
+
+    def __getitem__(self, name:str) -> np.ndarray:
+        values = self._loaded.get(name)
+        if values is None:
+            if name not in self.names:
+                raise KeyError(name)
+            self._loaded.update(self._load(name))
+            values = self._loaded[name]
+        return values
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def loaded(self) -> List[str]:
+        """
+        Names of the columns that have been read so far.
+        """
+        return list(self._loaded)
+
+
+def read_tables(path:str, columns:List[str]=None) -> ColumnarIssues:
+    """
+    Opens the tables in a directory as a columnar dataset. Columns are
+    read when first accessed; the given columns (e.g., ['number',
+    'label_ids']) are read right away. The vocabularies are filled up
+    front, so that looking up a user or label does not depend on which
+    columns have been read.
+    """
+    users, labels, event_types = Vocabulary(), Vocabulary(), Vocabulary()
+    table_columns = TableColumns(path, users, labels, event_types)
+    table_columns.fill_vocabularies()
+    dataset = ColumnarIssues(table_columns, users, labels, event_types)
+    for name in columns or []:
+        dataset[name]
+    return dataset
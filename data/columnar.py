@@ -0,0 +1,399 @@
+"""
+Column-oriented representation of the issues. Instead of one object per
+issue and event, every field is stored as a NumPy array so that the data
+can be saved to and loaded from disk without re-parsing the JSON export,
+and so that analyses can work on whole columns at once.
+
+Issue-level columns have one entry per issue. Labels, assignees and events
+are stored as flattened child columns together with an offsets column: the
+children of issue i are found at [offsets[i]:offsets[i+1]]. Strings that
+repeat (user names, labels, event types) are dictionary-encoded into
+integer ids (-1 for missing values) and free text (titles, bodies,
+comments) is stored as UTF-8 bytes with offsets.
+
+Dates are normalized to UTC.
+"""
+
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+from models.model import Issue, Event, State
+
+# Issue-level columns with one value per issue ('export_position' is the
+# position of the issue in the export)
+ISSUE_COLUMNS = ['number', 'state', 'creator', 'created_date', 'updated_date', 'export_position']
+# Free text columns with one value per issue
+ISSUE_TEXT_COLUMNS = ['url', 'repository', 'title', 'text', 'timeline_url', 'updated_raw']
+# Offsets columns and the child columns they index into
+CHILD_COLUMNS = {
+    'label_offsets': ['label_ids'],
+    'assignee_offsets': ['assignee_ids'],
+    'event_offsets': ['event_type', 'event_author', 'event_date', 'event_label'],
+}
+# Free text columns with one value per event
+EVENT_TEXT_COLUMNS = ['event_comment']
+
+# Encoding of the issue state
+STATE_CODES = {State.open: 0, State.closed: 1}
+STATES = {code: state for state, code in STATE_CODES.items()}
+
+
+class Vocabulary:
+    """
+    Maps repeating strings to integer ids and back. New strings are
+    appended, so ids that were handed out remain valid.
+    """
+
+    def __init__(self, values:List[str]=None):
+        """
+        Constructor
+        """
+        self.values:List[str] = list(values or [])
+        self.ids:Dict[str, int] = {value: i for i, value in enumerate(self.values)}
+
+    def encode(self, value:str) -> int:
+        if value is None:
+            return -1
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.values.append(value)
+            self.ids[value] = value_id
+        return value_id
+
+    def lookup(self, value:str) -> int:
+        """
+        Returns the id of a string without adding it (-1 if unknown).
+        """
+        return self.ids.get(value, -1)
+
+    def decode(self, value_id:int) -> str:
+        return None if value_id < 0 else self.values[value_id]
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _to_datetime64(dates:List[datetime]) -> np.ndarray:
+    """
+    Converts datetimes (which may be None) into a UTC datetime64 array.
+    """
+    values = []
+    for date in dates:
+        if isinstance(date, datetime) and date.tzinfo is not None:
+            date = date.astimezone(timezone.utc).replace(tzinfo=None)
+        elif not isinstance(date, datetime):
+            date = None
+        values.append(date)
+    return np.array(values, dtype='datetime64[us]')
+
+
+def _from_datetime64(values:np.ndarray) -> List[datetime]:
+    """
+    Converts a datetime64 array back into timezone-aware datetimes.
+    """
+    return [None if date is None else date.replace(tzinfo=timezone.utc)
+            for date in values.astype('datetime64[us]').tolist()]
+
+
+def _pack_text(values:List[str]):
+    """
+    Packs strings (which may be None) into a byte array, offsets and a null mask.
+    """
+    encoded = [b'' if value is None else str(value).encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    null = np.array([value is None for value in values], dtype=bool)
+    return data, offsets, null
+
+
+def _ragged_indices(offsets:np.ndarray, rows:np.ndarray):
+    """
+    For a selection of rows, returns the indices of their children
+    and the offsets of the children after the selection.
+    """
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    indices = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1], dtype=np.int64)
+    return indices, new_offsets
+
+
+def _column_layout() -> Dict[str, Tuple[str, str]]:
+    """
+    For each column, whether it holds values or offsets, and the offsets
+    column its rows are indexed by (None for one row per issue).
+    """
+    layout = {name: ('values', None) for name in ISSUE_COLUMNS}
+    for name in ISSUE_TEXT_COLUMNS:
+        layout[name + '_null'] = ('values', None)
+        layout[name + '_offsets'] = ('offsets', None)
+        layout[name + '_data'] = ('values', name + '_offsets')
+    for offsets_name, children in CHILD_COLUMNS.items():
+        layout[offsets_name] = ('offsets', None)
+        for name in children:
+            layout[name] = ('values', offsets_name)
+    for name in EVENT_TEXT_COLUMNS:
+        layout[name + '_null'] = ('values', 'event_offsets')
+        layout[name + '_offsets'] = ('offsets', 'event_offsets')
+        layout[name + '_data'] = ('values', name + '_offsets')
+    return layout
+
+
+_LAYOUT = _column_layout()
+
+
+class RowRangeColumns(Mapping):
+    """
+    View of the columns of a contiguous range of issues [start, end).
+    Columns are sliced when first accessed, so with memory-mapped columns
+    only the pages holding the range are read.
+    """
+
+    def __init__(self, columns:Mapping, start:int, end:int):
+        """
+        Constructor
+        """
+        self.columns:Mapping = columns
+        self.start:int = start
+        self.end:int = end
+        self._sliced:Dict[str, np.ndarray] = {}
+
+    def _rows(self, offsets_name:str) -> Tuple[int, int]:
+        # Range of the rows indexed by an offsets column (of the issues if None)
+        if offsets_name is None:
+            return self.start, self.end
+        start, end = self._rows(_LAYOUT[offsets_name][1])
+        offsets = self.columns[offsets_name]
+        return int(offsets[start]), int(offsets[end])
+
+    def __getitem__(self, name:str) -> np.ndarray:
+        values = self._sliced.get(name)
+        if values is None:
+            kind, offsets_name = _LAYOUT[name]
+            start, end = self._rows(offsets_name)
+            if kind == 'offsets':
+                values = self.columns[name][start:end + 1]
+                values = values - values[0]
+            else:
+                values = self.columns[name][start:end]
+            self._sliced[name] = values
+        return values
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+
+class ColumnarIssues:
+    """
+    Holds the issues as NumPy columns together with the vocabularies
+    used to encode user names, labels and event types.
+    """
+
+    def __init__(self, columns:Dict[str, np.ndarray], users:Vocabulary,
+                 labels:Vocabulary, event_types:Vocabulary):
+        """
+        Constructor
+        """
+        self.columns:Dict[str, np.ndarray] = columns
+        self.users:Vocabulary = users
+        self.labels:Vocabulary = labels
+        self.event_types:Vocabulary = event_types
+        self._number_index:Dict[tuple, int] = None
+        # Bitmap index of the labels of the rows (see label_index.py), built on first use
+        self.label_index = None
+
+    def __len__(self):
+        return len(self.columns['number'])
+
+    def __getitem__(self, name:str) -> np.ndarray:
+        return self.columns[name]
+
+    @staticmethod
+    def from_issues(issues:List[Issue], users:Vocabulary=None, labels:Vocabulary=None,
+                    event_types:Vocabulary=None, updated_raw:List[str]=None):
+        """
+        Builds the columns from issue objects. Vocabularies can be passed in
+        so that the ids are compatible with an existing dataset. The raw
+        'updated_date' strings of the export are kept (if given) to detect
+        changed issues on the next ingestion.
+        """
+        users = users if users is not None else Vocabulary()
+        labels = labels if labels is not None else Vocabulary()
+        event_types = event_types if event_types is not None else Vocabulary()
+
+        values:Dict[str, list] = {name: [] for name in ISSUE_COLUMNS + ISSUE_TEXT_COLUMNS + EVENT_TEXT_COLUMNS}
+        for children in CHILD_COLUMNS.values():
+            for name in children:
+                values[name] = []
+        lengths:Dict[str, list] = {name: [] for name in CHILD_COLUMNS}
+
+        for i, issue in enumerate(issues):
+            values['number'].append(issue.number)
+            values['state'].append(STATE_CODES.get(issue.state, -1) if issue.state is not None else -1)
+            values['creator'].append(users.encode(issue.creator))
+            values['created_date'].append(issue.created_date)
+            values['updated_date'].append(issue.updated_date)
+            values['url'].append(issue.url)
+            values['repository'].append(issue.repository)
+            values['title'].append(issue.title)
+            values['text'].append(issue.text)
+            values['timeline_url'].append(issue.timeline_url)
+            values['updated_raw'].append(updated_raw[i] if updated_raw is not None else None)
+
+            lengths['label_offsets'].append(len(issue.labels))
+            values['label_ids'] += [labels.encode(label) for label in issue.labels]
+            lengths['assignee_offsets'].append(len(issue.assignees))
+            values['assignee_ids'] += [users.encode(assignee) for assignee in issue.assignees]
+            lengths['event_offsets'].append(len(issue.events))
+            for event in issue.events:
+                values['event_type'].append(event_types.encode(event.event_type))
+                values['event_author'].append(users.encode(event.author))
+                values['event_date'].append(event.event_date)
+                values['event_label'].append(labels.encode(event.label))
+                values['event_comment'].append(event.comment)
+
+        columns:Dict[str, np.ndarray] = {
+            'number': np.array(values['number'], dtype=np.int64),
+            'state': np.array(values['state'], dtype=np.int8),
+            'creator': np.array(values['creator'], dtype=np.int32),
+            'created_date': _to_datetime64(values['created_date']),
+            'updated_date': _to_datetime64(values['updated_date']),
+            'export_position': np.arange(len(issues), dtype=np.int64),
+            'label_ids': np.array(values['label_ids'], dtype=np.int32),
+            'assignee_ids': np.array(values['assignee_ids'], dtype=np.int32),
+            'event_type': np.array(values['event_type'], dtype=np.int16),
+            'event_author': np.array(values['event_author'], dtype=np.int32),
+            'event_date': _to_datetime64(values['event_date']),
+            'event_label': np.array(values['event_label'], dtype=np.int32),
+        }
+        for name, counts in lengths.items():
+            offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            columns[name] = offsets
+        for name in ISSUE_TEXT_COLUMNS + EVENT_TEXT_COLUMNS:
+            columns[name + '_data'], columns[name + '_offsets'], columns[name + '_null'] = _pack_text(values[name])
+        return ColumnarIssues(columns, users, labels, event_types)
+
+    def text(self, name:str, rows=None) -> List[str]:
+        """
+        Decodes a free text column, optionally only for some rows.
+        """
+        offsets = self.columns[name + '_offsets']
+        null = self.columns[name + '_null']
+        data = self.columns[name + '_data'].tobytes()
+        if rows is None:
+            rows = range(len(null))
+        bounds = offsets.tolist()
+        null = null.tolist()
+        return [None if null[row] else data[bounds[row]:bounds[row + 1]].decode('utf-8') for row in rows]
+
+    def to_issues(self) -> List[Issue]:
+        """
+        Turns the columns back into issue and event objects.
+        """
+        c = self.columns
+        created = _from_datetime64(c['created_date'])
+        updated = _from_datetime64(c['updated_date'])
+        texts = {name: self.text(name) for name in ('url', 'repository', 'title', 'text', 'timeline_url')}
+        numbers = c['number'].tolist()
+        states = c['state'].tolist()
+        creators = c['creator'].tolist()
+        label_offsets = c['label_offsets'].tolist()
+        label_ids = c['label_ids'].tolist()
+        assignee_offsets = c['assignee_offsets'].tolist()
+        assignee_ids = c['assignee_ids'].tolist()
+        event_offsets = c['event_offsets'].tolist()
+        event_types = c['event_type'].tolist()
+        event_authors = c['event_author'].tolist()
+        event_dates = _from_datetime64(c['event_date'])
+        event_labels = c['event_label'].tolist()
+        event_comments = self.text('event_comment')
+
+        issues = []
+        for i in range(len(numbers)):
+            issue = Issue()
+            issue.url = texts['url'][i]
+            issue.repository = texts['repository'][i]
+            issue.creator = self.users.decode(creators[i])
+            issue.labels = [self.labels.values[j] for j in label_ids[label_offsets[i]:label_offsets[i + 1]]]
+            issue.state = STATES.get(states[i])
+            issue.assignees = [self.users.values[j] for j in assignee_ids[assignee_offsets[i]:assignee_offsets[i + 1]]]
+            issue.title = texts['title'][i]
+            issue.text = texts['text'][i]
+            issue.number = numbers[i]
+            issue.created_date = created[i]
+            issue.updated_date = updated[i]
+            issue.timeline_url = texts['timeline_url'][i]
+            for j in range(event_offsets[i], event_offsets[i + 1]):
+                event = Event(None)
+                event.event_type = self.event_types.decode(event_types[j])
+                event.author = self.users.decode(event_authors[j])
+                event.event_date = event_dates[j]
+                event.label = self.labels.decode(event_labels[j])
+                event.comment = event_comments[j]
+                issue.events.append(event)
+            issues.append(issue)
+        return issues
+
+    def row_of(self, number:int, repository:str=None) -> int:
+        """
+        Index from repository and issue number to row (None if the issue is unknown).
+        """
+        if self._number_index is None:
+            self._number_index = dict(zip(zip(self.text('repository'), self.columns['number'].tolist()),
+                                          range(len(self))))
+        return self._number_index.get((repository, number))
+
+    def slice(self, start:int, end:int) -> 'ColumnarIssues':
+        """
+        Returns the contiguous rows [start, end) without copying the columns.
+        """
+        return ColumnarIssues(RowRangeColumns(self.columns, start, end), self.users, self.labels, self.event_types)
+
+    def take(self, rows) -> 'ColumnarIssues':
+        """
+        Returns a new dataset containing only the given rows, in the given order.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        c = self.columns
+        columns = {name: c[name][rows] for name in ISSUE_COLUMNS}
+        for name in ISSUE_TEXT_COLUMNS:
+            self._take_text(name, rows, columns)
+        for offsets_name, children in CHILD_COLUMNS.items():
+            indices, columns[offsets_name] = _ragged_indices(c[offsets_name], rows)
+            for name in children:
+                columns[name] = c[name][indices]
+            if offsets_name == 'event_offsets':
+                for name in EVENT_TEXT_COLUMNS:
+                    self._take_text(name, indices, columns)
+        return ColumnarIssues(columns, self.users, self.labels, self.event_types)
+
+    def _take_text(self, name:str, rows:np.ndarray, columns:Dict[str, np.ndarray]):
+        c = self.columns
+        indices, columns[name + '_offsets'] = _ragged_indices(c[name + '_offsets'], rows)
+        columns[name + '_data'] = c[name + '_data'][indices]
+        columns[name + '_null'] = c[name + '_null'][rows]
+
+    @staticmethod
+    def concat(first:'ColumnarIssues', second:'ColumnarIssues') -> 'ColumnarIssues':
+        """
+        Appends the rows of the second dataset to the first one. Both must
+        have been encoded with the same vocabularies.
+        """
+        columns = {}
+        offsets_names = list(CHILD_COLUMNS) + [name + '_offsets' for name in ISSUE_TEXT_COLUMNS + EVENT_TEXT_COLUMNS]
+        for name, values in first.columns.items():
+            if name in offsets_names:
+                columns[name] = np.concatenate([values, second.columns[name][1:] + values[-1]])
+            else:
+                columns[name] = np.concatenate([values, second.columns[name]])
+        return ColumnarIssues(columns, first.users, first.labels, first.event_types)
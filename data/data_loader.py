@@ -1,43 +1,411 @@
-
-import json
+import glob
+import os
+from collections import Counter
 from typing import List
 
+import numpy as np
+
 import config as config
+import profiling
 from models.model import Issue
+from data.arrow_tables import is_table_dir, read_tables, write_tables
+from data.columnar import ColumnarIssues
+from data.export_file import load_exports, strip_compression
+from data.issue_cache import IssueCache, source_signature
+from data.issue_filter import FilterTerm, IssueFilter, parse_filter
+from data.label_index import label_index
+from data.result_cache import ResultCache, code_version, result_key
+from data.search_index import SearchIndex
+from data.sqlite_store import SQLiteIssueStore
 
 # Store issues as singleton to avoid reloads
 _ISSUES:List[Issue] = None
+# Columnar form of the issues, only used with the issue cache
+_COLUMNS:ColumnarIssues = None
+# Columnar issues matching the filter expression, with the dataset and expression they come from
+_FILTERED_COLUMNS = None
+# Full-text search index with the columnar dataset whose rows it indexes
+_SEARCH = None
+# Columnar form of the issues held in memory, when the issue cache is disabled
+_DATASET = None
+# Issues of a table directory matching the filter expression, with the path and expression they come from
+_TABLES = None
 
 class DataLoader:
     """
     Loads the issue data into a runtime object.
     """
-    
+
     def __init__(self):
         """
         Constructor
         """
+        # Export file, or directory or glob pattern of the exports of several repositories
         self.data_path:str = config.get_parameter('ENPM611_PROJECT_DATA_PATH')
-        
-    def get_issues(self):
+        # Storage backend: 'json' (default) reads the export on every run,
+        # 'sqlite' imports it once into a database next to the export
+        self.storage:str = config.get_parameter('ENPM611_PROJECT_STORAGE')
+        self.sqlite_path:str = config.get_parameter('ENPM611_PROJECT_SQLITE_PATH')
+        # Directory of the columnar issue cache. If set, the export is ingested
+        # into the cache incrementally instead of being parsed on every run
+        self.cache_path:str = config.get_parameter('ENPM611_PROJECT_CACHE_PATH')
+        # Whether the cached columns are memory-mapped (default) or read into memory
+        self.cache_mmap:bool = config.get_parameter('ENPM611_PROJECT_CACHE_MMAP') is not False
+        # Filter expression passed in via command line (--filter). Only the
+        # matching issues are handed to the analyses
+        expression = config.get_parameter('filter')
+        self.filter_expression:str = str(expression) if expression is not None else None
+        self._filter:IssueFilter = None
+        # Directory of the result cache. If set, the results that analyses
+        # compute are stored there and reused while the export is unchanged
+        self.result_cache_path:str = config.get_parameter('ENPM611_PROJECT_RESULT_CACHE_PATH')
+        # Size of the result cache in MB, beyond which the least recently used results are evicted
+        self.result_cache_size:float = config.get_parameter('ENPM611_PROJECT_RESULT_CACHE_SIZE') or 100
+        # Passed in via command line (--no-result-cache) to compute every result again
+        self.bypass_result_cache:bool = config.get_parameter('no_result_cache') is True
+
+    @property
+    def filter(self) -> IssueFilter:
+        """
+        The parsed filter expression (empty if none is set).
+        """
+        if self._filter is None:
+            self._filter = parse_filter(self.filter_expression)
+        return self._filter
+
+    def get_issues(self, user:str=None, label:str=None):
         """
         This should be invoked by other parts of the application to get access
         to the issues in the data file.
+
+        Only the issues matching the filter expression (--filter) are
+        returned. Optionally, only the issues involving a user (as creator
+        or author of one of its events) and/or carrying a label are returned.
+        With the SQLite storage, the filters are evaluated by the database,
+        and with the issue cache, against the columns before the issues
+        are materialized.
         """
         global _ISSUES # to access it within the function
+        if user is not None or label is not None:
+            if self.storage == 'sqlite' and not self.has_tables():
+                return self._query_store(user=user, label=label)
+            return [issue for issue in self.get_issues() if _matches(issue, user, label)]
         if _ISSUES is None:
-            _ISSUES = self._load()
-            print(f'Loaded {len(_ISSUES)} issues from {self.data_path}.')
+            with profiling.timed('load issues'):
+                _ISSUES = self._load()
+            if self.filter:
+                print(f'Loaded {len(_ISSUES)} issues matching \'{self.filter.expression}\' from {self.data_path}.')
+            else:
+                print(f'Loaded {len(_ISSUES)} issues from {self.data_path}.')
+            repositories = Counter(issue.repository for issue in _ISSUES if issue.repository is not None)
+            if len(repositories) > 1:
+                print('Issues per repository: ' + ', '.join(f'{name} ({n})' for name, n in sorted(repositories.items())))
         return _ISSUES
-    
+
     def _load(self):
         """
         Loads the issues into memory.
         """
-        with open(self.data_path,'r') as fin:
-            return [Issue(i) for i in json.load(fin)]
-    
+        if self.has_tables():
+            return self.get_tables().to_issues()
+        if self.storage == 'sqlite':
+            return self._query_store()
+        if self.cache_path:
+            dataset = self.get_columns()
+            # The cache is partitioned by month, restore the order of the export
+            return dataset.take(np.argsort(dataset['export_position'], kind='stable')).to_issues()
+        return self.filter.apply(load_exports(self.data_path, parse=Issue))
+
+    def has_columns(self) -> bool:
+        """
+        Whether the issues are available in columnar form (issue cache enabled).
+        """
+        return bool(self.cache_path) and not self.has_tables()
+
+    def has_tables(self) -> bool:
+        """
+        Whether the data path is a directory of Parquet or Arrow tables (see
+        arrow_tables.py). The tables are read instead of a JSON export,
+        without the issue cache or the SQLite store.
+        """
+        return is_table_dir(self.data_path)
+
+    def get_tables(self) -> ColumnarIssues:
+        """
+        Returns the issues of the table directory matching the filter
+        expression in columnar form. Without a filter expression, the
+        columns are only read from the tables when first accessed.
+        """
+        global _TABLES
+        if _TABLES is None or _TABLES[0] != (self.data_path, self.filter_expression):
+            with profiling.timed('read tables'):
+                dataset = self.filter.apply_columns(read_tables(self.data_path))
+            _TABLES = ((self.data_path, self.filter_expression), dataset)
+        return _TABLES[1]
+
+    def export_tables(self, path:str, table_format:str='parquet') -> int:
+        """
+        Writes the issues matching the filter expression with their labels,
+        assignees and events as Parquet ('parquet') or Arrow IPC ('arrow')
+        tables to a directory, which can be used as data path later on.
+        Returns the number of exported issues.
+        """
+        dataset = self.get_dataset()
+        with profiling.timed('export tables'):
+            write_tables(dataset, path, table_format)
+        return len(dataset)
+
+    def get_columns(self) -> ColumnarIssues:
+        """
+        Returns the issues in columnar form from the issue cache, bringing
+        the cache up to date with the export first if necessary. Only the
+        rows matching the filter expression are returned. If it restricts
+        the creation date, only the partitions of the cache overlapping
+        the date range are read.
+        """
+        global _FILTERED_COLUMNS
+        self._load_columns()
+        if not self.filter:
+            return _COLUMNS
+        if _FILTERED_COLUMNS is None or _FILTERED_COLUMNS[0] is not _COLUMNS \
+                or _FILTERED_COLUMNS[1] != self.filter.expression:
+            with profiling.timed('filter columns'):
+                dataset = _COLUMNS
+                start, end = self.filter.created_range()
+                if start is not None or end is not None:
+                    dataset = dataset.slice(*IssueCache(self.cache_path).partition_rows(start, end))
+                _FILTERED_COLUMNS = (_COLUMNS, self.filter.expression, self.filter.apply_columns(dataset))
+        return _FILTERED_COLUMNS[2]
+
+    def _load_columns(self) -> ColumnarIssues:
+        """
+        Returns all issues of the issue cache, loading the cache or bringing
+        it up to date with the export first.
+        """
+        global _COLUMNS
+        if _COLUMNS is None:
+            cache = IssueCache(self.cache_path)
+            if cache.is_current(self.data_path):
+                _COLUMNS = cache.load(mmap=self.cache_mmap)
+                if _COLUMNS.label_index is None:
+                    with profiling.timed('build label index'):
+                        cache.save_label_index(label_index(_COLUMNS), cache.version())
+            else:
+                self.refresh()
+        return _COLUMNS
+
+    def get_dataset(self, user:str=None, label:str=None) -> ColumnarIssues:
+        """
+        Returns the issues matching the filter expression in columnar form:
+        from the issue cache if it is enabled or from the tables of a table
+        directory, otherwise converted from the issues returned by
+        get_issues. Optionally, only the issues involving a user (as creator
+        or author of one of its events) and/or carrying a label are returned.
+        """
+        global _DATASET
+        if self.has_columns():
+            dataset = self.get_columns()
+        elif self.has_tables():
+            dataset = self.get_tables()
+        else:
+            issues = self.get_issues()
+            if _DATASET is None or _DATASET[0] is not issues:
+                with profiling.timed('convert to columns'):
+                    _DATASET = (issues, ColumnarIssues.from_issues(issues))
+            dataset = _DATASET[1]
+        terms = []
+        if user is not None:
+            terms.append(FilterTerm('user', values=[user]))
+        if label is not None:
+            terms.append(FilterTerm('label', values=[label]))
+        return IssueFilter(terms=terms).apply_columns(dataset)
+
+    def get_search_index(self):
+        """
+        Returns the columnar dataset and the full-text search index over
+        its rows. With the issue cache, the index stored with the cache is
+        used (and built if it is missing); it covers all cached issues, so
+        the filter expression is not applied. Otherwise, the index is built
+        in memory over the issues returned by get_issues.
+        """
+        global _SEARCH
+        if self.has_columns():
+            dataset = self._load_columns()
+            if _SEARCH is None or _SEARCH[0] is not dataset:
+                cache = IssueCache(self.cache_path)
+                index = cache.load_search_index(mmap=self.cache_mmap)
+                if index is None:
+                    with profiling.timed('build search index'):
+                        index = SearchIndex.build(dataset)
+                    cache.save_search_index(index, cache.version())
+                _SEARCH = (dataset, dataset, index)
+        else:
+            issues = self.get_issues()
+            if _SEARCH is None or _SEARCH[0] is not issues:
+                with profiling.timed('build search index'):
+                    dataset = ColumnarIssues.from_issues(issues)
+                    _SEARCH = (issues, dataset, SearchIndex.build(dataset))
+        return _SEARCH[1], _SEARCH[2]
+
+    def get_aggregates(self):
+        """
+        Returns the materialized aggregates of the issue cache if the cache
+        is enabled and current with the export, None otherwise. Analyses
+        fall back to computing their counts from the issues in that case,
+        and also when a filter expression is set, since the aggregates
+        cover all issues.
+        """
+        if not self.cache_path or self.filter_expression:
+            return None
+        cache = IssueCache(self.cache_path)
+        if not cache.is_current(self.data_path):
+            return None
+        return cache.load_aggregates()
+
+    def get_derived(self, name:str):
+        """
+        Returns data that an analysis derived from the issues and stored
+        with the issue cache, or None if the cache is disabled, not current,
+        or the data was derived from an older version of the cache. Nothing
+        is stored or returned when a filter expression is set.
+        """
+        if not self.cache_path or self.filter_expression:
+            return None
+        cache = IssueCache(self.cache_path)
+        if not cache.is_current(self.data_path):
+            return None
+        return cache.load_derived(name)
+
+    def save_derived(self, name:str, data):
+        """
+        Stores data derived from the issues with the issue cache (if enabled
+        and current), so that later runs can reuse it.
+        """
+        if not self.cache_path or self.filter_expression:
+            return
+        cache = IssueCache(self.cache_path)
+        if cache.is_current(self.data_path):
+            cache.save_derived(name, data)
+
+    def get_result_cache(self) -> ResultCache:
+        """
+        Returns the result cache, or None if it is not enabled.
+        """
+        if not self.result_cache_path:
+            return None
+        return ResultCache(self.result_cache_path, int(float(self.result_cache_size) * 2**20))
+
+    def get_result(self, analysis:str, params:dict, compute):
+        """
+        Returns the result of compute(), an analysis's computation over the
+        issues, from the result cache if it holds the result for the
+        current export, the code of the module defining compute and of the
+        packages it relies on (see result_cache.code_version) and the
+        parameters (to which the filter expression is added). Otherwise,
+        or with --no-result-cache, the result is computed (and stored).
+        """
+        if not self.result_cache_path or self.bypass_result_cache:
+            return compute()
+        try:
+            fingerprint = source_signature(self.data_path)
+        except (OSError, TypeError, ValueError):
+            # Results of missing exports cannot be told apart
+            return compute()
+        cache = self.get_result_cache()
+        key = result_key(fingerprint, analysis, code_version(compute.__module__),
+                         dict(params, filter=self.filter_expression))
+        found, result = cache.get(key)
+        if found:
+            profiling.count('result cache hits')
+            return result
+        profiling.count('result cache misses')
+        result = compute()
+        cache.put(key, result)
+        return result
+
+    def clear_results(self) -> int:
+        """
+        Removes all results from the result cache (--clear-result-cache).
+        Returns the number of removed results.
+        """
+        cache = self.get_result_cache()
+        return cache.clear() if cache is not None else 0
+
+    def refresh(self):
+        """
+        Ingests the export into the issue cache, parsing only the issues
+        that are new or changed since the last ingestion, and drops the
+        issues held in memory. Returns an IngestReport.
+        """
+        global _ISSUES, _COLUMNS, _FILTERED_COLUMNS, _SEARCH, _DATASET, _TABLES
+        with profiling.timed('ingest export'):
+            _COLUMNS, report = IssueCache(self.cache_path).ingest(self.data_path)
+        _ISSUES = None
+        _FILTERED_COLUMNS = None
+        _SEARCH = None
+        _DATASET = None
+        _TABLES = None
+        print(f'Ingested {self.data_path} into {self.cache_path}: {report}.')
+        return report
+
+    def reload(self):
+        """
+        Picks up changes of the export: with the issue cache, ingests the
+        new and changed issues (see refresh) and returns the IngestReport;
+        otherwise drops the issues held in memory, so that they are read
+        again when next accessed (the SQLite store re-imports the export
+        by itself once it changed), and returns None.
+        """
+        global _ISSUES, _COLUMNS, _FILTERED_COLUMNS, _SEARCH, _DATASET, _TABLES
+        if self.has_columns():
+            return self.refresh()
+        _ISSUES = None
+        _COLUMNS = None
+        _FILTERED_COLUMNS = None
+        _SEARCH = None
+        _DATASET = None
+        _TABLES = None
+        return None
+
+    def _query_store(self, user:str=None, label:str=None):
+        """
+        Queries the SQLite database, importing the export into it
+        first if it has not been imported yet.
+        """
+        db_path = self.sqlite_path or default_sqlite_path(self.data_path)
+        store = SQLiteIssueStore(db_path)
+        try:
+            if store.ensure_imported(self.data_path):
+                print(f'Imported {store.count_issues()} issues from {self.data_path} into {db_path}.')
+            return store.query_issues(user=user, label=label, issue_filter=self.filter)
+        finally:
+            store.close()
+
+
+def default_sqlite_path(data_path:str) -> str:
+    """
+    Path of the SQLite database next to the export (or in the directory
+    of the exports, for a directory or glob of exports).
+    """
+    if os.path.isdir(data_path):
+        return os.path.join(data_path, 'issues.sqlite')
+    if glob.has_magic(data_path):
+        return os.path.join(os.path.dirname(data_path), 'issues.sqlite')
+    return os.path.splitext(strip_compression(data_path))[0] + '.sqlite'
+
+
+def _matches(issue:Issue, user:str=None, label:str=None):
+    """
+    Evaluates the user/label filters of DataLoader.get_issues in memory.
+    """
+    if label is not None and label not in issue.labels:
+        return False
+    if user is not None and issue.creator != user \
+            and not any(event.author == user for event in issue.events):
+        return False
+    return True
+
 
 if __name__ == '__main__':
     # Run the loader for testing
-    DataLoader().get_issues()
\ No newline at end of file
+    DataLoader().get_issues()
@@ -0,0 +1,133 @@
+"""
+Reads the JSON export of the issues, which may be compressed with gzip
+(.json.gz), bzip2 (.json.bz2) or xz (.json.xz). Compressed exports are
+decompressed while they are read, without temporary files. The JSON is
+parsed with the configured JSON backend (see data/json_backend.py); with
+the standard library backend, the issues of a compressed export are
+parsed while it is decompressed, so the decompressed document is never
+held in memory as a whole.
+
+The data path may also be a directory or a glob pattern matching the
+exports of several repositories. The exports are then read concurrently
+in a process pool, and issues whose repository is not known from the
+export are attributed to the repository named after their file.
+"""
+
+import bz2
+import glob
+import gzip
+import lzma
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import IO, Callable, Dict, List
+
+import config as config
+import data.json_backend as json_backend
+from models.model import repository_of
+
+# File extension -> function opening a decompressing file object
+COMPRESSIONS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+}
+
+
+def strip_compression(path:str) -> str:
+    """
+    Removes the compression extension (if any) from the path of an export.
+    """
+    root, extension = os.path.splitext(path)
+    return root if extension.lower() in COMPRESSIONS else path
+
+
+def open_export(path:str) -> IO:
+    """
+    Opens the export for reading as bytes, decompressing it on the fly if
+    its extension is one of COMPRESSIONS. The JSON backends decode it.
+    """
+    opener = COMPRESSIONS.get(os.path.splitext(path)[1].lower())
+    return (opener or open)(path, 'rb')
+
+
+def load_export(path:str, backend:str=None) -> List[Dict]:
+    """
+    Returns the issues of the export as they appear in the JSON, parsed
+    with the JSON backend (by default, the configured one). Compressed
+    exports are streamed into the parser (see json_backend.load_stream).
+    """
+    with open_export(path) as fin:
+        if os.path.splitext(path)[1].lower() in COMPRESSIONS:
+            return json_backend.load_stream(fin, backend)
+        return json_backend.loads(fin.read(), backend)
+
+
+def is_multi_export(path:str) -> bool:
+    """
+    Whether the data path is a directory or a glob pattern of exports.
+    """
+    return os.path.isdir(path) or glob.has_magic(path)
+
+
+def resolve_exports(path:str) -> List[str]:
+    """
+    Returns the export files of a data path: the file itself, the exports
+    (.json, possibly compressed) in a directory, or the files matching a
+    glob pattern, in sorted order. Raises FileNotFoundError if there are none.
+    """
+    if os.path.isdir(path):
+        extensions = ['.json'] + ['.json' + extension for extension in COMPRESSIONS]
+        paths = [os.path.join(path, name) for name in os.listdir(path)
+                 if any(name.lower().endswith(extension) for extension in extensions)]
+    elif glob.has_magic(path):
+        paths = [match for match in glob.glob(path) if os.path.isfile(match)]
+    else:
+        return [path]
+    if not paths:
+        raise FileNotFoundError(f'No exports found in {path}')
+    return sorted(paths)
+
+
+def repository_name(path:str) -> str:
+    """
+    Name of the repository of an export file without repository information.
+    """
+    return os.path.splitext(os.path.basename(strip_compression(path)))[0]
+
+
+def _load_shard(path:str, tag:bool, parse:Callable=None) -> List:
+    jissues = load_export(path)
+    if tag:
+        for jissue in jissues:
+            jissue['repository'] = repository_of(jissue) or repository_name(path)
+    return [parse(jissue) for jissue in jissues] if parse is not None else jissues
+
+
+def get_load_workers() -> int:
+    """
+    Number of processes reading exports concurrently (ENPM611_PROJECT_WORKERS,
+    defaults to the number of cores).
+    """
+    try:
+        return max(1, int(config.get_parameter('ENPM611_PROJECT_WORKERS')))
+    except (TypeError, ValueError):
+        return os.cpu_count() or 1
+
+
+def load_exports(path:str, parse:Callable=None, workers:int=None) -> List:
+    """
+    Returns the issues of all exports of a data path, in the order of the
+    files. If parse is given (e.g., the Issue class), it is applied to each
+    issue by the process that reads the export. With several exports, each
+    issue is tagged with its repository.
+    """
+    paths = resolve_exports(path)
+    load = partial(_load_shard, tag=is_multi_export(path), parse=parse)
+    workers = workers if workers is not None else get_load_workers()
+    if len(paths) == 1 or workers <= 1:
+        shards = [load(shard_path) for shard_path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+            shards = list(executor.map(load, paths))
+    return [issue for shard in shards for issue in shard]
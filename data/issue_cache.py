@@ -0,0 +1,439 @@
+"""
+On-disk cache of the parsed issues in columnar form. Each column is
+stored as a .npy file in the cache directory, and meta.json holds the
+vocabularies and identifies the export the cache was built from.
+
+The rows are partitioned by month of creation, newest first (issues
+without a creation date last), and meta.json lists the row range and
+the minimum and maximum creation date of each partition. A date-range
+query only reads the rows of the partitions overlapping the range. The
+rows keep the position of the issue in the export ('export_position').
+
+Columns are opened lazily and memory-mapped by default: loading the
+cache is nearly instantaneous, only the columns an analysis touches are
+paged in, and the pages are shared through the OS page cache between
+processes reading the same cache. The column files of each version of
+the cache have their own names (<column>.<version>.npy), so a dataset
+only ever opens the columns of the version it was loaded from, even if
+the cache is written again in the meantime. The files of the previous
+version are kept when the cache is written; older ones are removed.
+
+When the export changes, it is ingested incrementally: issues are
+matched by repository and number, and only the issues that are new or
+whose 'updated_date' changed are parsed into model objects again. The
+materialized aggregates stored in aggregates.json are updated with
+the same changes, and the label bitmaps (labels/) are rebuilt. The
+full-text search index (search/) is built by the first search after an
+ingestion (see DataLoader.get_search_index), as most runs do not search.
+Other data derived from the dataset (e.g., quantile sketches) is stored
+with the version of the cache it was derived from and is ignored once
+the cache changes.
+"""
+
+import json
+import os
+import uuid
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+import profiling
+from data.aggregates import MaterializedAggregates
+from data.arrow_tables import table_files
+from data.columnar import ColumnarIssues, Vocabulary
+from data.export_file import load_exports, resolve_exports
+from data.label_index import LabelIndex
+from data.search_index import SearchIndex
+from models.model import Issue, repository_of
+
+_META_FILE = 'meta.json'
+_AGGREGATES_FILE = 'aggregates.json'
+_SEARCH_DIR = 'search'
+_LABELS_DIR = 'labels'
+# Version of the layout of the cache directory; caches with another layout are rebuilt
+_LAYOUT = 4
+
+
+def _column_file(name:str, version:str) -> str:
+    return f'{name}.{version}.npy'
+
+
+def source_signature(source_path:str) -> str:
+    """
+    Identifies a version of the export files, or of the files of a table
+    directory (paths, sizes and modification times) so that they are only
+    processed again when they change on disk.
+    """
+    signatures = []
+    for path in list(table_files(source_path).values()) or resolve_exports(source_path):
+        stat = os.stat(path)
+        signatures.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    return json.dumps(signatures)
+
+
+class IngestReport:
+    """
+    Summarizes the changes found by an ingestion.
+    """
+
+    def __init__(self, added:int=0, updated:int=0, unchanged:int=0, removed:int=0):
+        """
+        Constructor
+        """
+        self.added:int = added
+        self.updated:int = updated
+        self.unchanged:int = unchanged
+        self.removed:int = removed
+        # Rows of the previous dataset that were updated or removed, and the
+        # newly parsed issues, so that derived data can be updated
+        self.previous_rows:List[int] = []
+        self.issues:List[Issue] = []
+
+    def __str__(self):
+        return f'{self.added} added, {self.updated} updated, {self.unchanged} unchanged, {self.removed} removed'
+
+
+class LazyColumns(Mapping):
+    """
+    Mapping from column name to array that only opens the .npy file
+    of a column (of the given version of the cache) when the column is
+    first accessed.
+    """
+
+    def __init__(self, path:str, names:List[str], version:str, mmap:bool=True):
+        """
+        Constructor
+        """
+        self.path:str = path
+        self.names:List[str] = list(names)
+        self.version:str = version
+        self.mmap_mode:str = 'r' if mmap else None
+        self._loaded:Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, name:str) -> np.ndarray:
+        values = self._loaded.get(name)
+        if values is None:
+            if name not in self.names:
+                raise KeyError(name)
+            try:
+                values = np.load(os.path.join(self.path, _column_file(name, self.version)), mmap_mode=self.mmap_mode)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Column '{name}' of version {self.version} of the issue cache {self.path} "
+                                        'was removed by later ingestions, load the cache again')
+            self._loaded[name] = values
+        return values
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def loaded(self) -> List[str]:
+        """
+        Names of the columns that have been accessed so far.
+        """
+        return list(self._loaded)
+
+
+class IssueCache:
+    """
+    Reads, writes and incrementally updates the columnar issue cache.
+    """
+
+    def __init__(self, path:str):
+        """
+        Constructor
+        """
+        self.path:str = path
+
+    def _read_meta(self) -> Dict:
+        try:
+            with open(os.path.join(self.path, _META_FILE), 'r') as fin:
+                meta = json.load(fin)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('layout') == _LAYOUT else None
+
+    def exists(self) -> bool:
+        return self._read_meta() is not None
+
+    def version(self) -> str:
+        """
+        Changes every time the cache is written, so that data derived
+        from the cache can tell whether it is still current.
+        """
+        meta = self._read_meta()
+        return meta['version'] if meta else None
+
+    def is_current(self, source_path:str) -> bool:
+        """
+        Whether the cache was built from the given export as it is on disk now.
+        """
+        meta = self._read_meta()
+        try:
+            return meta is not None and meta.get('source') == source_signature(source_path)
+        except OSError:
+            return False
+
+    def load(self, mmap:bool=True) -> ColumnarIssues:
+        """
+        Opens the cached dataset. Columns are read when first accessed,
+        through a read-only memory map unless mmap is False. The label
+        index stored with the cache is attached to the dataset, if it is
+        current.
+        """
+        meta = self._read_meta()
+        columns = LazyColumns(self.path, meta['columns'], meta['version'], mmap)
+        dataset = ColumnarIssues(columns, Vocabulary(meta['users']), Vocabulary(meta['labels']),
+                                 Vocabulary(meta['event_types']))
+        dataset.label_index = LabelIndex.load(os.path.join(self.path, _LABELS_DIR), meta['version'], mmap)
+        return dataset
+
+    def partitions(self) -> List[Dict]:
+        """
+        The partitions of the cached dataset: month ('key', None for issues
+        without a creation date), row range ('start', 'end') and creation
+        date range ('min_created', 'max_created').
+        """
+        meta = self._read_meta()
+        return meta['partitions'] if meta else []
+
+    def partition_rows(self, start:datetime=None, end:datetime=None) -> Tuple[int, int]:
+        """
+        Returns the range of rows of the partitions holding issues created
+        in [start, end); either bound may be None. Since partitions are
+        ordered by month, these rows are contiguous.
+        """
+        bounds = [None if date is None else np.datetime64(date.astimezone(timezone.utc).replace(tzinfo=None), 'us')
+                  for date in (start, end)]
+        selected = []
+        for partition in self.partitions():
+            if partition['key'] is None:
+                continue
+            if (bounds[0] is None or np.datetime64(partition['max_created']) >= bounds[0]) and \
+                    (bounds[1] is None or np.datetime64(partition['min_created']) < bounds[1]):
+                selected.append(partition)
+        profiling.count('cache partitions read', len(selected))
+        profiling.count('cache partitions pruned', len(self.partitions()) - len(selected))
+        if not selected:
+            return 0, 0
+        return min(p['start'] for p in selected), max(p['end'] for p in selected)
+
+    def save(self, dataset:ColumnarIssues, source:str=None, partitions:List[Dict]=None):
+        """
+        Writes the dataset to the cache and returns its new version. Unless
+        the partitions of the dataset are given (see partition_by_month),
+        the dataset is partitioned first, recording its order as the export
+        order. The columns are written to the files of the new version and
+        the metadata is replaced last, so readers of the previous version
+        keep reading its columns and an interrupted write leaves the
+        previous version in place.
+        """
+        if partitions is None:
+            dataset, partitions = partition_by_month(dataset)
+        os.makedirs(self.path, exist_ok=True)
+        previous = self.version()
+        version = uuid.uuid4().hex
+        for name, values in dataset.columns.items():
+            column_path = os.path.join(self.path, _column_file(name, version))
+            with open(column_path + '.tmp', 'wb') as fout:
+                np.save(fout, values)
+            os.replace(column_path + '.tmp', column_path)
+        meta = {
+            'layout': _LAYOUT,
+            'version': version,
+            'source': source,
+            'columns': sorted(dataset.columns),
+            'users': dataset.users.values,
+            'labels': dataset.labels.values,
+            'event_types': dataset.event_types.values,
+            'partitions': partitions,
+        }
+        meta_path = os.path.join(self.path, _META_FILE)
+        with open(meta_path + '.tmp', 'w') as fout:
+            json.dump(meta, fout)
+        os.replace(meta_path + '.tmp', meta_path)
+        self._remove_columns(keep=[version, previous])
+        return version
+
+    def _remove_columns(self, keep:List[str]):
+        """
+        Removes the column files of the versions of the cache other than
+        the given ones (and those of older layouts).
+        """
+        for file in os.listdir(self.path):
+            if file.endswith('.npy') and file[:-len('.npy')].rsplit('.', 1)[-1] not in keep:
+                try:
+                    os.remove(os.path.join(self.path, file))
+                except OSError:
+                    # Still mapped by a reader on a platform that does not allow removing it
+                    pass
+
+    def load_aggregates(self) -> MaterializedAggregates:
+        """
+        Returns the materialized aggregates if they match the cached dataset,
+        None otherwise.
+        """
+        try:
+            with open(os.path.join(self.path, _AGGREGATES_FILE), 'r') as fin:
+                jobj = json.load(fin)
+        except (OSError, ValueError):
+            return None
+        if jobj.get('version') is None or jobj.get('version') != self.version():
+            return None
+        return MaterializedAggregates.from_json(jobj['aggregates'])
+
+    def save_aggregates(self, aggregates:MaterializedAggregates, version:str):
+        with open(os.path.join(self.path, _AGGREGATES_FILE), 'w') as fout:
+            json.dump({'version': version, 'aggregates': aggregates.to_json()}, fout)
+
+    def load_derived(self, name:str) -> Dict:
+        """
+        Returns data derived from the cached dataset by an analysis (stored
+        as <name>.json) if it was derived from the current version of the
+        cache, None otherwise.
+        """
+        try:
+            with open(os.path.join(self.path, name + '.json'), 'r') as fin:
+                jobj = json.load(fin)
+        except (OSError, ValueError):
+            return None
+        if jobj.get('version') is None or jobj.get('version') != self.version():
+            return None
+        return jobj['data']
+
+    def save_derived(self, name:str, data:Dict):
+        """
+        Stores data derived from the current version of the cached dataset.
+        """
+        path = os.path.join(self.path, name + '.json')
+        with open(path + '.tmp', 'w') as fout:
+            json.dump({'version': self.version(), 'data': data}, fout)
+        os.replace(path + '.tmp', path)
+
+    def load_search_index(self, mmap:bool=True) -> SearchIndex:
+        """
+        Returns the full-text search index over the rows of the cached
+        dataset if it was built from the current version, None otherwise.
+        """
+        return SearchIndex.load(os.path.join(self.path, _SEARCH_DIR), self.version(), mmap)
+
+    def save_search_index(self, index:SearchIndex, version:str):
+        index.save(os.path.join(self.path, _SEARCH_DIR), version)
+
+    def save_label_index(self, index:LabelIndex, version:str):
+        index.save(os.path.join(self.path, _LABELS_DIR), version)
+
+    def ingest(self, source_path:str):
+        """
+        Brings the cache up to date with the export and returns the dataset
+        (as stored, i.e., partitioned) together with an IngestReport. Unchanged issues are taken from the
+        cache; new and changed issues are parsed and patched in, and the
+        aggregates are updated with their difference.
+        """
+        jissues:List[Dict] = load_exports(source_path)
+        previous = self.load() if self.exists() else None
+        aggregates = self.load_aggregates() if previous is not None else MaterializedAggregates()
+        dataset, report = ingest_json(jissues, previous)
+        if aggregates is None:
+            # Aggregates are missing or outdated, recompute them
+            aggregates = MaterializedAggregates.from_issues(dataset.to_issues())
+        else:
+            if report.previous_rows:
+                aggregates.add_issues(previous.take(report.previous_rows).to_issues(), sign=-1)
+            aggregates.add_issues(report.issues)
+        dataset, partitions = partition_by_month(dataset)
+        version = self.save(dataset, source_signature(source_path), partitions)
+        self.save_aggregates(aggregates, version)
+        with profiling.timed('build label index'):
+            dataset.label_index = LabelIndex.build(dataset)
+        self.save_label_index(dataset.label_index, version)
+        return dataset, report
+
+
+def partition_by_month(dataset:ColumnarIssues):
+    """
+    Orders the rows by month of creation, newest first and stable within
+    a month, and returns the reordered dataset with the partitions.
+    """
+    created = np.asarray(dataset['created_date'])
+    months = created.astype('datetime64[M]').astype(np.int64)
+    # Newest first, issues without a creation date last
+    keys = np.where(np.isnat(created), np.iinfo(np.int64).max, -months)
+    order = np.argsort(keys, kind='stable')
+    partitioned = dataset.take(order)
+    partitioned.columns['export_position'] = order.astype(np.int64)
+    keys = keys[order]
+    created = created[order]
+    boundaries = [0] + (np.flatnonzero(np.diff(keys)) + 1).tolist() + [len(keys)]
+    partitions = []
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        if start == end:
+            continue
+        if np.isnat(created[start]):
+            partitions.append({'key': None, 'start': start, 'end': end, 'min_created': None, 'max_created': None})
+        else:
+            partitions.append({
+                'key': str(created[start].astype('datetime64[M]')),
+                'start': start,
+                'end': end,
+                'min_created': str(created[start:end].min()),
+                'max_created': str(created[start:end].max()),
+            })
+    return partitioned, partitions
+
+
+def ingest_json(jissues:List[Dict], previous:ColumnarIssues=None):
+    """
+    Merges the issues of an export (as they appear in the JSON) into a
+    previously ingested dataset. Returns the new dataset, in the order of
+    the export, together with an IngestReport.
+    """
+    if previous is None:
+        updated_raw = [jissue.get('updated_date') for jissue in jissues]
+        report = IngestReport(added=len(jissues))
+        report.issues = [Issue(jissue) for jissue in jissues]
+        return ColumnarIssues.from_issues(report.issues, updated_raw=updated_raw), report
+
+    previous_updated = previous.text('updated_raw')
+    report = IngestReport()
+    # Rows of the previous dataset (>= 0) or of the newly parsed issues (< 0, encoded as -1 - index)
+    sources:List[int] = []
+    parsed:List[Issue] = []
+    parsed_raw:List[str] = []
+    seen = np.zeros(len(previous), dtype=bool)
+    for jissue in jissues:
+        try:
+            number = int(jissue.get('number', '-1'))
+        except:
+            number = -1
+        row = previous.row_of(number, repository_of(jissue))
+        if row is not None and not seen[row] and previous_updated[row] == jissue.get('updated_date'):
+            report.unchanged += 1
+            seen[row] = True
+            sources.append(row)
+            continue
+        if row is not None and not seen[row]:
+            report.updated += 1
+            report.previous_rows.append(row)
+            seen[row] = True
+        else:
+            report.added += 1
+        sources.append(-1 - len(parsed))
+        parsed.append(Issue(jissue))
+        parsed_raw.append(jissue.get('updated_date'))
+    removed_rows = np.flatnonzero(~seen).tolist()
+    report.removed = len(removed_rows)
+    report.previous_rows += removed_rows
+    report.issues = parsed
+
+    changes = ColumnarIssues.from_issues(parsed, previous.users, previous.labels,
+                                         previous.event_types, updated_raw=parsed_raw)
+    combined = ColumnarIssues.concat(previous, changes)
+    sources = np.array(sources, dtype=np.int64)
+    # Newly parsed issues follow the previous rows in the combined dataset
+    order = np.where(sources >= 0, sources, len(previous) - 1 - sources)
+    return combined.take(order), report
@@ -0,0 +1,425 @@
+"""
+Filter expressions selecting the issues that the analyses work on, e.g.
+
+    label:kind/bug state:closed created:2023-01..2023-06 author:foo
+
+An expression is a list of terms separated by spaces, all of which must
+match. A term is 'field:value'; a value may list alternatives separated
+by commas (label:kind/bug,kind/feature), values with spaces are quoted
+(label:"good first issue") and a leading '-' negates the term. Fields:
+
+- label, state, assignee: the issue carries the label / is in the state /
+  is assigned to the user
+- author: the user created the issue
+- user: the user created the issue or authored one of its events
+  (like --user)
+- repository: the issue belongs to the repository ('owner/name', or the
+  name of the export file for exports without repository information)
+- created, updated: the date falls in the range 'start..end' (either side
+  may be omitted) or in the period of a single value. Dates are YYYY,
+  YYYY-MM or YYYY-MM-DD in UTC, and ranges include the whole end period.
+- number: the issue number falls in the (inclusive) range 'start..end'
+  or equals the value
+- labels: the labels of the issue satisfy a query combining labels with
+  AND, OR, NOT and parentheses, e.g.
+  labels:'kind/bug AND (area/installer OR area/cli) AND NOT status/duplicate'
+  (NOT binds tightest, then AND, then OR; labels with spaces or named
+  like an operator are quoted with double quotes)
+
+The same filter is evaluated by the DataLoader against the issue objects,
+as SQL against the SQLite store, or as a mask over the columns of the
+issue cache, so that only the matching issues are materialized. Over
+the columns, the label terms are answered with the bitmaps of the label
+index (see label_index.py).
+"""
+
+import re
+import shlex
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+import numpy as np
+
+from data.columnar import ColumnarIssues, STATE_CODES
+from data.label_index import LabelIndex, label_index
+from models.model import Issue, State
+
+VALUE_FIELDS = ['label', 'state', 'author', 'user', 'assignee', 'repository']
+RANGE_FIELDS = ['created', 'updated', 'number']
+QUERY_FIELDS = ['labels']
+LABEL_FIELDS = ['label', 'labels']
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|([()])|([^\s()"]+)')
+_OPERATORS = ['AND', 'OR', 'NOT']
+
+
+class FilterError(ValueError):
+    """
+    Raised for filter expressions that cannot be parsed.
+    """
+
+
+def _parse_period(value:str, field:str) -> Tuple[datetime, datetime]:
+    """
+    Returns the start and the (exclusive) end of a year, month or day.
+    """
+    for pattern, step in (('%Y-%m-%d', 'day'), ('%Y-%m', 'month'), ('%Y', 'year')):
+        try:
+            start = datetime.strptime(value, pattern).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        if step == 'day':
+            end = datetime.fromordinal(start.toordinal() + 1).replace(tzinfo=timezone.utc)
+        elif step == 'month':
+            end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+        else:
+            end = start.replace(year=start.year + 1)
+        return start, end
+    raise FilterError(f"Invalid date '{value}' for '{field}', expected YYYY, YYYY-MM or YYYY-MM-DD")
+
+
+def _parse_number(value:str, field:str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise FilterError(f"Invalid number '{value}' for '{field}'")
+
+
+def _utc(date:datetime) -> datetime:
+    return date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
+
+
+def _any_child(offsets:np.ndarray, child_mask:np.ndarray) -> np.ndarray:
+    """
+    Per issue, whether any of its children (e.g., labels) matches.
+    """
+    counts = np.diff(offsets)
+    rows = np.repeat(np.arange(len(counts)), counts)
+    result = np.zeros(len(counts), dtype=bool)
+    result[rows[child_mask]] = True
+    return result
+
+
+def parse_label_query(expression:str) -> tuple:
+    """
+    Parses a label query into a tree of ('label', name), ('not', node),
+    ('and', [nodes]) and ('or', [nodes]).
+    """
+    tokens = []
+    for quoted, paren, word in _QUERY_TOKEN.findall(expression):
+        if paren:
+            tokens.append((paren, None))
+        elif word in _OPERATORS:
+            tokens.append((word, None))
+        else:
+            tokens.append(('label', quoted or word))
+    position = 0
+
+    def peek():
+        return tokens[position][0] if position < len(tokens) else None
+
+    def expect(kind):
+        nonlocal position
+        if peek() != kind:
+            found = f"'{tokens[position][1] or tokens[position][0]}'" if position < len(tokens) else 'end'
+            raise FilterError(f"Invalid label query '{expression}': expected {kind}, found {found}")
+        position += 1
+        return tokens[position - 1][1]
+
+    def parse_or():
+        nodes = [parse_and()]
+        while peek() == 'OR':
+            expect('OR')
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and():
+        nodes = [parse_not()]
+        while peek() == 'AND':
+            expect('AND')
+            nodes.append(parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not():
+        if peek() == 'NOT':
+            expect('NOT')
+            return ('not', parse_not())
+        if peek() == '(':
+            expect('(')
+            node = parse_or()
+            expect(')')
+            return node
+        return ('label', expect('label'))
+
+    node = parse_or()
+    if position < len(tokens):
+        expect('end')
+    return node
+
+
+def _query_matches(node:tuple, labels:set) -> bool:
+    kind, value = node
+    if kind == 'label':
+        return value in labels
+    if kind == 'not':
+        return not _query_matches(value, labels)
+    results = (_query_matches(child, labels) for child in value)
+    return all(results) if kind == 'and' else any(results)
+
+
+def _query_sql(node:tuple, params:List) -> str:
+    kind, value = node
+    if kind == 'label':
+        params.append(value)
+        return "id IN (SELECT issue_id FROM labels WHERE label = ?)"
+    if kind == 'not':
+        return f"NOT ({_query_sql(value, params)})"
+    return '(' + f' {kind.upper()} '.join(_query_sql(child, params) for child in value) + ')'
+
+
+def _query_bitmap(node:tuple, index:LabelIndex) -> np.ndarray:
+    kind, value = node
+    if kind == 'label':
+        return index.bitmap(value)
+    if kind == 'not':
+        return index.invert(_query_bitmap(value, index))
+    # Labels combined directly are looked up together
+    labels = [child[1] for child in value if child[0] == 'label']
+    bitmaps = [_query_bitmap(child, index) for child in value if child[0] != 'label']
+    if kind == 'and':
+        return np.bitwise_and.reduce([index.all_of(labels)] + bitmaps)
+    return np.bitwise_or.reduce([index.any_of(labels)] + bitmaps)
+
+
+class FilterTerm:
+    """
+    One 'field:value' term of a filter expression. Value fields hold the
+    accepted values; range fields hold a [start, end) range in which
+    either bound may be None; query fields hold the parsed query (see
+    parse_label_query).
+    """
+
+    def __init__(self, field:str, values:List[str]=None, start=None, end=None, negated:bool=False,
+                 query:tuple=None):
+        """
+        Constructor
+        """
+        self.field:str = field
+        self.values:List[str] = values or []
+        self.start = start
+        self.end = end
+        self.negated:bool = negated
+        self.query:tuple = query
+
+    @staticmethod
+    def parse(token:str) -> 'FilterTerm':
+        negated = token.startswith('-')
+        field, separator, value = token.lstrip('-').partition(':')
+        field = field.lower()
+        if not separator or not value:
+            raise FilterError(f"Invalid filter term '{token}', expected 'field:value'")
+        if field in VALUE_FIELDS:
+            values = [v for v in value.split(',') if v]
+            if field == 'state':
+                for v in values:
+                    if v not in State.__members__:
+                        raise FilterError(f"Invalid state '{v}', expected one of {', '.join(State.__members__)}")
+            return FilterTerm(field, values=values, negated=negated)
+        if field in RANGE_FIELDS:
+            low, dots, high = value.partition('..')
+            if not dots:
+                low = high = value
+            if field == 'number':
+                start = _parse_number(low, field) if low else None
+                end = _parse_number(high, field) + 1 if high else None
+            else:
+                start = _parse_period(low, field)[0] if low else None
+                end = _parse_period(high, field)[1] if high else None
+            return FilterTerm(field, start=start, end=end, negated=negated)
+        if field in QUERY_FIELDS:
+            return FilterTerm(field, query=parse_label_query(value), negated=negated)
+        fields = VALUE_FIELDS + RANGE_FIELDS + QUERY_FIELDS
+        raise FilterError(f"Unknown filter field '{field}', expected one of {', '.join(fields)}")
+
+    def _in_range(self, value) -> bool:
+        if value is None:
+            return False
+        return (self.start is None or value >= self.start) and (self.end is None or value < self.end)
+
+    def matches(self, issue:Issue) -> bool:
+        if self.field == 'label':
+            result = any(label in self.values for label in issue.labels)
+        elif self.field == 'labels':
+            result = _query_matches(self.query, set(issue.labels))
+        elif self.field == 'state':
+            result = issue.state in self.values
+        elif self.field == 'author':
+            result = issue.creator in self.values
+        elif self.field == 'user':
+            result = issue.creator in self.values or any(event.author in self.values for event in issue.events)
+        elif self.field == 'assignee':
+            result = any(assignee in self.values for assignee in issue.assignees)
+        elif self.field == 'repository':
+            result = issue.repository in self.values
+        elif self.field == 'number':
+            result = self._in_range(issue.number)
+        else:
+            date = issue.created_date if self.field == 'created' else issue.updated_date
+            result = self._in_range(_utc(date) if isinstance(date, datetime) else None)
+        return result != self.negated
+
+    def to_sql(self) -> Tuple[str, List]:
+        placeholders = ', '.join('?' * len(self.values))
+        params = list(self.values)
+        if self.field == 'label':
+            clause = f"id IN (SELECT issue_id FROM labels WHERE label IN ({placeholders}))"
+        elif self.field == 'labels':
+            params = []
+            clause = _query_sql(self.query, params)
+        elif self.field == 'state':
+            clause = f"state IN ({placeholders})"
+        elif self.field == 'author':
+            clause = f"creator IN ({placeholders})"
+        elif self.field == 'user':
+            clause = f"(creator IN ({placeholders}) OR id IN (SELECT issue_id FROM events WHERE author IN ({placeholders})))"
+            params += list(self.values)
+        elif self.field == 'assignee':
+            clause = f"id IN (SELECT issue_id FROM assignees WHERE assignee IN ({placeholders}))"
+        elif self.field == 'repository':
+            clause = f"repository IN ({placeholders})"
+        else:
+            column = {'number': 'number', 'created': 'created_ts', 'updated': 'updated_ts'}[self.field]
+            bounds = [self.start, self.end] if self.field == 'number' else \
+                [None if bound is None else bound.timestamp() for bound in (self.start, self.end)]
+            clauses = [f"{column} IS NOT NULL"]
+            if bounds[0] is not None:
+                clauses.append(f"{column} >= ?")
+                params.append(bounds[0])
+            if bounds[1] is not None:
+                clauses.append(f"{column} < ?")
+                params.append(bounds[1])
+            clause = '(' + ' AND '.join(clauses) + ')'
+        if self.negated:
+            # Rows where the clause is NULL do not match it, so they match the negation
+            clause = f"NOT COALESCE({clause}, 0)"
+        return clause, params
+
+    def bitmap(self, index:LabelIndex) -> np.ndarray:
+        """
+        The packed bitmap of the rows matching a label term (see label_index.py).
+        """
+        result = index.any_of(self.values) if self.field == 'label' else _query_bitmap(self.query, index)
+        return index.invert(result) if self.negated else result
+
+    def mask(self, dataset:ColumnarIssues) -> np.ndarray:
+        if self.field in LABEL_FIELDS:
+            index = label_index(dataset)
+            return index.to_mask(self.bitmap(index))
+        if self.field == 'state':
+            result = np.isin(dataset['state'], [STATE_CODES[State[value]] for value in self.values])
+        elif self.field == 'repository':
+            result = np.isin(np.array(dataset.text('repository'), dtype=object), self.values)
+        elif self.field in ('author', 'user', 'assignee'):
+            ids = [dataset.users.lookup(value) for value in self.values]
+            ids = [i for i in ids if i >= 0]
+            if self.field == 'assignee':
+                result = _any_child(dataset['assignee_offsets'], np.isin(dataset['assignee_ids'], ids))
+            else:
+                result = np.isin(dataset['creator'], ids)
+                if self.field == 'user':
+                    result |= _any_child(dataset['event_offsets'], np.isin(dataset['event_author'], ids))
+        else:
+            column = {'number': 'number', 'created': 'created_date', 'updated': 'updated_date'}[self.field]
+            values = dataset[column]
+            result = np.ones(len(values), dtype=bool) if self.field == 'number' else ~np.isnat(values)
+            bounds = [self.start, self.end] if self.field == 'number' else \
+                [None if bound is None else np.datetime64(bound.replace(tzinfo=None), 'us')
+                 for bound in (self.start, self.end)]
+            if bounds[0] is not None:
+                result &= values >= bounds[0]
+            if bounds[1] is not None:
+                result &= values < bounds[1]
+        return ~result if self.negated else result
+
+
+class IssueFilter:
+    """
+    A parsed filter expression: the conjunction of its terms.
+    """
+
+    def __init__(self, expression:str='', terms:List[FilterTerm]=None):
+        """
+        Constructor
+        """
+        self.expression:str = expression
+        self.terms:List[FilterTerm] = terms or []
+
+    def __bool__(self):
+        return len(self.terms) > 0
+
+    def matches(self, issue:Issue) -> bool:
+        return all(term.matches(issue) for term in self.terms)
+
+    def apply(self, issues:List[Issue]) -> List[Issue]:
+        return [issue for issue in issues if self.matches(issue)] if self.terms else issues
+
+    def to_sql(self) -> Tuple[str, List]:
+        """
+        Returns a WHERE clause over the issues table of the SQLite store and its parameters.
+        """
+        clauses = ['1 = 1']
+        params = []
+        for term in self.terms:
+            clause, term_params = term.to_sql()
+            clauses.append(clause)
+            params += term_params
+        return ' AND '.join(clauses), params
+
+    def mask(self, dataset:ColumnarIssues) -> np.ndarray:
+        """
+        Returns a boolean mask of the rows of the columnar dataset that
+        match. Only the columns that the terms refer to are read; the
+        label terms are combined on the bitmaps of the label index.
+        """
+        result = np.ones(len(dataset), dtype=bool)
+        label_terms = [term for term in self.terms if term.field in LABEL_FIELDS]
+        if label_terms:
+            index = label_index(dataset)
+            result &= index.to_mask(np.bitwise_and.reduce([term.bitmap(index) for term in label_terms]))
+        for term in self.terms:
+            if term.field not in LABEL_FIELDS:
+                result &= term.mask(dataset)
+        return result
+
+    def created_range(self) -> Tuple[datetime, datetime]:
+        """
+        The range [start, end) of creation dates that matching issues must
+        fall in (either bound may be None), used to prune partitions.
+        """
+        start = end = None
+        for term in self.terms:
+            if term.field == 'created' and not term.negated:
+                if term.start is not None:
+                    start = term.start if start is None else max(start, term.start)
+                if term.end is not None:
+                    end = term.end if end is None else min(end, term.end)
+        return start, end
+
+    def apply_columns(self, dataset:ColumnarIssues) -> ColumnarIssues:
+        if not self.terms:
+            return dataset
+        return dataset.take(np.flatnonzero(self.mask(dataset)))
+
+
+def parse_filter(expression:str) -> IssueFilter:
+    """
+    Parses a filter expression (see the module documentation).
+    Raises a FilterError if the expression is invalid.
+    """
+    if not expression:
+        return IssueFilter()
+    try:
+        tokens = shlex.split(expression)
+    except ValueError as e:
+        raise FilterError(f"Invalid filter expression '{expression}': {e}")
+    return IssueFilter(expression, [FilterTerm.parse(token) for token in tokens])
@@ -0,0 +1,176 @@
+"""
+JSON parsers that the exports can be read with. orjson, simdjson and
+ujson are used when they are installed, and the standard library json
+module otherwise. ENPM611_PROJECT_JSON_BACKEND selects a parser by name;
+'auto' (the default) picks the first installed one of BACKENDS.
+
+Only the 'json' backend can parse a document while it is being read
+(see load_stream); the other parsers need the whole document in memory.
+"""
+
+import codecs
+import json
+import logging
+import re
+from typing import IO, Callable, Dict, Iterator, List
+
+import config as config
+
+logger = logging.getLogger(__name__)
+
+
+def _orjson() -> Callable:
+    import orjson
+    return orjson.loads
+
+
+def _simdjson() -> Callable:
+    import simdjson
+    return simdjson.loads
+
+
+def _ujson() -> Callable:
+    import ujson
+    return ujson.loads
+
+
+def _json() -> Callable:
+    return json.loads
+
+
+# Backend name -> function importing the parser and returning its loads
+# function (which accepts UTF-8 bytes), in order of preference
+BACKENDS:Dict[str, Callable[[], Callable]] = {
+    'orjson': _orjson,
+    'simdjson': _simdjson,
+    'ujson': _ujson,
+    'json': _json,
+}
+
+# Backend name -> loads function, or None if the parser is not installed
+_LOADS:Dict[str, Callable] = {}
+
+# Number of bytes read from a stream at a time by iter_array
+CHUNK_SIZE = 1 << 20
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _get_loads(name:str) -> Callable:
+    if name not in _LOADS:
+        try:
+            _LOADS[name] = BACKENDS[name]()
+        except ImportError:
+            _LOADS[name] = None
+    return _LOADS[name]
+
+
+def available_backends() -> List[str]:
+    """
+    Names of the backends whose parser is installed, in order of preference.
+    """
+    return [name for name in BACKENDS if _get_loads(name) is not None]
+
+
+def get_backend(name:str=None) -> str:
+    """
+    Resolves a backend name (by default ENPM611_PROJECT_JSON_BACKEND) to an
+    installed backend. A backend that is not installed falls back to 'json'.
+    Raises a ValueError for unknown names.
+    """
+    if name is None:
+        name = config.get_parameter('ENPM611_PROJECT_JSON_BACKEND') or 'auto'
+    if name == 'auto':
+        return available_backends()[0]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{name}', expected 'auto' or one of {', '.join(BACKENDS)}")
+    if _get_loads(name) is None:
+        logger.warning(f"JSON backend '{name}' is not installed, falling back to 'json'")
+        return 'json'
+    return name
+
+
+def loads(data:bytes, backend:str=None):
+    """
+    Parses a JSON document (UTF-8 bytes) with the backend.
+    """
+    return _get_loads(get_backend(backend))(data)
+
+
+def iter_array(fin:IO[bytes], chunk_size:int=CHUNK_SIZE) -> Iterator:
+    """
+    Yields the elements of the top-level JSON array of a binary stream
+    (UTF-8) one at a time, parsing each element as soon as it has been
+    read. Only the current chunk and the element being parsed are held
+    as text. Raises a ValueError if the document is not a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer, position, eof = '', 0, False
+
+    def more():
+        # Appends the next chunk to the unparsed rest of the buffer
+        nonlocal buffer, position, eof
+        chunk = fin.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + utf8.decode(chunk, final=eof)
+        position = 0
+        return not eof
+
+    def peek():
+        # Skips whitespace and returns the next character ('' at the end)
+        nonlocal position
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position < len(buffer) or not more():
+                return buffer[position:position + 1]
+
+    def close():
+        # Only whitespace may follow the end of the array
+        nonlocal position
+        position += 1
+        if peek():
+            raise ValueError('Extra data after the JSON array')
+
+    if peek() != '[':
+        raise ValueError('Expected a JSON array')
+    position += 1
+    if peek() == ']':
+        close()
+        return
+    while True:
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if more():
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next chunk,
+            # so an element is only complete once its separator has been read
+            after = _WHITESPACE.match(buffer, end).end()
+            if buffer[after:after + 1] in (',', ']') or eof or not more():
+                break
+        position = end
+        yield element
+        separator = peek()
+        if separator == ']':
+            close()
+            return
+        if separator != ',':
+            raise ValueError(f"Expected ',' or ']' after an element of the JSON array, found {separator!r}")
+        position += 1
+        peek()
+
+
+def load_stream(fin:IO[bytes], backend:str=None) -> List:
+    """
+    Parses a JSON array from a binary stream (e.g., a decompressing file
+    object). With the 'json' backend, the elements are parsed while the
+    stream is read, without holding the whole document in memory; the
+    other backends only parse complete documents, so the stream is read
+    to its end first.
+    """
+    backend = get_backend(backend)
+    if backend == 'json':
+        return list(iter_array(fin))
+    return loads(fin.read(), backend)
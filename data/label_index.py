@@ -0,0 +1,158 @@
+"""
+Bitmap index of the labels of the issues.
+
+For each label, the index holds a bitmap with one bit per row of the
+dataset, set if the issue carries the label. The bitmaps are NumPy
+arrays packed eight rows per byte (np.packbits order), so a query over
+label sets such as 'kind/bug AND area/installer AND NOT status/duplicate'
+is answered with bitwise operations on the bitmaps instead of a scan of
+the labels of every issue. Like the search index, the index is saved
+next to the issue cache and memory-mapped when it is loaded; for other
+datasets it is built on first use and kept with the dataset.
+"""
+
+import json
+import os
+from typing import List
+
+import numpy as np
+
+from data.columnar import ColumnarIssues
+
+_META_FILE = 'labels.json'
+_BITMAPS_FILE = 'bitmaps.npy'
+# Number of set bits of each byte value (np.bitwise_count needs NumPy 2)
+_BIT_COUNTS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+class LabelIndex:
+    """
+    Packed bitmaps of the rows carrying each label. The bitmap of the
+    label with id i of the dataset's label vocabulary is bitmaps[i].
+    """
+
+    def __init__(self, labels:List[str], bitmaps:np.ndarray, num_rows:int):
+        """
+        Constructor
+        """
+        self.labels:List[str] = labels
+        self.label_ids = {label: label_id for label_id, label in enumerate(labels)}
+        self.bitmaps:np.ndarray = bitmaps
+        self.num_rows:int = num_rows
+
+    def __len__(self):
+        """
+        Number of indexed rows.
+        """
+        return self.num_rows
+
+    @staticmethod
+    def build(dataset:ColumnarIssues) -> 'LabelIndex':
+        """
+        Sets the bit of each row in the bitmaps of its labels.
+        """
+        num_rows = len(dataset)
+        num_bytes = (num_rows + 7) // 8
+        label_offsets = dataset['label_offsets']
+        rows = np.repeat(np.arange(num_rows, dtype=np.int64), np.diff(label_offsets))
+        label_ids = np.asarray(dataset['label_ids'], dtype=np.int64)
+        # Read after the ids, which may add labels to the vocabulary
+        labels = list(dataset.labels.values)
+        known = label_ids >= 0
+        label_ids, rows = label_ids[known], rows[known]
+        # Repeated labels of an issue set the same bit again
+        bitmaps = np.zeros(len(labels) * num_bytes, dtype=np.uint8)
+        bits = np.left_shift(1, 7 - (rows & 7)).astype(np.uint8)
+        np.bitwise_or.at(bitmaps, label_ids * num_bytes + (rows >> 3), bits)
+        return LabelIndex(labels, bitmaps.reshape(len(labels), num_bytes), num_rows)
+
+    def empty(self) -> np.ndarray:
+        return np.zeros((self.num_rows + 7) // 8, dtype=np.uint8)
+
+    def bitmap(self, label:str) -> np.ndarray:
+        """
+        The bitmap of the rows carrying the label (no rows for unknown labels).
+        """
+        label_id = self.label_ids.get(label)
+        return self.empty() if label_id is None else np.asarray(self.bitmaps[label_id])
+
+    def any_of(self, labels:List[str]) -> np.ndarray:
+        """
+        The bitmap of the rows carrying any of the labels.
+        """
+        ids = [self.label_ids[label] for label in labels if label in self.label_ids]
+        return np.bitwise_or.reduce(self.bitmaps[ids], axis=0) if ids else self.empty()
+
+    def all_of(self, labels:List[str]) -> np.ndarray:
+        """
+        The bitmap of the rows carrying all of the labels.
+        """
+        if not labels:
+            return self.invert(self.empty())
+        if any(label not in self.label_ids for label in labels):
+            return self.empty()
+        return np.bitwise_and.reduce(self.bitmaps[[self.label_ids[label] for label in labels]], axis=0)
+
+    def invert(self, bitmap:np.ndarray) -> np.ndarray:
+        """
+        The bitmap of the rows not in the bitmap (without the padding bits
+        after the last row).
+        """
+        result = np.invert(bitmap)
+        if self.num_rows % 8:
+            result[-1] &= np.uint8(0xFF << (8 - self.num_rows % 8) & 0xFF)
+        return result
+
+    def to_mask(self, bitmap:np.ndarray) -> np.ndarray:
+        """
+        The boolean mask of the rows in the bitmap.
+        """
+        return np.unpackbits(bitmap, count=self.num_rows).astype(bool)
+
+    @staticmethod
+    def count(bitmap:np.ndarray) -> int:
+        """
+        Number of rows in the bitmap.
+        """
+        return int(_BIT_COUNTS[np.asarray(bitmap)].sum())
+
+    def save(self, path:str, version:str):
+        """
+        Writes the index to a directory, recording the version of the
+        dataset it was built from. The metadata is written last.
+        """
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, _META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        bitmaps_path = os.path.join(path, _BITMAPS_FILE)
+        with open(bitmaps_path + '.tmp', 'wb') as fout:
+            np.save(fout, self.bitmaps)
+        os.replace(bitmaps_path + '.tmp', bitmaps_path)
+        with open(meta_path, 'w') as fout:
+            json.dump({'version': version, 'labels': self.labels, 'rows': self.num_rows}, fout)
+
+    @staticmethod
+    def load(path:str, version:str, mmap:bool=True) -> 'LabelIndex':
+        """
+        Reads an index from a directory if it was built from the given
+        version of the dataset, returns None otherwise.
+        """
+        try:
+            with open(os.path.join(path, _META_FILE), 'r') as fin:
+                meta = json.load(fin)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') is None or meta.get('version') != version:
+            return None
+        bitmaps = np.load(os.path.join(path, _BITMAPS_FILE), mmap_mode='r' if mmap else None)
+        return LabelIndex(meta['labels'], bitmaps, meta['rows'])
+
+
+def label_index(dataset:ColumnarIssues) -> LabelIndex:
+    """
+    The label index of the dataset, built on first use and kept with the dataset.
+    """
+    if dataset.label_index is None:
+        dataset.label_index = LabelIndex.build(dataset)
+    return dataset.label_index
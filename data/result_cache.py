@@ -0,0 +1,211 @@
+"""
+Cache of the results that the analyses compute from the issues (counts,
+tables, clusters; not their charts), so that repeating a query returns
+them without loading the issues again.
+
+A result is stored in a file named by the hash of its key: the version
+of the export it was computed from (see issue_cache.source_signature),
+the name of the analysis, the version of its code (a hash of the source
+of its module and of the packages it computes the results with, see
+CODE_PACKAGES) and its parameters (e.g., user, label, filter). A change
+to any of them leads to a new entry, so entries are never invalidated;
+instead, the least recently used entries are evicted once the cache
+exceeds its size. The modification time of an entry records its last use.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+_SUFFIX = '.pkl'
+# Packages (relative to the root of the application) whose code the results
+# are computed with: the analyses and their helpers (map-reduce, sketches),
+# the data loading, filtering and storage, and the issue model. A change to
+# any of their modules changes the code version of every result.
+CODE_PACKAGES = ['analysis', 'data', 'models']
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Code version of each module, and hash of the packages, computed once per run
+_CODE_VERSIONS:Dict[str, str] = {}
+_PACKAGES_VERSION:List[str] = []
+
+
+def packages_version() -> str:
+    """
+    Hash of the paths and sources of the modules of the CODE_PACKAGES.
+    """
+    if not _PACKAGES_VERSION:
+        digest = hashlib.sha256()
+        for package in CODE_PACKAGES:
+            for directory, subdirectories, files in os.walk(os.path.join(_ROOT, package)):
+                subdirectories[:] = sorted(name for name in subdirectories if name != '__pycache__')
+                for name in sorted(files):
+                    if name.endswith('.py'):
+                        path = os.path.join(directory, name)
+                        digest.update(os.path.relpath(path, _ROOT).encode('utf-8'))
+                        with open(path, 'rb') as fin:
+                            digest.update(hashlib.sha256(fin.read()).digest())
+        _PACKAGES_VERSION.append(digest.hexdigest())
+    return _PACKAGES_VERSION[0]
+
+
+def code_version(module_name:str) -> str:
+    """
+    Hash of the source file of a (loaded) module, or of its name if it
+    has no source file, together with the sources of the CODE_PACKAGES
+    (see packages_version).
+    """
+    if module_name not in _CODE_VERSIONS:
+        path = getattr(sys.modules.get(module_name), '__file__', None)
+        digest = hashlib.sha256(module_name.encode('utf-8'))
+        if path:
+            with open(path, 'rb') as fin:
+                digest.update(fin.read())
+        digest.update(packages_version().encode('utf-8'))
+        _CODE_VERSIONS[module_name] = digest.hexdigest()
+    return _CODE_VERSIONS[module_name]
+
+
+def result_key(fingerprint:str, analysis:str, code:str, params:Dict) -> str:
+    """
+    Key of the result of an analysis: a hash of the version of the dataset,
+    the name and code version of the analysis and its parameters.
+    """
+    key = json.dumps([fingerprint, analysis, code, params], sort_keys=True, default=str)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Directory of pickled results (or of files written by the caller, see
+    store), bounded to max_bytes by evicting the least recently used entries.
+    """
+
+    def __init__(self, path:str, max_bytes:int, clock:Callable[[], int]=time.time_ns, suffix:str=_SUFFIX):
+        """
+        Constructor
+        """
+        self.path:str = path
+        self.max_bytes:int = max_bytes
+        # Clock (in nanoseconds) recording when entries are used
+        self.clock:Callable[[], int] = clock
+        # Extension of the entry files
+        self.suffix:str = suffix
+
+    def _entry_path(self, key:str) -> str:
+        return os.path.join(self.path, key + self.suffix)
+
+    def _touch(self, path:str):
+        now = self.clock()
+        os.utime(path, ns=(now, now))
+
+    def get(self, key:str) -> Tuple[bool, object]:
+        """
+        Returns whether the result is cached, and the result. Unreadable
+        entries (e.g., of another version of a class) count as missing.
+        """
+        path = self.lookup(key)
+        if path is None:
+            return False, None
+        try:
+            with open(path, 'rb') as fin:
+                return True, pickle.load(fin)
+        except FileNotFoundError:
+            return False, None
+        except Exception:
+            self._remove(path)
+            return False, None
+
+    def put(self, key:str, value):
+        """
+        Stores a result, then evicts the least recently used entries until
+        the cache fits its size. Results larger than the cache are not stored.
+        """
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as fout:
+                fout.write(data)
+        self.store(key, write)
+
+    def lookup(self, key:str) -> str:
+        """
+        Returns the path of the entry, marking it as used, or None if it is not cached.
+        """
+        path = self._entry_path(key)
+        try:
+            self._touch(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def store(self, key:str, write:Callable[[str], None]) -> str:
+        """
+        Stores an entry written by write(temporary path), then evicts the
+        least recently used entries until the cache fits its size.
+        Returns the path of the entry, or None if it was evicted right away.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        path = self._entry_path(key)
+        write(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        self._touch(path)
+        self.evict()
+        return path if os.path.exists(path) else None
+
+    def entries(self) -> List[Tuple[str, int, int]]:
+        """
+        The path, size and time of last use of each entry, least recently used first.
+        """
+        if not os.path.isdir(self.path):
+            return []
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith(self.suffix):
+                path = os.path.join(self.path, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime_ns))
+        return sorted(entries, key=lambda entry: (entry[2], entry[0]))
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> int:
+        """
+        Removes the least recently used entries until the cache fits its
+        size. Returns the number of removed entries.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        """
+        Removes all entries. Returns the number of removed entries.
+        """
+        entries = self.entries()
+        for path, _, _ in entries:
+            self._remove(path)
+        return len(entries)
+
+    @staticmethod
+    def _remove(path:str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
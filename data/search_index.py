@@ -0,0 +1,271 @@
+"""
+Full-text search over the titles, bodies and comments of the issues.
+
+The inverted index maps each term (lowercased word) to its posting list:
+the rows of the dataset containing the term, the number of occurrences
+in each row and their positions. Like the columnar dataset, the posting
+lists are flattened into NumPy arrays with offsets, so the index is
+saved as .npy files next to the issue cache and memory-mapped when it
+is loaded.
+
+A query is a list of words and quoted phrases, all of which must occur
+in an issue, e.g. 'lock "dependency resolver"'. Words of a phrase must
+occur next to each other in the title, the body or one comment. Matching
+issues are ranked by BM25.
+"""
+
+import json
+import math
+import os
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from data.columnar import ColumnarIssues
+
+_META_FILE = 'search.json'
+_ARRAYS = ['term_offsets', 'posting_rows', 'posting_counts', 'position_offsets', 'positions', 'lengths']
+_TOKEN = re.compile(r'\w+')
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+# Gap between the positions of the title, body and comments of an issue,
+# so that phrases do not match across them
+_FIELD_GAP = 1
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+
+def tokenize(text:str) -> List[str]:
+    """
+    Splits a text into lowercased words.
+    """
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def parse_query(query:str) -> List[List[str]]:
+    """
+    Splits a query into its clauses: the terms of a single word or of a
+    quoted phrase.
+    """
+    clauses = []
+    for phrase, word in _QUERY_PART.findall(query or ''):
+        terms = tokenize(phrase if phrase else word)
+        if terms:
+            clauses.append(terms)
+    return clauses
+
+
+def _intersect_sorted(first:np.ndarray, second:np.ndarray) -> np.ndarray:
+    """
+    Values of the sorted array first that are also in the sorted array second.
+    """
+    if len(second) == 0:
+        return second
+    found = np.minimum(np.searchsorted(second, first), len(second) - 1)
+    return first[second[found] == first]
+
+
+class SearchIndex:
+    """
+    Inverted index over the rows of a columnar dataset. The postings of
+    term t are [term_offsets[t]:term_offsets[t+1]] and the positions of
+    posting p are [position_offsets[p]:position_offsets[p+1]].
+    """
+
+    def __init__(self, terms:List[str], arrays:Dict[str, np.ndarray]):
+        """
+        Constructor
+        """
+        self.terms:List[str] = terms
+        self.term_ids:Dict[str, int] = {term: term_id for term_id, term in enumerate(terms)}
+        self.arrays:Dict[str, np.ndarray] = arrays
+        lengths = np.asarray(arrays['lengths'])
+        average_length = float(lengths.mean()) if len(lengths) and lengths.any() else 1.0
+        # Length normalization of the term frequencies of each row (BM25)
+        self.norms:np.ndarray = _K1 * (1 - _B + _B * lengths / average_length)
+        # Largest position of any term, read when the first phrase is searched
+        self._max_position:int = None
+
+    def __len__(self):
+        """
+        Number of indexed rows.
+        """
+        return len(self.arrays['lengths'])
+
+    @staticmethod
+    def build(dataset:ColumnarIssues) -> 'SearchIndex':
+        """
+        Indexes the title, body and comments of every row of the dataset.
+        """
+        term_ids:Dict[str, int] = {}
+        token_terms:List[int] = []
+        token_rows:List[int] = []
+        token_positions:List[int] = []
+        lengths = np.zeros(len(dataset), dtype=np.int32)
+        comments = dataset.text('event_comment')
+        event_offsets = dataset['event_offsets'].tolist()
+        for row, (title, text) in enumerate(zip(dataset.text('title'), dataset.text('text'))):
+            position = 0
+            for field in [title, text] + comments[event_offsets[row]:event_offsets[row + 1]]:
+                tokens = tokenize(field)
+                if not tokens:
+                    continue
+                token_terms.extend(term_ids.setdefault(token, len(term_ids)) for token in tokens)
+                token_rows.extend([row] * len(tokens))
+                token_positions.extend(range(position, position + len(tokens)))
+                position += len(tokens) + _FIELD_GAP
+                lengths[row] += len(tokens)
+
+        terms = np.array(token_terms, dtype=np.int64)
+        rows = np.array(token_rows, dtype=np.int64)
+        positions = np.array(token_positions, dtype=np.int32)
+        order = np.lexsort((positions, rows, terms))
+        terms, rows, positions = terms[order], rows[order], positions[order]
+        # A posting starts wherever the term or the row changes
+        starts = np.flatnonzero(np.r_[True, (terms[1:] != terms[:-1]) | (rows[1:] != rows[:-1])]) \
+            if len(terms) else np.zeros(0, dtype=np.int64)
+        position_offsets = np.r_[starts, len(terms)].astype(np.int64)
+        arrays = {
+            'term_offsets': np.searchsorted(terms[starts], np.arange(len(term_ids) + 1)).astype(np.int64),
+            'posting_rows': rows[starts].astype(np.int32),
+            'posting_counts': np.diff(position_offsets).astype(np.int32),
+            'position_offsets': position_offsets,
+            'positions': positions,
+            'lengths': lengths,
+        }
+        return SearchIndex(list(term_ids), arrays)
+
+    def _postings(self, term:str) -> Tuple[int, int]:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return 0, 0
+        offsets = self.arrays['term_offsets']
+        return int(offsets[term_id]), int(offsets[term_id + 1])
+
+    def _phrase_rows(self, terms:List[str], rows:np.ndarray) -> np.ndarray:
+        """
+        The rows (among rows, which contain all terms) where the terms occur consecutively.
+        """
+        posting_rows = self.arrays['posting_rows']
+        position_offsets = self.arrays['position_offsets']
+        positions = self.arrays['positions']
+        if self._max_position is None:
+            self._max_position = int(positions.max()) if len(positions) else 0
+        # Candidate phrase starts are encoded as (index of the row) * stride + position,
+        # which keeps them sorted
+        stride = np.int64(self._max_position + len(terms) + 1)
+        # Indices of the rows that can still hold the phrase
+        alive = np.arange(len(rows), dtype=np.int64)
+        starts = None
+        # The rarest terms first, as they rule out the most rows
+        frequencies = [end - start for start, end in map(self._postings, terms)]
+        for offset in sorted(range(len(terms)), key=frequencies.__getitem__):
+            start, end = self._postings(terms[offset])
+            postings = start + np.searchsorted(posting_rows[start:end], rows[alive])
+            # Positions of the term in each of the rows, shifted back to where the phrase would start
+            first = position_offsets[postings]
+            counts = position_offsets[postings + 1] - first
+            bounds = np.zeros(len(alive) + 1, dtype=np.int64)
+            np.cumsum(counts, out=bounds[1:])
+            indices = np.repeat(first - bounds[:-1], counts) + np.arange(bounds[-1], dtype=np.int64)
+            keys = np.repeat(alive, counts) * stride + positions[indices] - offset
+            starts = keys if starts is None else _intersect_sorted(starts, keys)
+            alive = starts // stride
+            alive = alive[np.r_[True, alive[1:] != alive[:-1]]] if len(alive) else alive
+            if len(alive) == 0:
+                break
+        return rows[alive]
+
+    def search(self, query:str, mask:np.ndarray=None, limit:int=None) -> List[Tuple[int, float]]:
+        """
+        Returns the rows matching the query (restricted to the rows where
+        mask is True, if given) with their BM25 score, best first.
+        """
+        clauses = parse_query(query)
+        if not clauses:
+            return []
+        num_rows = len(self)
+        posting_rows = self.arrays['posting_rows']
+        posting_counts = self.arrays['posting_counts']
+        norms = self.norms
+        scores = np.zeros(num_rows)
+        matched = np.ones(num_rows, dtype=bool) if mask is None else np.asarray(mask, dtype=bool).copy()
+        for terms in clauses:
+            clause_rows = np.zeros(num_rows, dtype=bool)
+            for i, term in enumerate(terms):
+                start, end = self._postings(term)
+                rows = posting_rows[start:end]
+                counts = posting_counts[start:end]
+                idf = math.log(1 + (num_rows - len(rows) + 0.5) / (len(rows) + 0.5))
+                scores[rows] += idf * counts * (_K1 + 1) / (counts + norms[rows])
+                term_rows = np.zeros(num_rows, dtype=bool)
+                term_rows[rows] = True
+                clause_rows = term_rows if i == 0 else clause_rows & term_rows
+            matched &= clause_rows
+            if len(terms) > 1:
+                candidates = np.flatnonzero(matched)
+                matched[:] = False
+                matched[self._phrase_rows(terms, candidates)] = True
+        rows = np.flatnonzero(matched)
+        if limit is not None and limit < len(rows):
+            # Only the best rows need to be sorted
+            rows = np.sort(rows[np.argpartition(-scores[rows], limit - 1)[:limit]])
+        # Best score first, ties in row order
+        rows = rows[np.argsort(-scores[rows], kind='stable')]
+        return [(int(row), float(scores[row])) for row in rows]
+
+    def save(self, path:str, version:str):
+        """
+        Writes the index to a directory, recording the version of the
+        dataset it was built from. The arrays of each version have their
+        own files (<array>.<version>.npy) and the metadata is replaced
+        last, so readers of the previous index keep reading its arrays.
+        The arrays of older versions are removed.
+        """
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, _META_FILE)
+        previous = _read_meta(path).get('version')
+        for name in _ARRAYS:
+            array_path = os.path.join(path, _array_file(name, version))
+            with open(array_path + '.tmp', 'wb') as fout:
+                np.save(fout, self.arrays[name])
+            os.replace(array_path + '.tmp', array_path)
+        with open(meta_path + '.tmp', 'w') as fout:
+            json.dump({'version': version, 'terms': self.terms}, fout)
+        os.replace(meta_path + '.tmp', meta_path)
+        for file in os.listdir(path):
+            if file.endswith('.npy') and file[:-len('.npy')].rsplit('.', 1)[-1] not in (version, previous):
+                try:
+                    os.remove(os.path.join(path, file))
+                except OSError:
+                    # Still mapped by a reader on a platform that does not allow removing it
+                    pass
+
+    @staticmethod
+    def load(path:str, version:str, mmap:bool=True) -> 'SearchIndex':
+        """
+        Opens the index saved in a directory if it was built from the given
+        version of the dataset, returns None otherwise.
+        """
+        meta = _read_meta(path)
+        if meta.get('version') is None or meta.get('version') != version:
+            return None
+        try:
+            arrays = {name: np.load(os.path.join(path, _array_file(name, version)), mmap_mode='r' if mmap else None)
+                      for name in _ARRAYS}
+        except FileNotFoundError:
+            return None
+        return SearchIndex(meta['terms'], arrays)
+
+
+def _array_file(name:str, version:str) -> str:
+    return f'{name}.{version}.npy'
+
+
+def _read_meta(path:str) -> Dict:
+    try:
+        with open(os.path.join(path, _META_FILE), 'r') as fin:
+            return json.load(fin)
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,120 @@
+"""
+Places the columns of the issue dataset in shared memory, so that worker
+processes can attach to the same buffers instead of receiving a pickled
+copy of the data.
+
+The process that creates the shared memory owns it: the blocks are
+released when SharedColumns is closed (or used as a context manager),
+when the object is garbage collected and at interpreter exit. If the
+owning process crashes, the resource tracker of the multiprocessing
+module releases the blocks. Workers started through multiprocessing
+share that resource tracker, so attaching does not transfer ownership.
+"""
+
+import weakref
+from multiprocessing import shared_memory
+from typing import Dict, List
+
+import numpy as np
+
+from data.columnar import ColumnarIssues, Vocabulary
+
+# Datasets attached in the current (worker) process, by handle token
+_ATTACHED:Dict[str, ColumnarIssues] = {}
+
+
+def _release(blocks:List[shared_memory.SharedMemory]):
+    for block in blocks:
+        try:
+            block.close()
+            block.unlink()
+        except FileNotFoundError:
+            pass
+    blocks.clear()
+
+
+class SharedColumnsHandle:
+    """
+    Small, picklable description of the shared memory blocks that a
+    worker process needs to attach to the dataset.
+    """
+
+    def __init__(self, token:str, layout:Dict[str, tuple], users:List[str],
+                 labels:List[str], event_types:List[str]):
+        """
+        Constructor
+        """
+        self.token:str = token
+        # Column name -> (block name, dtype, shape)
+        self.layout:Dict[str, tuple] = layout
+        self.users:List[str] = users
+        self.labels:List[str] = labels
+        self.event_types:List[str] = event_types
+
+
+class SharedColumns:
+    """
+    Copies the columns of a dataset into shared memory blocks owned
+    by the current process.
+    """
+
+    def __init__(self, dataset:ColumnarIssues):
+        """
+        Constructor
+        """
+        self._blocks:List[shared_memory.SharedMemory] = []
+        layout = {}
+        try:
+            for name, values in dataset.columns.items():
+                values = np.ascontiguousarray(values)
+                block = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+                self._blocks.append(block)
+                np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[...] = values
+                layout[name] = (block.name, values.dtype.str, values.shape)
+        except:
+            _release(self._blocks)
+            raise
+        token = self._blocks[0].name if self._blocks else ''
+        self.handle:SharedColumnsHandle = SharedColumnsHandle(
+            token, layout, dataset.users.values, dataset.labels.values, dataset.event_types.values)
+        # Release the blocks when this object goes away or the interpreter exits
+        # (finalizers still alive at exit are called by the weakref module;
+        # a closed one is dropped from its registry, so none accumulate)
+        self._finalizer = weakref.finalize(self, _release, self._blocks)
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(handle:SharedColumnsHandle) -> ColumnarIssues:
+    """
+    Returns a dataset whose columns are views on the shared memory blocks.
+    Attaching is cached per process, so a worker only maps the blocks once.
+    """
+    dataset = _ATTACHED.get(handle.token)
+    if dataset is None:
+        blocks = []
+        columns = {}
+        for name, (block_name, dtype, shape) in handle.layout.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            columns[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        dataset = ColumnarIssues(columns, Vocabulary(handle.users), Vocabulary(handle.labels),
+                                 Vocabulary(handle.event_types))
+        # Keep the blocks open as long as the views are in use
+        dataset.shared_blocks = blocks
+        _ATTACHED[handle.token] = dataset
+    return dataset
+
+
+def get_attached(token:str) -> ColumnarIssues:
+    """
+    Returns a dataset previously attached in the current process.
+    """
+    return _ATTACHED[token]
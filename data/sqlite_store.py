@@ -0,0 +1,215 @@
+"""
+SQLite-backed storage for the issues. The JSON export is imported once
+into a local database so that analyses can push simple filters (such as
+--user or --label) down into indexed SQL queries instead of scanning
+every issue in Python. Filter expressions (--filter) are translated
+into the same kind of queries.
+"""
+
+import sqlite3
+from typing import List, Dict, Tuple
+
+from dateutil import parser
+
+from data.export_file import load_exports
+from data.issue_cache import source_signature
+from data.issue_filter import IssueFilter
+from models.model import Issue, repository_of
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY,
+    number INTEGER,
+    url TEXT,
+    creator TEXT,
+    state TEXT,
+    title TEXT,
+    text TEXT,
+    created_date TEXT,
+    created_ts REAL,
+    updated_date TEXT,
+    updated_ts REAL,
+    timeline_url TEXT,
+    repository TEXT
+);
+CREATE TABLE IF NOT EXISTS labels (
+    issue_id INTEGER,
+    position INTEGER,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS assignees (
+    issue_id INTEGER,
+    position INTEGER,
+    assignee TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    issue_id INTEGER,
+    position INTEGER,
+    event_type TEXT,
+    author TEXT,
+    event_date TEXT,
+    event_ts REAL,
+    label TEXT,
+    comment TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_issues_number ON issues(number);
+CREATE INDEX IF NOT EXISTS idx_issues_repository ON issues(repository);
+CREATE INDEX IF NOT EXISTS idx_issues_creator ON issues(creator);
+CREATE INDEX IF NOT EXISTS idx_issues_created_ts ON issues(created_ts);
+CREATE INDEX IF NOT EXISTS idx_labels_label ON labels(label, issue_id);
+CREATE INDEX IF NOT EXISTS idx_labels_issue ON labels(issue_id);
+CREATE INDEX IF NOT EXISTS idx_assignees_issue ON assignees(issue_id);
+CREATE INDEX IF NOT EXISTS idx_events_issue ON events(issue_id);
+CREATE INDEX IF NOT EXISTS idx_events_author ON events(author, issue_id);
+CREATE INDEX IF NOT EXISTS idx_events_type ON events(event_type, event_ts);
+"""
+# Version of the schema above; databases with another version are rebuilt
+_SCHEMA_VERSION = 2
+
+
+def _to_timestamp(value):
+    """
+    Converts a date string from the export into a POSIX timestamp
+    so that date ranges can be answered with an index. Returns None
+    if the date is missing or cannot be parsed.
+    """
+    try:
+        return parser.parse(value).timestamp()
+    except:
+        return None
+
+
+class SQLiteIssueStore:
+    """
+    Stores the issues of a JSON export in a SQLite database and answers
+    filtered queries against it.
+    """
+
+    def __init__(self, db_path:str):
+        """
+        Constructor
+        """
+        self.db_path:str = db_path
+        self.connection = sqlite3.connect(db_path)
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            with self.connection:
+                for table in ('meta', 'issues', 'labels', 'assignees', 'events'):
+                    self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+        self.connection.executescript(_SCHEMA)
+        self.connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def is_current(self, source_path:str):
+        """
+        Whether the database already holds the given export.
+        """
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        return row is not None and row[0] == source_signature(source_path)
+
+    def ensure_imported(self, source_path:str):
+        """
+        Imports the export into the database unless it has already been
+        imported. Returns True if an import took place.
+        """
+        if self.is_current(source_path):
+            return False
+        self.import_json(load_exports(source_path))
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)",
+                                    (source_signature(source_path),))
+        return True
+
+    def import_json(self, jissues:List[Dict]):
+        """
+        Replaces the content of the database with the given issues (as they
+        appear in the JSON export).
+        """
+        issue_rows = []
+        label_rows = []
+        assignee_rows = []
+        event_rows = []
+        for issue_id, jissue in enumerate(jissues):
+            try:
+                number = int(jissue.get('number', '-1'))
+            except:
+                number = -1
+            issue_rows.append((issue_id, number, jissue.get('url'), jissue.get('creator'),
+                               jissue.get('state'), jissue.get('title'), jissue.get('text'),
+                               jissue.get('created_date'), _to_timestamp(jissue.get('created_date')),
+                               jissue.get('updated_date'), _to_timestamp(jissue.get('updated_date')),
+                               jissue.get('timeline_url'), repository_of(jissue)))
+            for position, label in enumerate(jissue.get('labels', [])):
+                label_rows.append((issue_id, position, label))
+            for position, assignee in enumerate(jissue.get('assignees', [])):
+                assignee_rows.append((issue_id, position, assignee))
+            for position, jevent in enumerate(jissue.get('events', [])):
+                event_rows.append((issue_id, position, jevent.get('event_type'), jevent.get('author'),
+                                   jevent.get('event_date'), _to_timestamp(jevent.get('event_date')),
+                                   jevent.get('label'), jevent.get('comment')))
+
+        with self.connection:
+            for table in ('issues', 'labels', 'assignees', 'events', 'meta'):
+                self.connection.execute(f"DELETE FROM {table}")
+            self.connection.executemany("INSERT INTO issues VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", issue_rows)
+            self.connection.executemany("INSERT INTO labels VALUES (?,?,?)", label_rows)
+            self.connection.executemany("INSERT INTO assignees VALUES (?,?,?)", assignee_rows)
+            self.connection.executemany("INSERT INTO events VALUES (?,?,?,?,?,?,?,?)", event_rows)
+
+    def _where(self, user:str=None, label:str=None, issue_filter:IssueFilter=None) -> Tuple[str, List]:
+        """
+        Builds the WHERE clause selecting the issues matching the filters.
+        A user matches an issue if they created it or authored one of its events.
+        """
+        clauses = ['1 = 1']
+        params = []
+        if issue_filter:
+            clause, params = issue_filter.to_sql()
+            clauses = [clause]
+        if user is not None:
+            clauses.append("(creator = ? OR id IN (SELECT issue_id FROM events WHERE author = ?))")
+            params += [user, user]
+        if label is not None:
+            clauses.append("id IN (SELECT issue_id FROM labels WHERE label = ?)")
+            params.append(label)
+        return ' AND '.join(clauses), params
+
+    def count_issues(self, user:str=None, label:str=None, issue_filter:IssueFilter=None) -> int:
+        where, params = self._where(user, label, issue_filter)
+        return self.connection.execute(f"SELECT COUNT(*) FROM issues WHERE {where}", params).fetchone()[0]
+
+    def query_issues(self, user:str=None, label:str=None, issue_filter:IssueFilter=None) -> List[Issue]:
+        """
+        Returns the issues matching the filters as model objects,
+        in the order in which they appear in the export.
+        """
+        where, params = self._where(user, label, issue_filter)
+        selected = f"SELECT id FROM issues WHERE {where}"
+
+        jissues:Dict[int, Dict] = {}
+        for row in self.connection.execute(
+                f"SELECT id, url, creator, state, title, text, number, created_date, updated_date, timeline_url, repository "
+                f"FROM issues WHERE {where} ORDER BY id", params):
+            jissues[row[0]] = {
+                'url': row[1], 'creator': row[2], 'state': row[3], 'title': row[4], 'text': row[5],
+                'number': row[6], 'created_date': row[7], 'updated_date': row[8], 'timeline_url': row[9],
+                'repository': row[10],
+                'labels': [], 'assignees': [], 'events': [],
+            }
+        for issue_id, label_name in self.connection.execute(
+                f"SELECT issue_id, label FROM labels WHERE issue_id IN ({selected}) ORDER BY issue_id, position", params):
+            jissues[issue_id]['labels'].append(label_name)
+        for issue_id, assignee in self.connection.execute(
+                f"SELECT issue_id, assignee FROM assignees WHERE issue_id IN ({selected}) ORDER BY issue_id, position", params):
+            jissues[issue_id]['assignees'].append(assignee)
+        for row in self.connection.execute(
+                f"SELECT issue_id, event_type, author, event_date, label, comment FROM events "
+                f"WHERE issue_id IN ({selected}) ORDER BY issue_id, position", params):
+            jissues[row[0]]['events'].append({'event_type': row[1], 'author': row[2], 'event_date': row[3],
+                                              'label': row[4], 'comment': row[5]})
+        return [Issue(jissue) for jissue in jissues.values()]
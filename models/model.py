@@ -3,12 +3,28 @@ Implements a runtime data model that can be used to access
 the properties contained in the issues JSON.
 """
 
+import re
 from typing import List, Dict, Set, Tuple
 from enum import Enum
 from datetime import datetime
 from dateutil import parser
 
 
+# Repository ('owner/name') in the URL of an issue on github.com or api.github.com
+_REPOSITORY_URL = re.compile(r'github\.com/(?:repos/)?([^/]+/[^/]+)/(?:issues|pull)/')
+
+
+def repository_of(jobj:any) -> str:
+    """
+    Returns the repository of an issue in the JSON export: its 'repository'
+    field, or else the repository in its URL (None if neither is known).
+    """
+    if jobj.get('repository'):
+        return jobj.get('repository')
+    match = _REPOSITORY_URL.search(jobj.get('url') or '')
+    return match.group(1) if match else None
+
+
 class State(str, Enum):
     """
     Whether issue is open or closed.
@@ -44,6 +60,7 @@ class Issue:
     
     def __init__(self, jobj:any=None):
         self.url:str = None
+        self.repository:str = None
         self.creator:str = None
         self.labels:List[str] = []
         self.state:State = None
@@ -61,6 +78,7 @@ class Issue:
     
     def from_json(self, jobj:any):
         self.url = jobj.get('url')
+        self.repository = repository_of(jobj)
         self.creator = jobj.get('creator')
         self.labels = jobj.get('labels',[])
         self.state = State[jobj.get('state')]
@@ -0,0 +1,94 @@
+"""
+Lightweight profiling of a run. The phases of a run (loading, ingesting,
+analyzing) are timed with `timed`, and notable events (e.g., partitions
+of the issue cache that were read or pruned) are counted with `count`.
+With --profile, run.py prints a summary of both at the end of the run.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+import config as config
+
+# Phase name -> durations of its calls (in seconds), in order of first call
+_TIMINGS:Dict[str, List[float]] = {}
+# Counter name -> value, in order of first increment
+_COUNTERS:Dict[str, int] = {}
+
+
+def is_enabled() -> bool:
+    """
+    Whether the summary is printed at the end of the run (--profile).
+    """
+    return config.get_parameter('profile') is True
+
+
+@contextmanager
+def timed(name:str):
+    """
+    Context manager recording the duration of a phase.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _TIMINGS.setdefault(name, []).append(time.perf_counter() - start)
+
+
+def count(name:str, amount:int=1):
+    _COUNTERS[name] = _COUNTERS.get(name, 0) + amount
+
+
+def get_timings() -> Dict[str, List[float]]:
+    return _TIMINGS
+
+
+def get_counters() -> Dict[str, int]:
+    return _COUNTERS
+
+
+def hit_rates() -> Dict[str, float]:
+    """
+    Hit rate of each cache counted with '<cache> hits' and '<cache> misses'.
+    """
+    rates = {}
+    for name, hits in _COUNTERS.items():
+        if name.endswith(' hits'):
+            cache = name[:-len(' hits')]
+            lookups = hits + _COUNTERS.get(cache + ' misses', 0)
+            rates[cache] = hits / lookups if lookups else 0.0
+    for name, misses in _COUNTERS.items():
+        cache = name[:-len(' misses')]
+        if name.endswith(' misses') and cache not in rates:
+            rates[cache] = 0.0
+    return rates
+
+
+def reset():
+    _TIMINGS.clear()
+    _COUNTERS.clear()
+
+
+def summary() -> str:
+    """
+    Formats the recorded timings and counters as a table.
+    """
+    lines = ['Profile:']
+    if _TIMINGS:
+        width = max(len(name) for name in _TIMINGS)
+        lines.append(f"  {'phase'.ljust(width)}  {'calls':>6}  {'total (s)':>10}")
+        for name, durations in _TIMINGS.items():
+            lines.append(f"  {name.ljust(width)}  {len(durations):>6}  {sum(durations):>10.3f}")
+    if _COUNTERS:
+        width = max(len(name) for name in _COUNTERS)
+        lines.append(f"  {'counter'.ljust(width)}  {'value':>6}")
+        for name, value in _COUNTERS.items():
+            lines.append(f"  {name.ljust(width)}  {value:>6}")
+    rates = hit_rates()
+    if rates:
+        width = max(len(name) for name in rates)
+        lines.append(f"  {'cache'.ljust(width)}  {'hit rate':>8}")
+        for name, rate in rates.items():
+            lines.append(f"  {name.ljust(width)}  {rate:>8.0%}")
+    return '\n'.join(lines)
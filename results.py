@@ -0,0 +1,211 @@
+"""
+Where the results of the analyses go. By default, charts are shown in a
+window (matplotlib) or in the browser (plotly). If an output directory is
+set (run.py sets ENPM611_PROJECT_OUTPUT_DIR, which defaults to 'output'
+in watch mode), each chart is written to a file in that directory instead
+(PNG or HTML, named after the chart), and run.py also writes the text
+output of the feature there.
+Files are replaced atomically, so that a viewer never sees a partially
+written file and each run overwrites the files of the previous one.
+
+Rendering a chart to a file takes much longer than building it. With
+the chart cache (run.py sets it to ENPM611_PROJECT_CHART_CACHE_PATH),
+rendered charts are stored under a hash of their content: the data
+series the analysis plotted (passed to show) with the figure size, the
+matplotlib version and the code version of the analysis module for its
+styling (see result_cache.code_version), or the JSON of a plotly figure. A chart whose content is unchanged is
+copied from the cache instead of being rendered again.
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import sys
+from contextlib import contextmanager
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import plotly
+
+import profiling
+from data.result_cache import ResultCache, code_version
+
+# Directory the results are written to, None to show them
+_OUTPUT_DIR:str = None
+# Cache of the rendered charts, None to render every chart
+_CHART_CACHE:ResultCache = None
+
+
+def set_output_dir(path:str):
+    global _OUTPUT_DIR
+    _OUTPUT_DIR = path
+    if path:
+        # Charts are only written to files, never shown in a window
+        plt.switch_backend('Agg')
+
+
+def get_output_dir() -> str:
+    return _OUTPUT_DIR
+
+
+def set_chart_cache(path:str, max_bytes:int=100 * 2**20):
+    """
+    Enables the chart cache in a directory (or disables it, if path is
+    None), evicting the least recently used charts beyond max_bytes.
+    """
+    global _CHART_CACHE
+    _CHART_CACHE = ResultCache(path, max_bytes, suffix='.chart') if path else None
+
+
+def _update(digest, part):
+    """
+    Adds a part of the content of a chart to the hash.
+    """
+    if isinstance(part, (pd.DataFrame, pd.Series)):
+        digest.update(pd.util.hash_pandas_object(part, index=True).values.tobytes())
+        names = list(part.columns) if isinstance(part, pd.DataFrame) else [part.name]
+        digest.update(repr((names, part.index.name)).encode('utf-8'))
+    elif isinstance(part, np.ndarray):
+        digest.update(repr((part.dtype.str, part.shape)).encode('utf-8'))
+        digest.update(np.ascontiguousarray(part).tobytes())
+    elif isinstance(part, (list, tuple)):
+        digest.update(b'[')
+        for item in part:
+            _update(digest, item)
+        digest.update(b']')
+    elif isinstance(part, dict):
+        digest.update(b'{')
+        for key, value in part.items():
+            _update(digest, key)
+            _update(digest, value)
+        digest.update(b'}')
+    else:
+        digest.update(repr(part).encode('utf-8') + b'\0')
+
+
+def chart_key(*parts) -> str:
+    """
+    Hash of the content of a chart (data series and styling parameters).
+    """
+    digest = hashlib.sha256()
+    _update(digest, list(parts))
+    return digest.hexdigest()
+
+
+def _render(path:str, key:str, write):
+    """
+    Writes a chart through write(temporary path), or copies it from the
+    chart cache if a chart with the same key was rendered before.
+    """
+    if _CHART_CACHE is None or key is None:
+        _replace(path, write)
+        return
+    cached = _CHART_CACHE.lookup(key)
+    if cached is not None:
+        try:
+            _replace(path, lambda tmp_path: shutil.copyfile(cached, tmp_path))
+            profiling.count('chart cache hits')
+            return
+        except FileNotFoundError:
+            # Evicted by a concurrent run
+            pass
+    profiling.count('chart cache misses')
+    cached = _CHART_CACHE.store(key, write)
+    if cached is not None:
+        _replace(path, lambda tmp_path: shutil.copyfile(cached, tmp_path))
+    else:
+        _replace(path, write)
+
+
+def _replace(path:str, write):
+    """
+    Writes a file through write(temporary path) and moves it into place.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write(path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def show(name:str, block:bool=True, data=None):
+    """
+    Shows the current matplotlib figure, or writes it to <name>.png in
+    the output directory. Passing the data series of the chart (anything
+    else that the chart depends on, besides the code of the calling
+    module) lets an unchanged chart be copied from the chart cache.
+    """
+    output_dir = get_output_dir()
+    if not output_dir:
+        if block:
+            plt.show()
+        else:
+            plt.show(block=False)
+        return
+    key = None
+    if data is not None:
+        figure = plt.gcf()
+        caller = sys._getframe(1).f_globals.get('__name__')
+        key = chart_key(name, 'png', data, figure.get_size_inches(), figure.dpi,
+                        matplotlib.__version__, code_version(caller))
+    path = os.path.join(output_dir, name + '.png')
+    _render(path, key, lambda tmp_path: plt.savefig(tmp_path, format='png', bbox_inches='tight'))
+    plt.close()
+
+
+def show_plotly(fig, name:str):
+    """
+    Shows a plotly figure, or writes it to <name>.html in the output directory.
+    """
+    output_dir = get_output_dir()
+    if not output_dir:
+        fig.show()
+        return
+    key = chart_key(name, 'html', fig.to_json(), plotly.__version__) if _CHART_CACHE is not None else None
+    _render(os.path.join(output_dir, name + '.html'), key, fig.write_html)
+
+
+class _Tee(io.TextIOBase):
+    """
+    Text stream writing to several streams.
+    """
+
+    def __init__(self, *streams):
+        """
+        Constructor
+        """
+        self.streams = streams
+
+    def write(self, text):
+        for stream in self.streams:
+            stream.write(text)
+        return len(text)
+
+    def flush(self):
+        for stream in self.streams:
+            stream.flush()
+
+
+@contextmanager
+def captured(name:str):
+    """
+    Context manager that, if the output directory is set, also writes
+    everything printed within it to <name>.txt in the output directory.
+    """
+    output_dir = get_output_dir()
+    if not output_dir:
+        yield
+        return
+    buffer = io.StringIO()
+    stdout = sys.stdout
+    sys.stdout = _Tee(stdout, buffer)
+    try:
+        yield
+    finally:
+        sys.stdout = stdout
+
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as fout:
+                fout.write(buffer.getvalue())
+        _replace(os.path.join(output_dir, name + '.txt'), write)
@@ -10,27 +10,38 @@ import argparse
 from analysis.reopened_issue_analysis import ReopenedIssueAnalysis
 from analysis.time_based_issue_analysis import TimeBasedIssueAnalysis
 import config as config
+import profiling
+import results
+import watch
 from analysis.example_analysis import ExampleAnalysis
 from analysis.event_analysis import EventAnalysis
 from analysis.issue_analysis import IssueAnalysis
 from analysis.user_specific_issue_analysis import UserSpecificIssueAnalysis
 from analysis.label_trend_analysis import LabelTrendAnalysis
 from analysis.event_label_categories_analysis import EventLabelCategoriesAnalysis
+from analysis.search_analysis import SearchAnalysis
+from analysis.duplicate_analysis import DuplicateAnalysis
+from analysis.timeline_analysis import TimelineAnalysis
+from analysis.first_response_analysis import FirstResponseAnalysis
+from analysis.label_cooccurrence_analysis import LabelCooccurrenceAnalysis
+from data.data_loader import DataLoader
+from data.issue_filter import FilterError, parse_filter
 
 def parse_args():
     """
     Parses the command line arguments that were provided along
     with the python command. The --feature flag must be provided as
     that determines what analysis to run. Optionally, you can pass in
-    a user and/or a label to run analysis focusing on specific issues.
+    a user and/or a label to run analysis focusing on specific issues,
+    or a filter expression to restrict every analysis to matching issues.
     
     You can also add more command line arguments following the pattern
     below.
     """
     ap = argparse.ArgumentParser("run.py")
     
-    # Required parameter specifying what analysis to run
-    ap.add_argument('--feature', '-f', type=int, required=True,
+    # Parameter specifying what analysis to run (required unless exporting tables)
+    ap.add_argument('--feature', '-f', type=int, required=False,
                     help='Which of the three features to run')
     
     # Optional parameter for analyses focusing on a specific user (i.e., contributor)
@@ -41,30 +52,114 @@ def parse_args():
     ap.add_argument('--label', '-l', type=str, required=False,
                     help='Optional parameter for analyses focusing on a specific label')
     
-    return ap.parse_args()
+    # Optional full-text query for the search feature
+    ap.add_argument('--query', '-q', type=str, required=False,
+                    help='Full-text query for the search feature, e.g. \'lock "dependency resolver"\'')
+    
+    # Optional flag to compute top-N lists and distinct counts with bounded-memory sketches
+    ap.add_argument('--approximate', action='store_true',
+                    help='Use approximate sketches for top-N lists and distinct counts')
+    
+    # Optional flag to print a summary of the time spent in each phase of the run
+    ap.add_argument('--profile', action='store_true',
+                    help='Print a timing summary at the end of the run')
+    
+    # Optional flag to run the feature again whenever the export changes
+    ap.add_argument('--watch', action='store_true',
+                    help='Re-run the feature whenever the data file changes, writing the results to files')
+    
+    # Optional flags to compute every result again instead of reusing the result cache, or to empty it first
+    ap.add_argument('--no-result-cache', action='store_true',
+                    help='Compute the results of the analysis without reading or writing the result cache')
+    ap.add_argument('--clear-result-cache', action='store_true',
+                    help='Remove all results from the result cache before running')
+    
+    # Optional filter expression selecting the issues to analyze
+    ap.add_argument('--filter', type=str, required=False,
+                    help='Optional filter expression, e.g. "label:kind/bug state:closed created:2023-01..2023-06 author:foo"')
+    
+    # Optional directory to export the (filtered) issues to as Parquet or Arrow tables
+    ap.add_argument('--export-tables', type=str, required=False,
+                    help='Export the issues, labels, assignees and events as tables to this directory')
+    ap.add_argument('--table-format', choices=['parquet', 'arrow'], default='parquet',
+                    help='Format of the exported tables (default: parquet)')
+    
+    args = ap.parse_args()
+    if args.feature is None and args.export_tables is None:
+        ap.error('the following arguments are required: --feature/-f')
+    try:
+        parse_filter(args.filter)
+    except FilterError as e:
+        ap.error(str(e))
+    return args
 
 
 
-# Parse feature to call from command line arguments
-args = parse_args()
-# Add arguments to config so that they can be accessed in other parts of the application
-config.overwrite_from_args(args)
-    
-# Run the feature specified in the --feature flag
-if args.feature == 0:
-    ExampleAnalysis().run()
-elif args.feature == 1:
-    IssueAnalysis().run()
-elif args.feature == 2:
-    TimeBasedIssueAnalysis().run()
-elif args.feature == 3:
-    ReopenedIssueAnalysis().run()   
-elif args.feature == 4:
-    UserSpecificIssueAnalysis().run()
-elif args.feature == 5:
-    LabelTrendAnalysis().run()
-elif args.feature == 6:
-    EventLabelCategoriesAnalysis().run()
-    
-else:
-    print('Need to specify which feature to run with --feature flag.')
+def run_feature(args):
+    """
+    Runs the feature specified in the --feature flag, writing its text
+    output to the output directory as well, if one is set.
+    """
+    with profiling.timed(f'feature {args.feature}'), results.captured(f'feature_{args.feature}'):
+        if args.feature == 0:
+            ExampleAnalysis().run()
+        elif args.feature == 1:
+            IssueAnalysis().run()
+        elif args.feature == 2:
+            TimeBasedIssueAnalysis().run()
+        elif args.feature == 3:
+            ReopenedIssueAnalysis().run()   
+        elif args.feature == 4:
+            UserSpecificIssueAnalysis().run()
+        elif args.feature == 5:
+            LabelTrendAnalysis().run()
+        elif args.feature == 6:
+            EventLabelCategoriesAnalysis().run()
+        elif args.feature == 7:
+            # The query is passed as is, since config would parse a quoted phrase as a JSON string
+            SearchAnalysis(args.query).run()
+        elif args.feature == 8:
+            DuplicateAnalysis().run()
+        elif args.feature == 9:
+            TimelineAnalysis().run()
+        elif args.feature == 10:
+            FirstResponseAnalysis().run()
+        elif args.feature == 11:
+            LabelCooccurrenceAnalysis().run()
+
+        else:
+            print('Need to specify which feature to run with --feature flag.')
+
+
+
+if __name__ == '__main__':
+    # Parse feature to call from command line arguments
+    args = parse_args()
+    # Add arguments to config so that they can be accessed in other parts of the application
+    config.overwrite_from_args(args)
+    # Charts (and text output) go to files if an output directory is set, by default in watch mode
+    results.set_output_dir(config.get_parameter('ENPM611_PROJECT_OUTPUT_DIR') or ('output' if args.watch else None))
+    # Charts whose content is unchanged are copied from the chart cache instead of being rendered again
+    results.set_chart_cache(config.get_parameter('ENPM611_PROJECT_CHART_CACHE_PATH'),
+                            int(float(config.get_parameter('ENPM611_PROJECT_CHART_CACHE_SIZE') or 100) * 2**20))
+
+    if args.clear_result_cache:
+        # Empty the result cache (--clear-result-cache)
+        loader = DataLoader()
+        print(f'Removed {loader.clear_results()} results from the result cache {loader.result_cache_path}.')
+
+    if args.export_tables:
+        # Export the issues as tables (--export-tables)
+        loader = DataLoader()
+        count = loader.export_tables(args.export_tables, args.table_format)
+        print(f'Exported {count} issues to {args.export_tables} as {args.table_format} tables.')
+
+    if args.feature is not None and args.watch:
+        # Run the feature again whenever the export changes (--watch)
+        watch.watch(lambda: run_feature(args))
+    elif args.feature is not None:
+        run_feature(args)
+
+    # Print the timing summary (--profile)
+    if profiling.is_enabled():
+        print(profiling.summary())
@@ -0,0 +1,54 @@
+"""
+Fixtures shared by the tests of the analyses that run over a few
+hand-made issues.
+"""
+
+import unittest
+from unittest.mock import patch
+
+import data.data_loader as data_loader
+from models.model import Issue
+
+# Issues and datasets the DataLoader keeps between calls
+_LOADED = ['_ISSUES', '_COLUMNS', '_FILTERED_COLUMNS', '_SEARCH', '_DATASET', '_TABLES']
+
+
+def make_issue(number, created='2023-01-01T10:00:00Z', events=(), state='open', updated=None, creator='user1',
+               labels=None):
+    """
+    An issue with the given events as (event_type, event_date, author).
+    """
+    return Issue({'number': number, 'created_date': created, 'state': state, 'updated_date': updated,
+                  'creator': creator, 'labels': labels or [],
+                  'events': [{'event_type': event_type, 'event_date': date, 'author': author}
+                             for event_type, date, author in events]})
+
+
+def reset_data_loader():
+    for name in _LOADED:
+        setattr(data_loader, name, None)
+
+
+class AnalysisTestCase(unittest.TestCase):
+    """
+    Forgets the issues loaded by the DataLoader around each test. Subclasses
+    set self.issues, which run_analysis hands to the analysis.
+    """
+
+    def setUp(self):
+        reset_data_loader()
+
+    def tearDown(self):
+        reset_data_loader()
+
+    def run_analysis(self, analysis_class, **parameters) -> str:
+        """
+        Runs an analysis over self.issues with the given parameters (e.g.,
+        user='user1') and returns what it printed.
+        """
+        parameters = dict(parameters, ENPM611_PROJECT_DATA_PATH='unused')
+        with patch('data.data_loader.DataLoader.get_issues', return_value=self.issues), \
+                patch('config.get_parameter', parameters.get), \
+                patch('matplotlib.pyplot.show'), patch('builtins.print') as mock_print:
+            analysis_class().run()
+        return '\n'.join(str(call.args[0]) if call.args else '' for call in mock_print.call_args_list)
@@ -0,0 +1,97 @@
+import unittest
+import copy
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import data.data_loader as data_loader
+from analysis.label_trend_analysis import LabelTrendAnalysis
+from analysis.reopened_issue_analysis import ReopenedIssueAnalysis
+from data.aggregates import MaterializedAggregates
+from data.data_loader import DataLoader
+from data.issue_cache import IssueCache
+from models.model import Issue
+from tests.test_sqlite_store import mock_issues_data
+import matplotlib
+matplotlib.use('Agg')
+
+
+class TestMaterializedAggregates(unittest.TestCase):
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmpdir.name, 'issues.json')
+        self.cache_path = os.path.join(self.tmpdir.name, 'cache')
+        self.write_export(mock_issues_data)
+        self.parameters = {
+            'ENPM611_PROJECT_DATA_PATH': self.json_path,
+            'ENPM611_PROJECT_CACHE_PATH': self.cache_path,
+        }
+
+    def tearDown(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        self.tmpdir.cleanup()
+
+    def write_export(self, jissues):
+        with open(self.json_path, 'w') as fout:
+            json.dump(jissues, fout)
+
+    def test_counts(self):
+        aggregates = MaterializedAggregates.from_issues([Issue(jissue) for jissue in mock_issues_data])
+        self.assertEqual(aggregates.issue_count, 2)
+        self.assertEqual(aggregates.label_totals, {'kind/bug': 1, 'status/triage': 1, 'kind/feature': 1})
+        self.assertEqual(aggregates.label_month['kind/feature'], {'2024-10': 1})
+        self.assertEqual(aggregates.labeled_events, {'kind/bug': 1})
+        self.assertEqual(aggregates.reopened_count, 0)
+
+    def test_delta_matches_recompute(self):
+        cache = IssueCache(self.cache_path)
+        cache.ingest(self.json_path)
+
+        changed = copy.deepcopy(mock_issues_data)
+        changed[0]['updated_date'] = '2024-12-01T00:00:00Z'
+        changed[0]['labels'] = ['kind/bug']
+        changed[0]['events'].append({"event_type": "reopened", "author": "user4", "event_date": "2024-12-01T00:00:00Z"})
+        new_issue = copy.deepcopy(mock_issues_data[1])
+        new_issue['number'] = 3
+        new_issue['created_date'] = '2024-12-03T00:00:00Z'
+        changed = [changed[0], new_issue]
+        self.write_export(changed)
+
+        with patch.object(MaterializedAggregates, 'from_issues', wraps=MaterializedAggregates.from_issues) as recompute:
+            cache.ingest(self.json_path)
+        recompute.assert_not_called()
+        maintained = cache.load_aggregates()
+        expected = MaterializedAggregates.from_issues([Issue(jissue) for jissue in changed])
+        self.assertEqual(maintained.to_json(), expected.to_json())
+        self.assertEqual(maintained.reopened_count, 1)
+        self.assertEqual(maintained.reopened_labels, {'kind/bug': 1})
+
+    def test_outdated_aggregates_are_not_used(self):
+        with patch('config.get_parameter', self.parameters.get):
+            loader = DataLoader()
+            self.assertIsNone(loader.get_aggregates())
+            loader.get_issues()
+            self.assertIsNotNone(loader.get_aggregates())
+            # The export changed, so the aggregates are no longer current
+            self.write_export(mock_issues_data[:1])
+            self.assertIsNone(loader.get_aggregates())
+
+    def test_analyses_read_aggregates(self):
+        with patch('config.get_parameter', self.parameters.get):
+            DataLoader().get_issues()
+            with patch('data.data_loader.DataLoader.get_issues') as get_issues:
+                with patch('matplotlib.pyplot.show'):
+                    LabelTrendAnalysis().run()
+                    analysis = ReopenedIssueAnalysis()
+                    analysis.analyze_issues_reopened()
+            get_issues.assert_not_called()
+            self.assertEqual(analysis.reopened_issues_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import copy
+import importlib.util
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import data.data_loader as data_loader
+from benchmarks.synthetic import generate_export
+from data.arrow_tables import is_table_dir, read_tables, table_files, write_tables
+from data.columnar import ColumnarIssues
+from data.data_loader import DataLoader
+from models.model import Issue
+from tests.test_sqlite_store import mock_issues_data, issue_as_dict
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+@unittest.skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+class TestArrowTables(unittest.TestCase):
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        data_loader._DATASET = None
+        data_loader._TABLES = None
+        self.tmpdir = tempfile.TemporaryDirectory()
+        # Synthetic issues plus the mock issues, with non-ASCII text and missing values
+        self.jissues = generate_export(200) + copy.deepcopy(mock_issues_data)
+        self.jissues[0]['title'] = 'Poetry über alles – \U0001F680'
+        self.jissues[1]['created_date'] = None
+        self.jissues[3]['labels'] = []
+        self.jissues[3]['events'] = [{'event_type': 'commented', 'author': None, 'event_date': None}]
+        self.issues = [Issue(jissue) for jissue in self.jissues]
+        self.dataset = ColumnarIssues.from_issues(self.issues)
+        self.json_path = os.path.join(self.tmpdir.name, 'issues.json')
+        with open(self.json_path, 'w', encoding='utf-8') as fout:
+            json.dump(self.jissues, fout, ensure_ascii=False)
+        self.path = os.path.join(self.tmpdir.name, 'tables')
+
+    def tearDown(self):
+        data_loader._ISSUES = None
+        data_loader._DATASET = None
+        data_loader._TABLES = None
+        self.tmpdir.cleanup()
+
+    def expected(self, issues):
+        return [issue_as_dict(issue) for issue in issues]
+
+    def test_round_trip(self):
+        for table_format in ['parquet', 'arrow']:
+            write_tables(self.dataset, self.path, table_format)
+            files = table_files(self.path)
+            self.assertEqual(sorted(files), ['assignees', 'events', 'issues', 'labels'])
+            self.assertTrue(all(file.endswith('.' + table_format) for file in files.values()))
+            self.assertEqual(self.expected(read_tables(self.path).to_issues()), self.expected(self.issues))
+
+    def test_export_order(self):
+        # Issues are written in the order of the export, whatever the order of the dataset
+        write_tables(self.dataset.take(list(range(len(self.dataset)))[::-1]), self.path)
+        self.assertEqual(self.expected(read_tables(self.path).to_issues()), self.expected(self.issues))
+
+    def test_lazy_columns(self):
+        write_tables(self.dataset, self.path)
+        dataset = read_tables(self.path, columns=['label_ids'])
+        self.assertEqual(sorted(dataset.columns.loaded()), ['label_ids', 'label_offsets'])
+        labels = [dataset.labels.values[label_id] for label_id in dataset['label_ids']]
+        self.assertEqual(labels, [label for issue in self.issues for label in issue.labels])
+        self.assertFalse([name for name in dataset.columns.loaded() if name.startswith(('text', 'event_'))])
+
+    def filtered(self, path, issue_filter, user=None):
+        data_loader._ISSUES = None
+        data_loader._DATASET = None
+        data_loader._TABLES = None
+        parameters = {'ENPM611_PROJECT_DATA_PATH': path, 'filter': issue_filter}
+        with patch('config.get_parameter', parameters.get):
+            return self.expected(DataLoader().get_dataset(user=user).to_issues())
+
+    def test_filters(self):
+        # Users and labels are looked up before any of their columns is read
+        user = self.issues[5].creator
+        label = self.issues[5].labels[0]
+        filters = [(f'label:{label}', None), (f'labels:"{label} AND NOT kind/bug"', None),
+                   (f'author:{user}', None), (None, user), (f'-label:{label}', user)]
+        for table_format in ['parquet', 'arrow']:
+            write_tables(self.dataset, self.path, table_format)
+            for issue_filter, filter_user in filters:
+                with self.subTest(table_format=table_format, filter=issue_filter, user=filter_user):
+                    expected = self.filtered(self.json_path, issue_filter, filter_user)
+                    self.assertTrue(expected)
+                    self.assertEqual(self.filtered(self.path, issue_filter, filter_user), expected)
+
+    def test_tables_without_vocabularies(self):
+        # Tables written by other tools have their dictionary columns read up front
+        import pyarrow.parquet
+        write_tables(self.dataset, self.path)
+        for file in table_files(self.path).values():
+            table = pyarrow.parquet.read_table(file)
+            pyarrow.parquet.write_table(table.replace_schema_metadata(None), file)
+        dataset = read_tables(self.path)
+        self.assertEqual(sorted(dataset.labels.values), sorted(self.dataset.labels.values))
+        label = self.issues[5].labels[0]
+        self.assertEqual(self.filtered(self.path, f'label:{label}'), self.filtered(self.json_path, f'label:{label}'))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            write_tables(self.dataset, self.path, 'csv')
+        self.assertFalse(is_table_dir(self.path))
+        self.assertFalse(is_table_dir(self.json_path))
+
+    def test_data_loader(self):
+        parameters = {'ENPM611_PROJECT_DATA_PATH': self.json_path, 'filter': 'label:kind/bug'}
+        with patch('config.get_parameter', parameters.get):
+            count = DataLoader().export_tables(self.path, 'arrow')
+        expected = [issue for issue in self.issues if 'kind/bug' in issue.labels]
+        self.assertEqual(count, len(expected))
+        data_loader._ISSUES = None
+        data_loader._DATASET = None
+        parameters = {'ENPM611_PROJECT_DATA_PATH': self.path, 'filter': 'state:closed'}
+        with patch('config.get_parameter', parameters.get):
+            loader = DataLoader()
+            self.assertTrue(loader.has_tables())
+            self.assertFalse(loader.has_columns())
+            issues = loader.get_issues()
+            self.assertEqual(len(loader.get_dataset()), len(issues))
+        self.assertEqual(self.expected(issues),
+                         self.expected([issue for issue in expected if issue.state == 'closed']))
+
+
+if __name__ == "__main__":
+    unittest.main()
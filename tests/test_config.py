@@ -0,0 +1,77 @@
+import unittest
+import argparse
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import config
+
+
+class TestConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.environ = patch.dict(os.environ)
+        self.environ.start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmpdir.name, 'config.json')
+        with open(path, 'w') as fout:
+            json.dump({'FILE_PARAM': 'from file', 'NULL_PARAM': None, 'OVERRIDDEN': 1}, fout)
+        self.previous = config._config
+        config._config = None
+        config._init_config(path)
+        config.invalidate()
+
+    def tearDown(self):
+        self.environ.stop()
+        config._config = self.previous
+        config.invalidate()
+        self.tmpdir.cleanup()
+
+    def test_precedence(self):
+        self.assertEqual(config.get_parameter('FILE_PARAM'), 'from file')
+        self.assertEqual(config.get_parameter('OVERRIDDEN'), 1)
+        self.assertIsNone(config.get_parameter('NULL_PARAM', 'default'))
+        self.assertEqual(config.get_parameter('MISSING_PARAM', 'default'), 'default')
+        self.assertIsNone(config.get_parameter('MISSING_PARAM'))
+        # Environment variables take precedence, also when set after a cached read
+        os.environ['OVERRIDDEN'] = '[1, 2]'
+        self.assertEqual(config.get_parameter('OVERRIDDEN'), [1, 2])
+        os.environ['OVERRIDDEN'] = 'json:{"a": true}'
+        self.assertEqual(config.get_parameter('OVERRIDDEN'), {'a': True})
+        os.environ['MISSING_PARAM'] = 'text'
+        self.assertEqual(config.get_parameter('MISSING_PARAM', 'default'), 'text')
+        del os.environ['OVERRIDDEN']
+        self.assertEqual(config.get_parameter('OVERRIDDEN'), 1)
+
+    def test_set_parameter(self):
+        config.get_parameter('FILE_PARAM')
+        config.set_parameter('FILE_PARAM', 'set')
+        self.assertEqual(config.get_parameter('FILE_PARAM'), 'set')
+        config.set_parameter('FILE_PARAM', 5)
+        self.assertEqual(os.environ['FILE_PARAM'], 'json:5')
+        with patch('config.convert_to_typed_value') as convert:
+            # Typed values set in process are not parsed back from the environment
+            self.assertEqual(config.get_parameter('FILE_PARAM'), 5)
+            self.assertEqual(config.get_parameter('FILE_PARAM'), 5)
+            convert.assert_not_called()
+
+    def test_overwrite_from_args(self):
+        config.overwrite_from_args(argparse.Namespace(FILE_PARAM='arg', profile=True, label=None))
+        self.assertEqual(config.get_parameter('FILE_PARAM'), 'arg')
+        self.assertIs(config.get_parameter('profile'), True)
+        self.assertIsNone(config.get_parameter('label'))
+
+    def test_snapshot_is_reused(self):
+        os.environ['TYPED_PARAM'] = '{"workers": 4}'
+        with patch('config.convert_to_typed_value', wraps=config.convert_to_typed_value) as convert:
+            for _ in range(3):
+                self.assertEqual(config.get_parameter('TYPED_PARAM'), {'workers': 4})
+            self.assertEqual(convert.call_count, 1)
+            config.invalidate('TYPED_PARAM')
+            config.get_parameter('TYPED_PARAM')
+            self.assertEqual(convert.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import random
+from unittest.mock import patch
+from itertools import combinations
+
+import numpy as np
+
+from analysis.duplicate_analysis import (DuplicateAnalysis, candidate_pairs, drop_frequent_shingles,
+                                         find_near_duplicates, issue_names, minhash_signatures, shingle_hashes,
+                                         similarities)
+from benchmarks.synthetic import generate_export
+from data.search_index import tokenize
+from models.model import Issue
+
+
+def _jaccard(first:str, second:str, size:int=3) -> float:
+    shingles = []
+    for text in (first, second):
+        words = tokenize(text)
+        shingles.append({' '.join(words[j:j + size]) for j in range(max(1, len(words) - size + 1))})
+    return len(shingles[0] & shingles[1]) / len(shingles[0] | shingles[1])
+
+
+class TestDuplicateAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(42)
+        jissues = generate_export(400)
+        self.numbers = [jissue['number'] for jissue in jissues]
+        self.texts = [f"{jissue['title']} {jissue['text']}" for jissue in jissues]
+        # Near-duplicates of some issues, with a few words replaced
+        self.duplicates = {}
+        for source in rng.sample(range(len(jissues)), 10):
+            words = self.texts[source].split()
+            for _ in range(2):
+                words[rng.randrange(len(words))] = 'duplicate'
+            self.numbers.append(1000 + source)
+            self.texts.append(' '.join(words))
+            self.duplicates[self.numbers[source]] = 1000 + source
+
+    def test_shingle_hashes(self):
+        hashes, offsets = shingle_hashes(['a b c d', 'A B c', '', 'x'])
+        self.assertEqual(np.diff(offsets).tolist(), [2, 1, 0, 1])
+        # 'a b c' occurs in both of the first texts
+        self.assertIn(hashes[2], hashes[:2])
+        hashes, offsets = drop_frequent_shingles(hashes, offsets, max_frequency=0.0)
+        self.assertEqual(np.diff(offsets).tolist(), [2, 1, 0, 1])
+
+    def test_signatures_estimate_jaccard(self):
+        texts = self.texts[:50]
+        signatures = minhash_signatures(*shingle_hashes(texts), num_hashes=256)
+        pairs = np.array(list(combinations(range(len(texts)), 2)))
+        estimates = similarities(signatures, pairs)
+        exact = np.array([_jaccard(texts[i], texts[j]) for i, j in pairs])
+        self.assertLess(np.abs(estimates - exact).mean(), 0.03)
+        # Identical texts have identical signatures, empty texts the maximum value
+        signatures = minhash_signatures(*shingle_hashes([texts[0], texts[0], '']))
+        self.assertTrue((signatures[0] == signatures[1]).all())
+        self.assertTrue((signatures[2] == np.iinfo(np.uint32).max).all())
+
+    def test_candidate_pairs(self):
+        signatures = minhash_signatures(*shingle_hashes(self.texts + ['', '']))
+        pairs = candidate_pairs(signatures)
+        found = {(self.numbers[i], self.numbers[j]) for i, j in pairs.tolist()}
+        for number, duplicate in self.duplicates.items():
+            self.assertIn((number, duplicate), found)
+        # Far fewer candidates than pairs of issues, and none between the empty texts
+        self.assertLess(len(pairs), len(self.texts) * 5)
+        self.assertFalse(np.isin(pairs, [len(self.texts), len(self.texts) + 1]).any())
+
+    def test_find_near_duplicates(self):
+        clusters = find_near_duplicates(self.numbers, self.texts, threshold=0.5)
+        self.assertEqual(sorted(tuple(cluster) for cluster, _ in clusters),
+                         sorted(self.duplicates.items()))
+        for cluster, similarity in clusters:
+            self.assertGreaterEqual(similarity, 0.5)
+            self.assertLessEqual(similarity, 1.0)
+        self.assertEqual([similarity for _, similarity in clusters],
+                         sorted((similarity for _, similarity in clusters), reverse=True))
+
+    def test_transitive_clusters(self):
+        text = 'poetry fails to resolve the dependency markers of the wheel on python three'
+        texts = [text, text + ' again', 'again ' + text + ' again', 'something else entirely here']
+        clusters = find_near_duplicates([1, 2, 3, 4], texts, threshold=0.5)
+        self.assertEqual([cluster for cluster, _ in clusters], [[1, 2, 3]])
+
+    @patch('analysis.duplicate_analysis.DataLoader')
+    def test_run(self, mock_loader):
+        issues = [Issue({'number': number, 'state': 'open', 'title': '', 'text': text})
+                  for number, text in zip(self.numbers, self.texts)]
+        mock_loader.return_value.has_columns.return_value = False
+        mock_loader.return_value.get_issues.return_value = issues
+        mock_loader.return_value.get_result.side_effect = lambda name, params, compute: compute()
+        with patch('config.get_parameter', return_value=None), patch('builtins.print') as mock_print:
+            DuplicateAnalysis().run()
+        output = '\n'.join(str(call.args[0]) for call in mock_print.call_args_list)
+        self.assertIn('Clusters of likely duplicate issues (similarity >= 0.5): 10', output)
+
+
+    def test_issue_names(self):
+        self.assertEqual(issue_names([1, 2], ['owner/a', 'owner/a']), [1, 2])
+        self.assertEqual(issue_names([1, 2], [None, None]), [1, 2])
+        self.assertEqual(issue_names([1, 1, 2], ['owner/a', 'owner/b', None]), ['owner/a#1', 'owner/b#1', '2'])
+
+    @patch('analysis.duplicate_analysis.DataLoader')
+    def test_run_several_repositories(self, mock_loader):
+        # The same number in two repositories is told apart
+        text = 'poetry fails to resolve the dependency markers of the wheel on python three'
+        issues = [Issue({'number': 7, 'state': 'open', 'title': '', 'text': text, 'repository': repository})
+                  for repository in ['owner/a', 'owner/b']]
+        mock_loader.return_value.has_columns.return_value = False
+        mock_loader.return_value.get_issues.return_value = issues
+        mock_loader.return_value.get_result.side_effect = lambda name, params, compute: compute()
+        with patch('config.get_parameter', return_value=None), patch('builtins.print') as mock_print:
+            DuplicateAnalysis().run()
+        output = '\n'.join(str(call.args[0]) for call in mock_print.call_args_list)
+        self.assertIn('owner/a#7, owner/b#7', output)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+import numpy as np
+
+import data.data_loader as data_loader
+from analysis.issue_analysis import IssueAnalysis
+from analysis.time_based_issue_analysis import TimeBasedIssueAnalysis
+from analysis.duration_sketches import (DurationSketches, TIME_TO_CLOSE, TIME_TO_ASSIGN,
+                                        map_duration_sketches, get_duration_sketches)
+from analysis.mapreduce import map_reduce
+from analysis.sketches import combine_sketches
+from benchmarks.synthetic import generate_export
+from data.data_loader import DataLoader
+from models.model import Issue
+
+
+def close_days(issue):
+    closed = [event.event_date for event in issue.events if event.event_type == 'closed']
+    if issue.state != 'closed' or not closed:
+        return None
+    return (closed[-1] - issue.created_date).total_seconds() / 86400
+
+
+class TestDurationSketches(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.jissues = generate_export(3000)
+        cls.issues = [Issue(jissue) for jissue in cls.jissues]
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        self.tmpdir.cleanup()
+
+    def test_time_to_close(self):
+        durations = map_duration_sketches(self.issues)
+        days = np.array([d for d in map(close_days, self.issues) if d is not None])
+        sketch = durations.get(TIME_TO_CLOSE)
+        self.assertEqual(sketch.count, len(days))
+        for q, estimate in zip([0.5, 0.9, 0.99], sketch.quantiles([0.5, 0.9, 0.99])):
+            self.assertAlmostEqual(np.mean(days <= estimate), q, delta=0.02)
+
+        label_days = [d for issue, d in zip(self.issues, map(close_days, self.issues))
+                      if d is not None and 'kind/bug' in issue.labels]
+        self.assertEqual(durations.get(TIME_TO_CLOSE, label='kind/bug').count, len(label_days))
+        creator_days = [d for issue, d in zip(self.issues, map(close_days, self.issues))
+                        if d is not None and issue.creator == 'user1']
+        self.assertEqual(durations.get(TIME_TO_CLOSE, creator='user1').count, len(creator_days))
+
+    def test_time_to_assign(self):
+        durations = map_duration_sketches(self.issues)
+        expected = sum(1 for issue in self.issues if issue.assignees
+                       for event in issue.events if event.event_type == 'assigned')
+        self.assertEqual(durations.get(TIME_TO_ASSIGN).count, expected)
+        self.assertEqual(durations.get(TIME_TO_ASSIGN, label='missing').count, 0)
+
+    def test_merge_across_shards(self):
+        serial = map_duration_sketches(self.issues)
+        parallel = map_reduce(self.issues, map_duration_sketches, combine_sketches, workers=2, threshold=0)
+        summary = parallel.summary(TIME_TO_CLOSE, by='label')
+        self.assertEqual(summary['count'].to_dict(), serial.summary(TIME_TO_CLOSE, by='label')['count'].to_dict())
+        for metric in [TIME_TO_CLOSE, TIME_TO_ASSIGN]:
+            exact = serial.get(metric).quantile(0.5)
+            self.assertAlmostEqual(parallel.get(metric).quantile(0.5), exact, delta=0.05 * exact)
+
+    def test_json_round_trip(self):
+        durations = map_duration_sketches(self.issues[:500])
+        restored = DurationSketches.from_json(json.loads(json.dumps(durations.to_json())))
+        self.assertTrue(restored.summary(TIME_TO_ASSIGN, by='creator').equals(
+            durations.summary(TIME_TO_ASSIGN, by='creator')))
+
+    def test_persisted_with_cache(self):
+        json_path = os.path.join(self.tmpdir.name, 'issues.json')
+        with open(json_path, 'w') as fout:
+            json.dump(self.jissues[:200], fout)
+        parameters = {
+            'ENPM611_PROJECT_DATA_PATH': json_path,
+            'ENPM611_PROJECT_CACHE_PATH': os.path.join(self.tmpdir.name, 'cache'),
+        }
+        with patch('config.get_parameter', parameters.get):
+            loader = DataLoader()
+            first = get_duration_sketches(loader)
+            with patch('analysis.duration_sketches.map_reduce') as mock_map_reduce:
+                second = get_duration_sketches(loader)
+            mock_map_reduce.assert_not_called()
+            self.assertEqual(second.get(TIME_TO_CLOSE).count, first.get(TIME_TO_CLOSE).count)
+
+            # Changing the export invalidates the stored sketches
+            with open(json_path, 'w') as fout:
+                json.dump(self.jissues[:100], fout)
+            loader.refresh()
+            third = get_duration_sketches(loader)
+            self.assertEqual(third.get(TIME_TO_CLOSE).count,
+                             len([d for d in map(close_days, self.issues[:100]) if d is not None]))
+
+
+    def test_built_only_in_approximate_mode(self):
+        json_path = os.path.join(self.tmpdir.name, 'issues.json')
+        with open(json_path, 'w') as fout:
+            json.dump(self.jissues[:200], fout)
+        cache_path = os.path.join(self.tmpdir.name, 'cache')
+        # (cache path, approximate, passes building the sketches, percentiles printed)
+        runs = [(None, False, 0, False), (None, True, 2, True), (None, False, 0, False),
+                # The first approximate run stores the sketches in the cache, later runs reuse them
+                (cache_path, False, 0, False), (cache_path, True, 1, True), (cache_path, False, 0, True)]
+        for path, approximate, passes, printed in runs:
+            data_loader._ISSUES = None
+            data_loader._COLUMNS = None
+            parameters = {'ENPM611_PROJECT_DATA_PATH': json_path, 'ENPM611_PROJECT_CACHE_PATH': path,
+                          'approximate': approximate}
+            with patch('config.get_parameter', parameters.get), patch('results.show'), \
+                    patch('results.show_plotly'), redirect_stdout(io.StringIO()) as output, \
+                    patch('analysis.duration_sketches.map_reduce', wraps=map_reduce) as mock_map_reduce:
+                IssueAnalysis().run()
+                TimeBasedIssueAnalysis().run()
+            self.assertEqual(mock_map_reduce.call_count, passes)
+            self.assertEqual('Time taken to close issues (in days):' in output.getvalue(), printed)
+            self.assertEqual('Time to assign a user in days:' in output.getvalue(), printed)
+
+if __name__ == "__main__":
+    unittest.main()
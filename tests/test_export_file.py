@@ -0,0 +1,58 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import data.data_loader as data_loader
+from data.data_loader import DataLoader
+from data.export_file import COMPRESSIONS, load_export, strip_compression
+from tests.test_sqlite_store import mock_issues_data, issue_as_dict
+from models.model import Issue
+
+
+class TestExportFile(unittest.TestCase):
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = {'': os.path.join(self.tmpdir.name, 'issues.json')}
+        with open(self.paths[''], 'w') as fout:
+            json.dump(mock_issues_data, fout)
+        for extension, opener in COMPRESSIONS.items():
+            self.paths[extension] = self.paths[''] + extension
+            with opener(self.paths[extension], 'wt', encoding='utf-8') as fout:
+                json.dump(mock_issues_data, fout)
+
+    def tearDown(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        self.tmpdir.cleanup()
+
+    def test_strip_compression(self):
+        self.assertEqual(strip_compression('data/issues.json.gz'), 'data/issues.json')
+        self.assertEqual(strip_compression('data/issues.json.XZ'), 'data/issues.json')
+        self.assertEqual(strip_compression('data/issues.json'), 'data/issues.json')
+
+    def test_load_compressed(self):
+        for path in self.paths.values():
+            self.assertEqual(load_export(path), mock_issues_data)
+
+    def test_data_loader_backends(self):
+        expected = [issue_as_dict(Issue(jissue)) for jissue in mock_issues_data]
+        for extension in COMPRESSIONS:
+            for storage in [{}, {'ENPM611_PROJECT_STORAGE': 'sqlite'},
+                            {'ENPM611_PROJECT_CACHE_PATH': os.path.join(self.tmpdir.name, 'cache' + extension)}]:
+                data_loader._ISSUES = None
+                data_loader._COLUMNS = None
+                parameters = dict(storage, ENPM611_PROJECT_DATA_PATH=self.paths[extension])
+                with patch('config.get_parameter', parameters.get):
+                    issues = DataLoader().get_issues()
+                self.assertEqual([issue_as_dict(issue) for issue in issues], expected)
+        # The database is named after the export without the compression extension
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir.name, 'issues.sqlite')))
+
+
+if __name__ == "__main__":
+    unittest.main()
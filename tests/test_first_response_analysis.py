@@ -0,0 +1,80 @@
+import unittest
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+from analysis.first_response_analysis import (FirstResponseAnalysis, by_label, by_month, first_response_hours,
+                                              response_summary)
+from data.columnar import ColumnarIssues
+from tests.helpers import AnalysisTestCase, make_issue
+
+
+class TestFirstResponseAnalysis(AnalysisTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issues = [
+            # The creator's own comment and a label event do not count; comments are taken by date
+            make_issue(1, '2023-01-01T00:00:00Z', [('commented', '2023-01-01T01:00:00Z', 'user1'),
+                                                   ('labeled', '2023-01-01T02:00:00Z', 'user2'),
+                                                   ('commented', '2023-01-01T10:00:00Z', 'user3'),
+                                                   ('commented', '2023-01-01T05:00:00Z', 'user2')],
+                       labels=['kind/bug', 'status/triage']),
+            # No response
+            make_issue(2, '2023-01-15T00:00:00Z', [('commented', '2023-01-16T00:00:00Z', 'user2')],
+                       creator='user2', labels=['kind/bug']),
+            make_issue(3, '2023-02-01T00:00:00Z', [('commented', '2023-02-03T00:00:00Z', 'user1')],
+                       creator='user3', labels=['kind/feature']),
+            # A comment dated before the creation is ignored
+            make_issue(4, '2023-02-10T00:00:00Z', [('commented', '2023-02-09T00:00:00Z', 'user1')], creator='user3'),
+        ]
+        self.dataset = ColumnarIssues.from_issues(self.issues)
+
+    def test_first_response_hours(self):
+        hours = first_response_hours(self.dataset)
+        np.testing.assert_array_equal(hours, [5.0, np.nan, 48.0, np.nan])
+
+    def test_without_comments(self):
+        # Without any comment, events without a type are not responses
+        issues = [make_issue(1, '2023-01-01T00:00:00Z', [(None, '2023-01-01T02:00:00Z', 'user2'),
+                                                        ('closed', '2023-01-01T03:00:00Z', 'user2')])]
+        np.testing.assert_array_equal(first_response_hours(ColumnarIssues.from_issues(issues)), [np.nan])
+
+    def test_matches_loop(self):
+        hours = first_response_hours(self.dataset)
+        for issue, value in zip(self.issues, hours):
+            responses = [event.event_date for event in issue.events
+                         if event.event_type == 'commented' and event.author != issue.creator
+                         and event.event_date >= issue.created_date]
+            expected = (min(responses) - issue.created_date).total_seconds() / 3600 if responses else np.nan
+            np.testing.assert_equal(value, expected)
+
+    def test_summary_and_breakdowns(self):
+        hours = first_response_hours(self.dataset)
+        summary = response_summary(hours)
+        self.assertEqual((summary['issues'], summary['responded'], summary['response_rate']), (4, 2, 0.5))
+        self.assertEqual(summary['median_hours'], 26.5)
+        labels = by_label(self.dataset, hours)
+        self.assertEqual(labels.index.tolist(), ['kind/bug', 'kind/feature', 'status/triage'])
+        self.assertEqual(labels['issues'].tolist(), [2, 1, 1])
+        self.assertEqual(labels['responded'].tolist(), [1, 1, 1])
+        self.assertEqual(labels['median_hours'].tolist(), [5.0, 48.0, 5.0])
+        months = by_month(self.dataset, hours)
+        self.assertEqual(months.index.tolist(), ['2023-01', '2023-02'])
+        self.assertEqual(months['response_rate'].tolist(), [0.5, 0.5])
+        self.assertEqual(months['median_hours'].tolist(), [5.0, 48.0])
+
+    def test_run(self):
+        output = self.run_analysis(FirstResponseAnalysis)
+        self.assertIn('Time to first response of 4 issues:', output)
+        self.assertIn('Responded to: 2 (50.0%)', output)
+        self.assertIn('Median: 26.5 hours, 90th percentile: 43.7 hours', output)
+
+    def test_run_with_label(self):
+        self.assertIn('Time to first response of 1 issues:', self.run_analysis(FirstResponseAnalysis, label='kind/feature'))
+        self.assertIn('No issues found.', self.run_analysis(FirstResponseAnalysis, label='unknown'))
+
+
+if __name__ == "__main__":
+    unittest.main()
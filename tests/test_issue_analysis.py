@@ -218,5 +218,22 @@ class TestIssueAnalysis(unittest.TestCase):
 
         mock_loader.get_issues.assert_called_once()
 
+    def test_time_to_assign_binned(self):
+        from analysis.issue_analysis import time_to_assign_user, map_assign_times
+        from analysis.duration_sketches import map_duration_sketches
+        from benchmarks.synthetic import generate_export
+        issues = [Issue(jissue) for jissue in generate_export(500)]
+        with patch("config.get_parameter", return_value=None):
+            analysis = IssueAnalysis()
+        analysis.durations = map_duration_sketches(issues)
+        with patch("matplotlib.pyplot.show"):
+            time_to_assign_user(analysis, issues)
+        heights = [bar.get_height() for bar in plt.gca().patches]
+        # One bar per bin, with the same counts as plt.hist
+        plt.figure()
+        expected, _, _ = plt.hist(map_assign_times(issues), bins=40)
+        self.assertEqual(heights, list(expected))
+        plt.close('all')
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,247 @@
+import unittest
+import copy
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+
+import data.data_loader as data_loader
+import profiling
+from analysis.label_trend_analysis import (LabelTrendAnalysis, map_distinct_creators, map_distinct_creators_columns,
+                                           map_label_trend, map_label_trend_columns)
+from benchmarks.synthetic import generate_export
+from data.columnar import ColumnarIssues
+from data.data_loader import DataLoader
+from data.issue_cache import IssueCache, ingest_json
+from data.issue_filter import parse_filter
+from models.model import Issue
+from tests.test_sqlite_store import mock_issues_data, issue_as_dict
+import matplotlib
+matplotlib.use('Agg')
+
+
+class TestIssueCache(unittest.TestCase):
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmpdir.name, 'issues.json')
+        self.write_export(mock_issues_data)
+        self.cache = IssueCache(os.path.join(self.tmpdir.name, 'cache'))
+
+    def tearDown(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        self.tmpdir.cleanup()
+
+    def write_export(self, jissues):
+        with open(self.json_path, 'w') as fout:
+            json.dump(jissues, fout)
+
+    def expected(self, jissues):
+        return [issue_as_dict(Issue(jissue)) for jissue in jissues]
+
+    def test_columnar_round_trip(self):
+        issues = [Issue(jissue) for jissue in mock_issues_data]
+        dataset = ColumnarIssues.from_issues(issues)
+        self.assertEqual([issue_as_dict(i) for i in dataset.to_issues()], self.expected(mock_issues_data))
+        self.assertEqual([issue_as_dict(i) for i in dataset.take([1, 0]).to_issues()],
+                         self.expected(mock_issues_data[::-1]))
+
+    def test_save_and_load(self):
+        dataset, report = self.cache.ingest(self.json_path)
+        self.assertEqual(str(report), '2 added, 0 updated, 0 unchanged, 0 removed')
+        self.assertTrue(self.cache.is_current(self.json_path))
+        loaded = self.cache.load()
+        self.assertEqual([issue_as_dict(i) for i in loaded.to_issues()], self.expected(mock_issues_data))
+
+    def test_incremental_ingestion(self):
+        self.cache.ingest(self.json_path)
+        changed = copy.deepcopy(mock_issues_data)
+        changed[0]['updated_date'] = '2024-12-01T00:00:00Z'
+        changed[0]['labels'] = ['kind/bug', 'status/confirmed']
+        changed[0]['events'].append({"event_type": "reopened", "author": "user4", "event_date": "2024-12-01T00:00:00Z"})
+        new_issue = copy.deepcopy(mock_issues_data[1])
+        new_issue['number'] = 3
+        changed.insert(1, new_issue)
+        self.write_export(changed)
+
+        with patch('data.issue_cache.Issue', wraps=Issue) as parsed:
+            dataset, report = self.cache.ingest(self.json_path)
+        # Only the new and the changed issue are parsed again
+        self.assertEqual(parsed.call_count, 2)
+        self.assertEqual((report.added, report.updated, report.unchanged, report.removed), (1, 1, 1, 0))
+        self.assertEqual([issue_as_dict(i) for i in dataset.to_issues()], self.expected(changed))
+        self.assertEqual(dataset.row_of(3), 1)
+
+    def test_reader_keeps_its_version(self):
+        self.cache.ingest(self.json_path)
+        loaded = self.cache.load()
+        changed = copy.deepcopy(mock_issues_data)
+        changed[0]['title'] = 'Changed title'
+        changed[0]['updated_date'] = '2024-12-01T00:00:00Z'
+        self.write_export(changed)
+        self.cache.ingest(self.json_path)
+        # Columns opened after the cache was written again are those of the loaded version
+        self.assertEqual([issue_as_dict(i) for i in loaded.to_issues()], self.expected(mock_issues_data))
+        self.assertEqual([issue_as_dict(i) for i in self.cache.load().to_issues()], self.expected(changed))
+        # Only the files of the current and the previous version are kept
+        self.cache.ingest(self.json_path)
+        versions = {file.rsplit('.', 2)[1] for file in os.listdir(self.cache.path) if file.endswith('.npy')}
+        self.assertEqual(len(versions), 2)
+        self.assertIn(self.cache.version(), versions)
+
+    def test_removed_issues(self):
+        previous, _ = ingest_json(mock_issues_data)
+        dataset, report = ingest_json(mock_issues_data[1:], previous)
+        self.assertEqual((report.added, report.updated, report.unchanged, report.removed), (0, 0, 1, 1))
+        self.assertEqual([i.number for i in dataset.to_issues()], [2])
+
+    def test_data_loader_with_cache(self):
+        parameters = {
+            'ENPM611_PROJECT_DATA_PATH': self.json_path,
+            'ENPM611_PROJECT_CACHE_PATH': self.cache.path,
+        }
+        with patch('config.get_parameter', parameters.get):
+            issues = DataLoader().get_issues()
+            self.assertEqual([issue_as_dict(i) for i in issues], self.expected(mock_issues_data))
+            self.assertTrue(self.cache.is_current(self.json_path))
+
+            # A second process finds the cache current and does not ingest the export
+            data_loader._ISSUES = None
+            data_loader._COLUMNS = None
+            with patch('data.issue_cache.ingest_json') as ingest:
+                self.assertEqual(len(DataLoader().get_issues()), 2)
+            ingest.assert_not_called()
+
+    def test_memory_mapped_lazy_load(self):
+        self.cache.ingest(self.json_path)
+        dataset = self.cache.load()
+        self.assertEqual(dataset.columns.loaded(), [])
+        self.assertIsInstance(dataset['number'], np.memmap)
+        self.assertEqual(dataset.columns.loaded(), ['number'])
+        self.assertNotIsInstance(self.cache.load(mmap=False)['number'], np.memmap)
+        # Writing the cache again does not invalidate existing mappings
+        numbers = dataset['number']
+        self.cache.ingest(self.json_path)
+        self.assertEqual(numbers.tolist(), [1, 2])
+
+    def test_label_trend_reads_only_issue_columns(self):
+        jissues = generate_export(200)
+        jissues[0]['created_date'] = None
+        self.write_export(jissues)
+        self.cache.ingest(self.json_path)
+        dataset = self.cache.load()
+        expected = map_label_trend([Issue(jissue) for jissue in jissues])
+        self.assertEqual(map_label_trend_columns(dataset, 0, len(dataset)), expected)
+        self.assertEqual(map_label_trend_columns(dataset, 0, 0), {})
+        self.assertFalse([name for name in dataset.columns.loaded() if name.startswith('event_')])
+
+        # Without current aggregates, the analysis counts over the columns
+        os.remove(os.path.join(self.cache.path, 'aggregates.json'))
+        parameters = {
+            'ENPM611_PROJECT_DATA_PATH': self.json_path,
+            'ENPM611_PROJECT_CACHE_PATH': self.cache.path,
+        }
+        with patch('config.get_parameter', parameters.get), patch('matplotlib.pyplot.show'):
+            with patch('data.data_loader.DataLoader.get_issues') as get_issues:
+                LabelTrendAnalysis().run()
+            get_issues.assert_not_called()
+            loaded = data_loader._COLUMNS.columns.loaded()
+        self.assertIn('label_ids', loaded)
+        self.assertFalse([name for name in loaded if name.startswith('event_')])
+
+    def test_label_trend_distinct_creators(self):
+        jissues = generate_export(200)
+        jissues[0]['created_date'] = None
+        jissues[1]['creator'] = None
+        self.write_export(jissues)
+        self.cache.ingest(self.json_path)
+        dataset = self.cache.load()
+        labels = set(map_label_trend([Issue(jissue) for jissue in jissues])) - {'kind/bug'}
+        expected = map_distinct_creators([Issue(jissue) for jissue in jissues], labels)
+        creators = map_distinct_creators_columns(dataset, 0, len(dataset), labels)
+        self.assertEqual(sorted(creators), sorted(expected))
+        for key, sketch in expected.items():
+            self.assertTrue(np.array_equal(creators[key].registers, sketch.registers), key)
+
+        # In approximate mode, the distinct creators are estimated with and without current aggregates
+        parameters = {
+            'ENPM611_PROJECT_DATA_PATH': self.json_path,
+            'ENPM611_PROJECT_CACHE_PATH': self.cache.path,
+            'approximate': True,
+        }
+        for aggregates in [True, False]:
+            if not aggregates:
+                os.remove(os.path.join(self.cache.path, 'aggregates.json'))
+            data_loader._ISSUES = None
+            data_loader._COLUMNS = None
+            with patch('config.get_parameter', parameters.get), patch('matplotlib.pyplot.show'), \
+                    patch('builtins.print') as mock_print:
+                LabelTrendAnalysis().run()
+            printed = [str(call.args[0]) for call in mock_print.call_args_list if call.args]
+            self.assertIn('Distinct Issue Creators per Month (Top 5 Labels, approximate):', printed, aggregates)
+
+    def test_partitioned_by_month(self):
+        jissues = generate_export(500)
+        jissues[3]['created_date'] = None
+        self.write_export(jissues)
+        dataset, _ = self.cache.ingest(self.json_path)
+        partitions = self.cache.partitions()
+        keys = [partition['key'] for partition in partitions]
+        # Newest month first, issues without a creation date last
+        self.assertEqual(keys[:-1], sorted(keys[:-1], reverse=True))
+        self.assertIsNone(keys[-1])
+        self.assertEqual(partitions[-1]['end'] - partitions[-1]['start'], 1)
+        created = dataset['created_date']
+        for partition in partitions[:-1]:
+            months = created[partition['start']:partition['end']].astype('datetime64[M]')
+            self.assertTrue((months == np.datetime64(partition['key'])).all())
+            self.assertEqual(str(created[partition['start']:partition['end']].min()), partition['min_created'])
+        # The export order is kept
+        self.assertEqual(sorted(dataset['export_position'].tolist()), list(range(500)))
+        self.assertEqual(dataset['number'][np.argsort(dataset['export_position'])].tolist(),
+                         [jissue['number'] for jissue in jissues])
+
+    def test_slice(self):
+        dataset = ColumnarIssues.from_issues([Issue(jissue) for jissue in generate_export(50)])
+        self.assertEqual([issue_as_dict(i) for i in dataset.slice(10, 20).to_issues()],
+                         [issue_as_dict(i) for i in dataset.take(range(10, 20)).to_issues()])
+        self.assertEqual(len(dataset.slice(5, 5)), 0)
+
+    def test_partition_pruning(self):
+        jissues = generate_export(500)
+        self.write_export(jissues)
+        self.cache.ingest(self.json_path)
+        expression = 'created:2020-03..2020-05'
+        issue_filter = parse_filter(expression)
+        start, end = self.cache.partition_rows(*issue_filter.created_range())
+        months = self.cache.load()['created_date'][start:end].astype('datetime64[M]')
+        self.assertTrue(((months >= np.datetime64('2020-03')) & (months <= np.datetime64('2020-05'))).all())
+        self.assertEqual(end - start, sum(1 for jissue in jissues if issue_filter.matches(Issue(jissue))))
+
+        parameters = {
+            'ENPM611_PROJECT_DATA_PATH': self.json_path,
+            'ENPM611_PROJECT_CACHE_PATH': self.cache.path,
+            'filter': expression,
+        }
+        profiling.reset()
+        with patch('config.get_parameter', parameters.get), patch('matplotlib.pyplot.show'):
+            with patch('data.data_loader.DataLoader.get_issues') as get_issues:
+                LabelTrendAnalysis().run()
+            get_issues.assert_not_called()
+            issues = DataLoader().get_issues()
+        self.assertEqual([issue.number for issue in issues],
+                         [jissue['number'] for jissue in jissues if issue_filter.matches(Issue(jissue))])
+        counters = profiling.get_counters()
+        self.assertEqual(counters['cache partitions read'], 3)
+        self.assertEqual(counters['cache partitions pruned'], len(self.cache.partitions()) - 3)
+        self.assertIn('cache partitions pruned', profiling.summary())
+        profiling.reset()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import data.data_loader as data_loader
+from benchmarks.synthetic import generate_export
+from data.columnar import ColumnarIssues
+from data.data_loader import DataLoader
+from data.issue_filter import FilterError, parse_filter
+from data.sqlite_store import SQLiteIssueStore
+from models.model import Issue
+
+EXPRESSIONS = [
+    'label:kind/bug',
+    'label:kind/bug,kind/feature state:closed',
+    '-label:kind/bug state:open',
+    'created:2019-03..2020-06',
+    'created:2021 author:user1,user2,user3,user4,user5',
+    'updated:..2019-01-15',
+    'user:user7',
+    'assignee:user316,user13,user22 -state:closed',
+    'number:100..199',
+    'number:5',
+    'label:unknown',
+    'labels:"kind/bug AND area/installer AND NOT status/duplicate"',
+    'labels:"(kind/bug OR kind/feature) AND NOT (area/cli OR unknown)" state:open',
+    '-labels:"kind/bug AND kind/feature" label:kind/bug,kind/feature',
+    'labels:"NOT unknown" created:2021',
+]
+
+
+class TestIssueFilter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.jissues = generate_export(1000, seed=3)
+        cls.issues = [Issue(jissue) for jissue in cls.jissues]
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        data_loader._FILTERED_COLUMNS = None
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        data_loader._FILTERED_COLUMNS = None
+        self.tmpdir.cleanup()
+
+    def test_parse(self):
+        issue_filter = parse_filter('label:"good first issue" -state:closed created:2023-01..2023-06')
+        self.assertEqual(len(issue_filter.terms), 3)
+        self.assertEqual(issue_filter.terms[0].values, ['good first issue'])
+        self.assertTrue(issue_filter.terms[1].negated)
+        self.assertEqual(issue_filter.terms[2].start, datetime(2023, 1, 1, tzinfo=timezone.utc))
+        # The end month is included
+        self.assertEqual(issue_filter.terms[2].end, datetime(2023, 7, 1, tzinfo=timezone.utc))
+        self.assertEqual(parse_filter('created:2023-12').terms[0].end, datetime(2024, 1, 1, tzinfo=timezone.utc))
+        self.assertFalse(parse_filter(None))
+
+    def test_parse_errors(self):
+        for expression in ['kind/bug', 'color:red', 'state:merged', 'created:2023-13', 'number:abc', 'label:"open',
+                           'labels:"kind/bug AND"', 'labels:"(kind/bug"', 'labels:"kind/bug kind/feature"']:
+            with self.assertRaises(FilterError):
+                parse_filter(expression)
+
+    def test_backends_agree(self):
+        dataset = ColumnarIssues.from_issues(self.issues)
+        store = SQLiteIssueStore(':memory:')
+        store.import_json(self.jissues)
+        for expression in EXPRESSIONS:
+            issue_filter = parse_filter(expression)
+            expected = [issue.number for issue in self.issues if issue_filter.matches(issue)]
+            self.assertEqual(dataset['number'][issue_filter.mask(dataset)].tolist(), expected, expression)
+            self.assertEqual([issue.number for issue in store.query_issues(issue_filter=issue_filter)],
+                             expected, expression)
+        store.close()
+
+    def test_parse_label_query(self):
+        term = parse_filter('labels:\'kind/bug AND ("good first issue" OR area/cli) AND NOT status/duplicate\'').terms[0]
+        self.assertEqual(term.query, ('and', [('label', 'kind/bug'),
+                                              ('or', [('label', 'good first issue'), ('label', 'area/cli')]),
+                                              ('not', ('label', 'status/duplicate'))]))
+        # NOT binds tighter than AND, AND tighter than OR
+        self.assertEqual(parse_filter('labels:"NOT a OR b AND c"').terms[0].query,
+                         ('or', [('not', ('label', 'a')), ('and', [('label', 'b'), ('label', 'c')])]))
+
+    def test_matches(self):
+        issue_filter = parse_filter('created:2019-03..2020-06')
+        for issue in self.issues:
+            expected = datetime(2019, 3, 1, tzinfo=timezone.utc) <= issue.created_date < datetime(2020, 7, 1, tzinfo=timezone.utc)
+            self.assertEqual(issue_filter.matches(issue), expected)
+
+    def test_loader_applies_filter(self):
+        json_path = os.path.join(self.tmpdir.name, 'issues.json')
+        with open(json_path, 'w') as fout:
+            json.dump(self.jissues, fout)
+        expression = 'label:kind/bug state:closed'
+        issue_filter = parse_filter(expression)
+        expected = [issue.number for issue in self.issues if issue_filter.matches(issue)]
+        for storage in [{}, {'ENPM611_PROJECT_STORAGE': 'sqlite'},
+                        {'ENPM611_PROJECT_CACHE_PATH': os.path.join(self.tmpdir.name, 'cache')}]:
+            data_loader._ISSUES = None
+            parameters = dict(storage, ENPM611_PROJECT_DATA_PATH=json_path, filter=expression)
+            with patch('config.get_parameter', parameters.get):
+                loader = DataLoader()
+                self.assertEqual([issue.number for issue in loader.get_issues()], expected)
+                # Filters compose with --user
+                self.assertEqual([issue.number for issue in loader.get_issues(user='user1')],
+                                 [issue.number for issue in self.issues
+                                  if issue_filter.matches(issue) and parse_filter('user:user1').matches(issue)])
+                # Aggregates over all issues are not used for filtered runs
+                self.assertIsNone(loader.get_aggregates())
+                if loader.has_columns():
+                    self.assertEqual(sorted(loader.get_columns()['number'].tolist()), sorted(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
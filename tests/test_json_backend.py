@@ -0,0 +1,86 @@
+import unittest
+import gzip
+import io
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import data.data_loader as data_loader
+from data.data_loader import DataLoader
+from data.export_file import load_export
+from data.json_backend import BACKENDS, available_backends, get_backend, iter_array, load_stream, loads
+from benchmarks.synthetic import generate_export
+from tests.test_sqlite_store import mock_issues_data, issue_as_dict
+from models.model import Issue
+
+
+class TestJsonBackend(unittest.TestCase):
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        self.tmpdir = tempfile.TemporaryDirectory()
+        # Synthetic issues plus the mock issues, with non-ASCII text and a missing date
+        self.jissues = generate_export(50) + mock_issues_data
+        self.jissues[0]['title'] = 'Poetry über alles – \U0001F680'
+        self.jissues[1]['created_date'] = None
+        self.path = os.path.join(self.tmpdir.name, 'issues.json')
+        with open(self.path, 'w', encoding='utf-8') as fout:
+            json.dump(self.jissues, fout, ensure_ascii=False)
+
+    def tearDown(self):
+        data_loader._ISSUES = None
+        self.tmpdir.cleanup()
+
+    def test_available_backends(self):
+        backends = available_backends()
+        self.assertEqual(backends[-1], 'json')
+        self.assertEqual(backends, [name for name in BACKENDS if name in backends])
+        with patch('config.get_parameter', {}.get):
+            self.assertEqual(get_backend(), backends[0])
+
+    def test_fallback_and_unknown_backend(self):
+        for name in BACKENDS:
+            self.assertEqual(get_backend(name), name if name in available_backends() else 'json')
+        with self.assertRaises(ValueError):
+            get_backend('yaml')
+        self.assertEqual(loads(b'{"a": [1, 2.5, null, "\\u00fc"]}', 'json'), {'a': [1, 2.5, None, 'ü']})
+
+    def test_iter_array(self):
+        documents = ['[]', ' [ ] \n', '[1, 2.5e3, -7, "a]b\\",c", {"x": [1, {"y": "}"}]}, null, true, false]',
+                     '[12345678901234567890 , 3]', json.dumps(self.jissues, ensure_ascii=False)]
+        for document in documents:
+            # Elements, numbers and multi-byte characters split across chunks
+            for chunk_size in (1, 2, 7, 4096):
+                self.assertEqual(list(iter_array(io.BytesIO(document.encode('utf-8')), chunk_size)),
+                                 json.loads(document), (document[:40], chunk_size))
+        for document in ['{"a": 1}', '[1 2]', '[1,', '[{"a":', '[1,]', '[,1]', '[1]x', '']:
+            with self.assertRaises(ValueError, msg=document):
+                list(iter_array(io.BytesIO(document.encode('utf-8')), 2))
+
+    def test_compressed_export_streamed(self):
+        path = self.path + '.gz'
+        with gzip.open(path, 'wt', encoding='utf-8') as fout:
+            json.dump(self.jissues, fout, ensure_ascii=False)
+        reads = []
+        with gzip.open(path, 'rb') as fin:
+            with patch.object(fin, 'read', side_effect=lambda *args: reads.append(args) or gzip.GzipFile.read(fin, *args)):
+                self.assertEqual(load_stream(fin, 'json'), self.jissues)
+        # Read in chunks, never as a whole
+        self.assertNotIn((), reads)
+        for name in available_backends():
+            self.assertEqual(load_export(path, name), self.jissues, name)
+
+    def test_identical_issues(self):
+        expected = [issue_as_dict(Issue(jissue)) for jissue in self.jissues]
+        for name in available_backends():
+            self.assertEqual(load_export(self.path, name), self.jissues)
+            data_loader._ISSUES = None
+            parameters = {'ENPM611_PROJECT_DATA_PATH': self.path, 'ENPM611_PROJECT_JSON_BACKEND': name}
+            with patch('config.get_parameter', parameters.get):
+                issues = DataLoader().get_issues()
+            self.assertEqual([issue_as_dict(issue) for issue in issues], expected, name)
+
+
+if __name__ == "__main__":
+    unittest.main()
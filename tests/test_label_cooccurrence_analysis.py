@@ -0,0 +1,87 @@
+import itertools
+import unittest
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+from analysis.label_cooccurrence_analysis import (LabelCooccurrenceAnalysis, cooccurrence_matrix, incidence,
+                                                  label_cooccurrence)
+from data.columnar import ColumnarIssues
+from tests.helpers import AnalysisTestCase, make_issue
+
+
+class TestLabelCooccurrenceAnalysis(AnalysisTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issues = [
+            make_issue(1, labels=['kind/bug', 'area/cli', 'status/triage']),
+            make_issue(2, labels=['kind/bug', 'area/cli']),
+            make_issue(3, labels=['kind/feature', 'area/cli', 'area/cli']),
+            make_issue(4, labels=['kind/bug'], creator='user2'),
+            make_issue(5, labels=[]),
+        ]
+        self.dataset = ColumnarIssues.from_issues(self.issues)
+
+    def test_incidence(self):
+        offsets, columns, names = incidence(self.dataset)
+        self.assertEqual(names, ['kind/bug', 'area/cli', 'status/triage', 'kind/feature'])
+        # The repeated label of issue 3 counts once
+        self.assertEqual(offsets.tolist(), [0, 3, 5, 7, 8, 8])
+        self.assertEqual(columns.tolist(), [0, 1, 2, 0, 1, 1, 3, 0])
+
+    def test_label_cooccurrence(self):
+        label_counts, pairs = label_cooccurrence(self.dataset)
+        self.assertEqual(label_counts.to_dict(), {'kind/bug': 3, 'area/cli': 3, 'status/triage': 1,
+                                                  'kind/feature': 1})
+        self.assertEqual(list(label_counts.index), ['kind/bug', 'area/cli', 'status/triage', 'kind/feature'])
+        top = pairs.iloc[0]
+        self.assertEqual((top['label_a'], top['label_b'], top['issues']), ('kind/bug', 'area/cli', 2))
+        self.assertAlmostEqual(top['lift'], 2 * 5 / (3 * 3))
+        self.assertAlmostEqual(top['jaccard'], 2 / 4)
+        self.assertEqual(len(pairs), 4)
+        self.assertEqual(set(zip(pairs['label_a'], pairs['label_b'])),
+                         {('kind/bug', 'area/cli'), ('kind/bug', 'status/triage'),
+                          ('area/cli', 'status/triage'), ('area/cli', 'kind/feature')})
+
+    def test_cooccurrence_matrix(self):
+        label_counts, pairs = label_cooccurrence(self.dataset)
+        matrix = cooccurrence_matrix(label_counts, pairs, ['area/cli', 'kind/bug', 'kind/feature'])
+        self.assertEqual(matrix.tolist(), [[3, 2, 1], [2, 3, 0], [1, 0, 1]])
+
+    def test_matches_loop(self):
+        rng = np.random.default_rng(611)
+        vocabulary = [f'label{i}' for i in range(12)]
+        issues = [make_issue(number, labels=rng.choice(vocabulary, size=int(rng.integers(0, 6))).tolist())
+                  for number in range(300)]
+        label_counts, pairs = label_cooccurrence(ColumnarIssues.from_issues(issues))
+        expected = {}
+        for issue in issues:
+            for label_a, label_b in itertools.combinations(sorted(set(issue.labels)), 2):
+                expected[(label_a, label_b)] = expected.get((label_a, label_b), 0) + 1
+        actual = {tuple(sorted((label_a, label_b))): count
+                  for label_a, label_b, count in zip(pairs['label_a'], pairs['label_b'], pairs['issues'])}
+        self.assertEqual(actual, expected)
+        for label, count in label_counts.items():
+            self.assertEqual(count, sum(label in issue.labels for issue in issues))
+
+    def test_no_labels(self):
+        label_counts, pairs = label_cooccurrence(ColumnarIssues.from_issues([make_issue(1, labels=[])]))
+        self.assertTrue(label_counts.empty)
+        self.assertTrue(pairs.empty)
+
+    def test_run(self):
+        output = self.run_analysis(LabelCooccurrenceAnalysis)
+        self.assertIn('Top 20 label pairs:', output)
+        self.assertRegex(output, r'kind/bug\s+area/cli\s+2\s+1\.11\s+0\.50')
+
+    def test_run_with_filters(self):
+        output = self.run_analysis(LabelCooccurrenceAnalysis, label='area/cli')
+        self.assertIn("Labels used together with 'area/cli' (3 issues):", output)
+        self.assertRegex(output, r'kind/feature\s+1')
+        self.assertIn('No issues with more than one label found.', self.run_analysis(LabelCooccurrenceAnalysis, user='user2'))
+
+
+if __name__ == "__main__":
+    unittest.main()
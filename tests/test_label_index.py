@@ -0,0 +1,112 @@
+import unittest
+import copy
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+
+import data.data_loader as data_loader
+from benchmarks.synthetic import generate_export
+from data.columnar import ColumnarIssues
+from data.data_loader import DataLoader
+from data.issue_cache import IssueCache
+from data.issue_filter import parse_filter
+from data.label_index import LabelIndex, label_index
+from models.model import Issue
+
+
+class TestLabelIndex(unittest.TestCase):
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        data_loader._FILTERED_COLUMNS = None
+        data_loader._DATASET = None
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmpdir.name, 'issues.json')
+        # 301 rows, so that the last byte of the bitmaps is padded
+        self.jissues = generate_export(301)
+        with open(self.json_path, 'w') as fout:
+            json.dump(self.jissues, fout)
+        self.issues = [Issue(jissue) for jissue in self.jissues]
+
+    def tearDown(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        data_loader._FILTERED_COLUMNS = None
+        data_loader._DATASET = None
+        self.tmpdir.cleanup()
+
+    def rows_with(self, condition):
+        return [row for row, issue in enumerate(self.issues) if condition(set(issue.labels))]
+
+    def test_build(self):
+        index = LabelIndex.build(ColumnarIssues.from_issues(self.issues))
+        self.assertEqual(len(index), 301)
+        self.assertEqual(index.bitmaps.shape[1], 38)
+        for label in ['kind/bug', 'area/cli', 'status/duplicate']:
+            bitmap = index.bitmap(label)
+            self.assertEqual(np.flatnonzero(index.to_mask(bitmap)).tolist(),
+                             self.rows_with(lambda labels: label in labels), label)
+            self.assertEqual(LabelIndex.count(bitmap), len(self.rows_with(lambda labels: label in labels)))
+        self.assertEqual(LabelIndex.count(index.bitmap('unknown')), 0)
+
+    def test_set_operations(self):
+        index = LabelIndex.build(ColumnarIssues.from_issues(self.issues))
+        self.assertEqual(np.flatnonzero(index.to_mask(index.all_of(['kind/bug', 'area/cli']))).tolist(),
+                         self.rows_with(lambda labels: {'kind/bug', 'area/cli'} <= labels))
+        self.assertEqual(np.flatnonzero(index.to_mask(index.any_of(['kind/bug', 'area/cli', 'unknown']))).tolist(),
+                         self.rows_with(lambda labels: labels & {'kind/bug', 'area/cli'}))
+        self.assertEqual(LabelIndex.count(index.all_of(['kind/bug', 'unknown'])), 0)
+        # Inverting does not set the padding bits after the last row
+        not_bug = index.invert(index.bitmap('kind/bug'))
+        self.assertEqual(LabelIndex.count(not_bug), len(self.rows_with(lambda labels: 'kind/bug' not in labels)))
+        self.assertEqual(LabelIndex.count(index.all_of([])), 301)
+
+    def test_repeated_and_missing_labels(self):
+        jissues = copy.deepcopy(self.jissues[:3])
+        jissues[0]['labels'] = ['kind/bug', 'kind/bug']
+        jissues[1]['labels'] = [None, 'area/cli']
+        index = LabelIndex.build(ColumnarIssues.from_issues([Issue(jissue) for jissue in jissues]))
+        self.assertEqual(index.to_mask(index.bitmap('kind/bug')).tolist()[:2], [True, False])
+        self.assertEqual(index.to_mask(index.bitmap('area/cli')).tolist()[:2], [False, True])
+
+    def test_filter_uses_index(self):
+        dataset = ColumnarIssues.from_issues(self.issues)
+        issue_filter = parse_filter('labels:"kind/bug AND NOT status/duplicate" -label:area/cli')
+        mask = issue_filter.mask(dataset)
+        self.assertIsNotNone(dataset.label_index)
+        self.assertEqual(np.flatnonzero(mask).tolist(),
+                         [row for row, issue in enumerate(self.issues) if issue_filter.matches(issue)])
+        # The index is kept with the dataset
+        index = dataset.label_index
+        parse_filter('label:kind/feature').mask(dataset)
+        self.assertIs(label_index(dataset), index)
+
+    def test_persisted_with_cache(self):
+        cache = IssueCache(os.path.join(self.tmpdir.name, 'cache'))
+        dataset, _ = cache.ingest(self.json_path)
+        loaded = cache.load()
+        self.assertIsNotNone(loaded.label_index)
+        self.assertIsInstance(loaded.label_index.bitmaps, np.memmap)
+        self.assertEqual(loaded.columns.loaded(), [])
+        issue_filter = parse_filter('labels:"kind/bug OR area/cli"')
+        self.assertEqual(issue_filter.mask(loaded).tolist(), issue_filter.mask(dataset).tolist())
+        # Label filters are answered from the bitmaps, without reading the label columns
+        self.assertFalse([name for name in loaded.columns.loaded() if name.startswith('label_')])
+        # A changed cache invalidates the index until it is built again
+        cache.save(dataset)
+        self.assertIsNone(cache.load().label_index)
+        parameters = {'ENPM611_PROJECT_DATA_PATH': self.json_path, 'ENPM611_PROJECT_CACHE_PATH': cache.path,
+                      'filter': 'labels:"kind/bug AND NOT area/cli"'}
+        with patch('config.get_parameter', parameters.get):
+            numbers = sorted(DataLoader().get_columns()['number'].tolist())
+        self.assertIsNotNone(cache.load().label_index)
+        self.assertEqual(numbers, sorted(issue.number for issue in self.issues
+                                         if 'kind/bug' in issue.labels and 'area/cli' not in issue.labels))
+
+
+if __name__ == "__main__":
+    unittest.main()
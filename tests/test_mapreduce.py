@@ -0,0 +1,53 @@
+import unittest
+from functools import partial
+from unittest.mock import patch
+
+from analysis import mapreduce
+from analysis.mapreduce import map_reduce, shard, combine_counts, combine_nested_counts, combine_lists
+from analysis.label_trend_analysis import map_label_trend
+from analysis.issue_analysis import map_label_counts
+from analysis.user_specific_issue_analysis import map_user_interactions, combine_user_interactions
+from benchmarks.synthetic import generate_export
+from models.model import Issue
+
+
+class TestMapReduce(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.issues = [Issue(jissue) for jissue in generate_export(300)]
+
+    def test_shard(self):
+        shards = shard(list(range(10)), 4)
+        self.assertEqual([len(s) for s in shards], [3, 3, 2, 2])
+        self.assertEqual(sum(shards, []), list(range(10)))
+        self.assertEqual(shard([1], 4), [[1]])
+
+    def test_combine_steps(self):
+        self.assertEqual(combine_counts({'a': 1}, {'a': 2, 'b': 1}), {'a': 3, 'b': 1})
+        self.assertEqual(combine_nested_counts({'a': {'x': 1}}, {'a': {'x': 1, 'y': 2}, 'b': {'x': 1}}),
+                         {'a': {'x': 2, 'y': 2}, 'b': {'x': 1}})
+        self.assertEqual(combine_lists([1], [2, 3]), [1, 2, 3])
+
+    def test_serial_below_threshold(self):
+        with patch('analysis.mapreduce.ProcessPoolExecutor') as executor:
+            result = map_reduce(self.issues, map_label_counts, combine_counts, workers=4, threshold=1000)
+        executor.assert_not_called()
+        self.assertEqual(result, map_label_counts(self.issues))
+
+    def test_parallel_matches_serial(self):
+        self.assertEqual(map_reduce(self.issues, map_label_trend, combine_nested_counts, workers=2, threshold=0),
+                         map_label_trend(self.issues))
+        map_step = partial(map_user_interactions, user='user1')
+        self.assertEqual(map_reduce(self.issues, map_step, combine_user_interactions, workers=2, threshold=0),
+                         map_step(self.issues))
+
+    def test_parameters_from_config(self):
+        parameters = {'ENPM611_PROJECT_WORKERS': '3', 'ENPM611_PROJECT_PARALLEL_THRESHOLD': 'not a number'}
+        with patch('config.get_parameter', parameters.get):
+            self.assertEqual(mapreduce.get_workers(), 3)
+            self.assertEqual(mapreduce.get_parallel_threshold(), mapreduce.DEFAULT_PARALLEL_THRESHOLD)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import copy
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import data.data_loader as data_loader
+from data.data_loader import DataLoader
+from data.export_file import load_exports, resolve_exports, repository_name
+from data.issue_cache import IssueCache
+from tests.test_sqlite_store import mock_issues_data
+from models.model import repository_of
+
+
+def _shard(repository:str):
+    """
+    The mock issues as exported from another repository (same issue numbers).
+    """
+    jissues = copy.deepcopy(mock_issues_data)
+    for jissue in jissues:
+        jissue['url'] = f"https://github.com/{repository}/issues/{jissue['number']}"
+    return jissues
+
+
+class TestMultiExport(unittest.TestCase):
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.exports = os.path.join(self.tmpdir.name, 'exports')
+        os.makedirs(self.exports)
+        for name, jissues in [('poetry.json', _shard('python-poetry/poetry')),
+                              ('pip.json', _shard('pypa/pip')),
+                              ('local.json', mock_issues_data)]:
+            with open(os.path.join(self.exports, name), 'w') as fout:
+                json.dump(jissues, fout)
+        with open(os.path.join(self.exports, 'notes.txt'), 'w') as fout:
+            fout.write('not an export')
+
+    def tearDown(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        self.tmpdir.cleanup()
+
+    def test_repository_of(self):
+        self.assertEqual(repository_of({'url': 'https://github.com/python-poetry/poetry/issues/1'}),
+                         'python-poetry/poetry')
+        self.assertEqual(repository_of({'url': 'https://api.github.com/repos/pypa/pip/issues/2'}), 'pypa/pip')
+        self.assertEqual(repository_of({'repository': 'a/b', 'url': 'https://github.com/c/d/issues/1'}), 'a/b')
+        self.assertIsNone(repository_of({'url': 'https://github.com/user1/issue1'}))
+        self.assertEqual(repository_name('/data/poetry_issues.json.gz'), 'poetry_issues')
+
+    def test_resolve_exports(self):
+        names = ['local.json', 'pip.json', 'poetry.json']
+        self.assertEqual(resolve_exports(self.exports), [os.path.join(self.exports, n) for n in names])
+        self.assertEqual(resolve_exports(os.path.join(self.exports, 'p*.json')),
+                         [os.path.join(self.exports, n) for n in names[1:]])
+        with self.assertRaises(FileNotFoundError):
+            resolve_exports(os.path.join(self.exports, '*.xml'))
+
+    def test_load_exports_tags_repository(self):
+        for workers in [1, 2]:
+            jissues = load_exports(self.exports, workers=workers)
+            self.assertEqual([jissue['repository'] for jissue in jissues],
+                             ['local'] * 2 + ['pypa/pip'] * 2 + ['python-poetry/poetry'] * 2)
+
+    def _load(self, parameters, issue_filter=None):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        parameters = dict(parameters, ENPM611_PROJECT_DATA_PATH=self.exports, filter=issue_filter)
+        with patch('config.get_parameter', parameters.get):
+            return DataLoader().get_issues()
+
+    def test_backends(self):
+        for storage in [{}, {'ENPM611_PROJECT_STORAGE': 'sqlite'},
+                        {'ENPM611_PROJECT_CACHE_PATH': os.path.join(self.tmpdir.name, 'cache')}]:
+            issues = self._load(storage)
+            # Issues with the same number in different repositories are kept apart
+            self.assertEqual(sorted((issue.repository, issue.number) for issue in issues),
+                             sorted((repository, number) for repository in ['local', 'pypa/pip', 'python-poetry/poetry']
+                                    for number in [1, 2]))
+            issues = self._load(storage, 'repository:pypa/pip,local -number:2')
+            self.assertEqual(sorted((issue.repository, issue.number) for issue in issues),
+                             [('local', 1), ('pypa/pip', 1)])
+        self.assertTrue(os.path.exists(os.path.join(self.exports, 'issues.sqlite')))
+
+    def test_incremental_ingest_by_repository(self):
+        cache = IssueCache(os.path.join(self.tmpdir.name, 'cache'))
+        cache.ingest(self.exports)
+        # Change issue 1 of pip only
+        jissues = _shard('pypa/pip')
+        jissues[0]['title'] = 'changed'
+        jissues[0]['updated_date'] = '2024-01-01T00:00:00+00:00'
+        with open(os.path.join(self.exports, 'pip.json'), 'w') as fout:
+            json.dump(jissues, fout)
+        _, report = cache.ingest(self.exports)
+        self.assertEqual((report.added, report.updated, report.unchanged, report.removed), (0, 1, 5, 0))
+        dataset = cache.load()
+        titles = {(repository, number): title for repository, number, title in
+                  zip(dataset.text('repository'), dataset['number'], dataset.text('title'))}
+        self.assertEqual(titles[('pypa/pip', 1)], 'changed')
+        self.assertNotEqual(titles[('python-poetry/poetry', 1)], 'changed')
+        self.assertEqual(len(dataset), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import data.data_loader as data_loader
+import profiling
+from data.data_loader import DataLoader
+from data.result_cache import ResultCache, code_version, result_key
+from tests.test_sqlite_store import mock_issues_data
+
+
+class FakeClock:
+    """
+    Clock advancing by one second on every reading.
+    """
+
+    def __init__(self):
+        self.now = 10**18
+
+    def __call__(self):
+        self.now += 10**9
+        return self.now
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'results')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_get_put(self):
+        cache = ResultCache(self.path, 2**20)
+        self.assertEqual(cache.get('a'), (False, None))
+        cache.put('a', {'labels': {'kind/bug': 3}})
+        self.assertEqual(cache.get('a'), (True, {'labels': {'kind/bug': 3}}))
+        cache.put('b', None)
+        self.assertEqual(cache.get('b'), (True, None))
+        self.assertEqual(cache.clear(), 2)
+        self.assertEqual(cache.get('a'), (False, None))
+
+    def test_least_recently_used_evicted(self):
+        cache = ResultCache(self.path, 2**20, clock=FakeClock())
+        cache.put('a', 'x' * 1000)
+        entry_size = cache.size()
+        cache.max_bytes = 2 * entry_size
+        cache.put('b', 'y' * 1000)
+        # Reading 'a' makes 'b' the least recently used entry
+        self.assertTrue(cache.get('a')[0])
+        cache.put('c', 'z' * 1000)
+        self.assertTrue(cache.get('a')[0])
+        self.assertFalse(cache.get('b')[0])
+        self.assertTrue(cache.get('c')[0])
+        self.assertLessEqual(cache.size(), cache.max_bytes)
+
+    def test_oversized_result_not_stored(self):
+        cache = ResultCache(self.path, 100)
+        cache.put('a', 'x' * 1000)
+        self.assertEqual(cache.get('a'), (False, None))
+        self.assertEqual(cache.entries(), [])
+
+    def test_unreadable_entry_removed(self):
+        cache = ResultCache(self.path, 2**20)
+        cache.put('a', [1, 2, 3])
+        with open(cache.entries()[0][0], 'wb') as fout:
+            fout.write(b'not a pickle')
+        self.assertEqual(cache.get('a'), (False, None))
+        self.assertEqual(cache.entries(), [])
+
+    def test_result_key(self):
+        key = result_key('export', 'label_trend', 'code', {'user': 'a', 'label': None})
+        self.assertEqual(key, result_key('export', 'label_trend', 'code', {'label': None, 'user': 'a'}))
+        for other in [result_key('changed', 'label_trend', 'code', {'user': 'a', 'label': None}),
+                      result_key('export', 'example', 'code', {'user': 'a', 'label': None}),
+                      result_key('export', 'label_trend', 'changed', {'user': 'a', 'label': None}),
+                      result_key('export', 'label_trend', 'code', {'user': 'b', 'label': None})]:
+            self.assertNotEqual(key, other)
+        self.assertEqual(code_version(__name__), code_version(__name__))
+        self.assertNotEqual(code_version(__name__), code_version('data.result_cache'))
+
+    def test_code_version_of_packages(self):
+        # The code version changes with any module of the packages, not only with the analysis module
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, 'data'))
+            helper = os.path.join(root, 'data', 'helper.py')
+            versions = []
+            for source in ['def helper(): return 1\n', 'def helper(): return 2\n', 'def helper(): return 2\n']:
+                with open(helper, 'w') as fout:
+                    fout.write(source)
+                with patch('data.result_cache._ROOT', root), patch('data.result_cache._CODE_VERSIONS', {}), \
+                        patch('data.result_cache._PACKAGES_VERSION', []):
+                    versions.append(code_version(__name__))
+        self.assertNotEqual(versions[0], versions[1])
+        self.assertEqual(versions[1], versions[2])
+
+
+class TestDataLoaderResults(unittest.TestCase):
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        profiling.reset()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.export_path = os.path.join(self.tmpdir.name, 'issues.json')
+        with open(self.export_path, 'w') as fout:
+            json.dump(mock_issues_data, fout)
+        self.parameters = {
+            'ENPM611_PROJECT_DATA_PATH': self.export_path,
+            'ENPM611_PROJECT_RESULT_CACHE_PATH': os.path.join(self.tmpdir.name, 'results'),
+        }
+        self.computed = 0
+
+    def tearDown(self):
+        data_loader._ISSUES = None
+        profiling.reset()
+        self.tmpdir.cleanup()
+
+    def compute(self):
+        self.computed += 1
+        return {'issues': len(DataLoader().get_issues())}
+
+    def get_result(self, params=None, **parameters):
+        with patch('config.get_parameter', dict(self.parameters, **parameters).get), patch('builtins.print'):
+            return DataLoader().get_result('count', params or {}, self.compute)
+
+    def test_repeated_query_from_cache(self):
+        self.assertEqual(self.get_result({'user': 'user1'}), {'issues': 2})
+        data_loader._ISSUES = None
+        self.assertEqual(self.get_result({'user': 'user1'}), {'issues': 2})
+        self.assertEqual(self.computed, 1)
+        # The issues were not loaded again
+        self.assertIsNone(data_loader._ISSUES)
+        self.assertEqual(profiling.get_counters(), {'result cache misses': 1, 'result cache hits': 1})
+
+    def test_parameters_and_filter_in_key(self):
+        self.get_result({'user': 'user1'})
+        self.get_result({'user': 'user2'})
+        self.get_result({'user': 'user1'}, filter='state:open')
+        self.assertEqual(self.computed, 3)
+        self.get_result({'user': 'user2'})
+        self.assertEqual(self.computed, 3)
+
+    def test_changed_export_computed_again(self):
+        self.get_result()
+        with open(self.export_path, 'w') as fout:
+            json.dump(mock_issues_data[:1], fout)
+        os.utime(self.export_path, ns=(0, 0))
+        data_loader._ISSUES = None
+        self.assertEqual(self.get_result(), {'issues': 1})
+        self.assertEqual(self.computed, 2)
+
+    def test_bypass_and_clear(self):
+        self.get_result()
+        self.get_result(no_result_cache=True)
+        self.assertEqual(self.computed, 2)
+        with patch('config.get_parameter', self.parameters.get):
+            self.assertEqual(DataLoader().clear_results(), 1)
+        self.get_result()
+        self.assertEqual(self.computed, 3)
+
+    def test_disabled_without_path(self):
+        self.get_result(ENPM611_PROJECT_RESULT_CACHE_PATH=None)
+        self.get_result(ENPM611_PROJECT_RESULT_CACHE_PATH=None)
+        self.assertEqual(self.computed, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, 'results')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+import plotly.graph_objects as go
+
+import profiling
+import results
+
+
+class TestChartCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmpdir.name, 'output')
+        results.set_output_dir(self.output_dir)
+        results.set_chart_cache(os.path.join(self.tmpdir.name, 'charts'))
+        profiling.reset()
+
+    def tearDown(self):
+        results.set_output_dir(None)
+        results.set_chart_cache(None)
+        profiling.reset()
+        self.tmpdir.cleanup()
+
+    def plot(self, counts, name='chart'):
+        plt.figure(figsize=(8, 6))
+        plt.bar(list(counts), list(counts.values()))
+        results.show(name, data=counts)
+
+    def test_unchanged_chart_copied(self):
+        with patch('matplotlib.pyplot.savefig', wraps=plt.savefig) as mock_savefig:
+            self.plot({'kind/bug': 3, 'kind/feature': 1})
+            with open(os.path.join(self.output_dir, 'chart.png'), 'rb') as fin:
+                rendered = fin.read()
+            os.remove(os.path.join(self.output_dir, 'chart.png'))
+            self.plot({'kind/bug': 3, 'kind/feature': 1})
+        mock_savefig.assert_called_once()
+        with open(os.path.join(self.output_dir, 'chart.png'), 'rb') as fin:
+            self.assertEqual(fin.read(), rendered)
+        self.assertEqual(profiling.get_counters(), {'chart cache misses': 1, 'chart cache hits': 1})
+        self.assertEqual(profiling.hit_rates(), {'chart cache': 0.5})
+        self.assertIn('chart cache', profiling.summary())
+
+    def test_changed_chart_rendered(self):
+        with patch('matplotlib.pyplot.savefig', wraps=plt.savefig) as mock_savefig:
+            self.plot({'kind/bug': 3, 'kind/feature': 1})
+            self.plot({'kind/bug': 3, 'kind/feature': 2})
+            # The same data under another chart name
+            self.plot({'kind/bug': 3, 'kind/feature': 1}, name='other')
+        self.assertEqual(mock_savefig.call_count, 3)
+        self.assertEqual(profiling.get_counters(), {'chart cache misses': 3})
+
+    def test_chart_key(self):
+        df = pd.DataFrame({'kind/bug': [1, 2]}, index=['2023-01', '2023-02'])
+        self.assertEqual(results.chart_key('trend', df), results.chart_key('trend', df.copy()))
+        self.assertNotEqual(results.chart_key('trend', df), results.chart_key('trend', df * 2))
+        self.assertNotEqual(results.chart_key('trend', df), results.chart_key('trend', df.rename(columns={'kind/bug': 'x'})))
+        self.assertNotEqual(results.chart_key([1, 2]), results.chart_key([2, 1]))
+
+    def test_without_data_rendered(self):
+        with patch('matplotlib.pyplot.savefig', wraps=plt.savefig) as mock_savefig:
+            for _ in range(2):
+                plt.figure()
+                plt.plot([1, 2], [3, 4])
+                results.show('chart')
+        self.assertEqual(mock_savefig.call_count, 2)
+        self.assertEqual(profiling.get_counters(), {})
+
+    def test_plotly_chart_copied(self):
+        fig = go.Figure(go.Bar(x=['a'], y=[1]))
+        with patch.object(fig, 'write_html', wraps=fig.write_html) as mock_write_html:
+            results.show_plotly(fig, 'plotly chart')
+            results.show_plotly(fig, 'plotly chart')
+        mock_write_html.assert_called_once()
+        self.assertTrue(os.path.getsize(os.path.join(self.output_dir, 'plotly chart.html')) > 0)
+        self.assertEqual(profiling.hit_rates(), {'chart cache': 0.5})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import copy
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+
+import data.data_loader as data_loader
+from analysis.search_analysis import search_issues
+from benchmarks.synthetic import generate_export
+from data.columnar import ColumnarIssues
+from data.data_loader import DataLoader
+from data.issue_cache import IssueCache
+from data.search_index import SearchIndex, parse_query, tokenize
+from models.model import Issue
+from tests.test_sqlite_store import mock_issues_data
+
+
+def _fields(issue:Issue):
+    return [issue.title, issue.text] + [event.comment for event in issue.events]
+
+
+def _naive_matches(issue:Issue, query:str) -> bool:
+    """
+    Evaluates a query by scanning the text of the issue.
+    """
+    fields = [tokenize(field) for field in _fields(issue)]
+    for terms in parse_query(query):
+        if not any(fields[i][j:j + len(terms)] == terms
+                   for i in range(len(fields)) for j in range(len(fields[i]))):
+            return False
+    return True
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        data_loader._SEARCH = None
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmpdir.name, 'issues.json')
+        self.jissues = generate_export(300)
+        with open(self.json_path, 'w') as fout:
+            json.dump(self.jissues, fout)
+        self.issues = [Issue(jissue) for jissue in self.jissues]
+
+    def tearDown(self):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        data_loader._SEARCH = None
+        self.tmpdir.cleanup()
+
+    def test_parse_query(self):
+        self.assertEqual(tokenize('Poetry-Lock fails: v1.2'), ['poetry', 'lock', 'fails', 'v1', '2'])
+        self.assertEqual(parse_query('Lock "dependency  Resolver" ""'), [['lock'], ['dependency', 'resolver']])
+        self.assertEqual(parse_query(''), [])
+
+    def test_matches_naive_scan(self):
+        index = SearchIndex.build(ColumnarIssues.from_issues(self.issues))
+        for query in ['resolver', 'lock wheel', '"dependency resolver"', '"poetry install fails" cache',
+                      '"resolver resolver"', 'unknownword', '"error unknownword"']:
+            rows = sorted(row for row, _ in index.search(query))
+            expected = [row for row, issue in enumerate(self.issues) if _naive_matches(issue, query)]
+            self.assertEqual(rows, expected, query)
+        # Phrases do not match across the title and the body
+        issues = [Issue(dict(mock_issues_data[0], title='poetry lock', text='fails'))]
+        index = SearchIndex.build(ColumnarIssues.from_issues(issues))
+        self.assertEqual(index.search('"lock fails"'), [])
+        self.assertEqual([row for row, _ in index.search('"poetry lock" fails')], [0])
+
+    def test_ranking(self):
+        jissues = []
+        for number, text in enumerate(['resolver', 'resolver resolver', 'lock', 'resolver lock'], 1):
+            jissues.append(dict(mock_issues_data[1], number=number, title='', text=text))
+        index = SearchIndex.build(ColumnarIssues.from_issues([Issue(jissue) for jissue in jissues]))
+        results = index.search('resolver')
+        self.assertEqual([row for row, _ in results], [1, 0, 3])
+        self.assertTrue(all(a[1] >= b[1] for a, b in zip(results, results[1:])))
+        self.assertEqual([row for row, _ in index.search('resolver', limit=2)], [1, 0])
+        mask = np.array([True, False, True, True])
+        self.assertEqual([row for row, _ in index.search('resolver', mask=mask)], [0, 3])
+
+    def expected_numbers(self, query:str, issues=None):
+        issues = issues if issues is not None else self.issues
+        return sorted(issue.number for issue in issues if _naive_matches(issue, query))
+
+    def search_numbers(self, query:str):
+        data_loader._ISSUES = None
+        data_loader._COLUMNS = None
+        data_loader._SEARCH = None
+        parameters = {'ENPM611_PROJECT_DATA_PATH': self.json_path,
+                      'ENPM611_PROJECT_CACHE_PATH': os.path.join(self.tmpdir.name, 'cache')}
+        with patch('config.get_parameter', parameters.get):
+            dataset, index = DataLoader().get_search_index()
+        return sorted(dataset['number'][[row for row, _ in index.search(query)]].tolist())
+
+    def test_persisted_with_cache(self):
+        cache = IssueCache(os.path.join(self.tmpdir.name, 'cache'))
+        cache.ingest(self.json_path)
+        # The index is built by the first search, not by the ingestion
+        self.assertIsNone(cache.load_search_index())
+        self.assertEqual(self.search_numbers('"dependency resolver"'), self.expected_numbers('"dependency resolver"'))
+        index = cache.load_search_index()
+        self.assertIsNotNone(index)
+        # A changed export invalidates the index until it is built again
+        jissues = copy.deepcopy(self.jissues)
+        jissues[0]['title'] = 'zebra'
+        jissues[0]['updated_date'] = '2030-01-01T00:00:00+00:00'
+        with open(self.json_path, 'w') as fout:
+            json.dump(jissues, fout)
+        cache.ingest(self.json_path)
+        self.assertIsNone(cache.load_search_index())
+        self.assertEqual(self.search_numbers('zebra'), [self.jissues[0]['number']])
+        self.assertIsNotNone(cache.load_search_index())
+
+    def test_saved_versions(self):
+        path = os.path.join(self.tmpdir.name, 'search')
+        first = SearchIndex.build(ColumnarIssues.from_issues(self.issues))
+        second = SearchIndex.build(ColumnarIssues.from_issues(self.issues[:10]))
+        first.save(path, 'v1')
+        second.save(path, 'v2')
+        self.assertIsNone(SearchIndex.load(path, 'v1'))
+        self.assertEqual(SearchIndex.load(path, 'v2').search('lock'), second.search('lock'))
+        # A reader that read the metadata of the previous index still finds its arrays
+        self.assertTrue(np.array_equal(np.load(os.path.join(path, 'positions.v1.npy')), first.arrays['positions']))
+        # The arrays of older versions are removed
+        second.save(path, 'v3')
+        self.assertEqual(sorted(file for file in os.listdir(path) if file.startswith('positions')),
+                         ['positions.v2.npy', 'positions.v3.npy'])
+
+    def test_search_issues(self):
+        query = 'lock "dependency resolver"'
+        for storage in [{}, {'ENPM611_PROJECT_CACHE_PATH': os.path.join(self.tmpdir.name, 'cache')}]:
+            for user, label, expression in [(None, None, None), ('user479', None, None), (None, 'kind/bug', None),
+                                            ('user92', 'kind/bug', 'state:closed')]:
+                data_loader._ISSUES = None
+                data_loader._COLUMNS = None
+                data_loader._SEARCH = None
+                parameters = dict(storage, ENPM611_PROJECT_DATA_PATH=self.json_path, filter=expression)
+                with patch('config.get_parameter', parameters.get):
+                    numbers = search_issues(query, user=user, label=label)
+                issues = [issue for issue in self.issues
+                          if (user is None or issue.creator == user or any(e.author == user for e in issue.events))
+                          and (label is None or label in issue.labels)
+                          and (expression is None or issue.state == 'closed')]
+                self.assertEqual(sorted(numbers), self.expected_numbers(query, issues), (storage, user, label))
+
+
+if __name__ == "__main__":
+    unittest.main()
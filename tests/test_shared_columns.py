@@ -0,0 +1,78 @@
+import unittest
+import gc
+import sys
+from functools import partial
+
+import numpy as np
+
+from analysis.mapreduce import map_reduce_columns
+from analysis.user_specific_issue_analysis import (map_user_interactions, map_user_interactions_columns,
+                                                   combine_user_interactions)
+from benchmarks.synthetic import generate_export
+from data import shared_columns
+from data.columnar import ColumnarIssues
+from data.shared_columns import SharedColumns, attach
+from models.model import Issue
+
+
+class TestSharedColumns(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.issues = [Issue(jissue) for jissue in generate_export(200)]
+        cls.dataset = ColumnarIssues.from_issues(cls.issues)
+
+    def tearDown(self):
+        shared_columns._ATTACHED.clear()
+
+    def test_attach_shares_buffers(self):
+        with SharedColumns(self.dataset) as shared:
+            attached = attach(shared.handle)
+            self.assertIs(attach(shared.handle), attached)
+            for name, values in self.dataset.columns.items():
+                np.testing.assert_array_equal(attached[name], values)
+            self.assertEqual(attached.users.values, self.dataset.users.values)
+            # Writes through one mapping are visible through another one
+            shared_columns._ATTACHED.clear()
+            attach(shared.handle)['number'][0] = -5
+            self.assertEqual(attached['number'][0], -5)
+
+    def test_close_releases_blocks(self):
+        shared = SharedColumns(self.dataset)
+        shared.close()
+        shared.close()
+        with self.assertRaises(FileNotFoundError):
+            attach(shared.handle)
+
+    def test_closed_finalizers_released(self):
+        # Nothing keeps the cleanup of a closed instance alive (e.g., across watch mode runs)
+        with SharedColumns(self.dataset) as shared:
+            finalizer = shared._finalizer
+        del shared
+        gc.collect()
+        self.assertFalse(finalizer.alive)
+        # Only referenced by the local variable (and the argument of getrefcount)
+        self.assertEqual(sys.getrefcount(finalizer), 2)
+
+    def test_columnar_map_step(self):
+        for user in ('user1', 'user42', 'unknown'):
+            expected = map_user_interactions(self.issues, user)
+            map_step = partial(map_user_interactions_columns, user=user)
+            self.assertEqual(map_step(self.dataset, 0, len(self.dataset)), expected)
+            self.assertEqual(map_reduce_columns(self.dataset, map_step, combine_user_interactions,
+                                                workers=2, threshold=0), expected)
+
+    def test_columnar_map_step_events_without_type(self):
+        # No closed events, and events without a type: these are not closings
+        jissue = {'number': 1, 'state': 'open', 'creator': 'user1', 'labels': [], 'events': [
+            {'event_type': None, 'author': 'user1', 'event_date': '2024-01-01T00:00:00Z'},
+            {'event_type': 'commented', 'author': 'user1', 'event_date': '2024-01-02T00:00:00Z'}]}
+        issues = [Issue(jissue)]
+        dataset = ColumnarIssues.from_issues(issues)
+        result = map_user_interactions_columns(dataset, 0, 1, user='user1')
+        self.assertEqual(result, map_user_interactions(issues, 'user1'))
+        self.assertEqual((result['commented'], result['closed']), (1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
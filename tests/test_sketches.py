@@ -0,0 +1,178 @@
+import math
+import random
+import unittest
+from collections import Counter
+from functools import partial
+
+from analysis.mapreduce import map_reduce
+import numpy as np
+
+from analysis.sketches import SpaceSaving, CountMinSketch, TopK, HyperLogLog, QuantileSketch, combine_sketches
+from analysis.example_analysis import map_creator_sketch
+from analysis.issue_analysis import map_label_counts, map_label_sketch
+from analysis.label_trend_analysis import map_label_trend, map_distinct_creators
+from benchmarks.synthetic import generate_export
+from models.model import Issue
+
+
+def zipf_stream(n:int, items:int=1000, seed:int=7):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(items)]
+    return rng.choices([f'item{rank}' for rank in range(items)], weights=weights, k=n)
+
+
+class TestSketches(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stream = zipf_stream(20000)
+        cls.counts = Counter(cls.stream)
+
+    def test_space_saving_bounds(self):
+        summary = SpaceSaving(100)
+        for item in self.stream:
+            summary.add(item)
+        bound = len(self.stream) / 100
+        for item, count in self.counts.items():
+            if count > bound:
+                self.assertIn(item, summary.counts)
+        for item, estimate in summary.counts.items():
+            self.assertGreaterEqual(estimate, self.counts[item])
+            self.assertLessEqual(estimate - self.counts[item], summary.errors[item])
+            self.assertLessEqual(summary.errors[item], bound)
+
+    def test_space_saving_evicts_smallest(self):
+        summary = SpaceSaving(20)
+        for i, item in enumerate(self.stream[:5000]):
+            if i == 2500:
+                # The heap of a merged summary is built from its counts
+                summary = summary.merge(SpaceSaving(20))
+            smallest = min(summary.counts.values()) if len(summary.counts) == summary.capacity else None
+            new = item not in summary.counts
+            summary.add(item)
+            if new and smallest is not None:
+                self.assertEqual(summary.errors[item], smallest)
+                self.assertEqual(len(summary.counts), summary.capacity)
+
+    def test_count_min_bounds(self):
+        sketch = CountMinSketch(width=512, depth=5)
+        for item in self.stream:
+            sketch.add(item)
+        bound = math.e * len(self.stream) / 512
+        for item, count in self.counts.items():
+            estimate = sketch.estimate(item)
+            self.assertGreaterEqual(estimate, count)
+            self.assertLessEqual(estimate - count, bound)
+
+    def test_top_k_matches_exact(self):
+        sketch = TopK(5)
+        for item in self.stream:
+            sketch.add(item)
+        self.assertEqual([item for item, _ in sketch.top()],
+                         [item for item, _ in self.counts.most_common(5)])
+        self.assertEqual(sketch.total, len(self.stream))
+
+    def test_top_k_merge(self):
+        half = len(self.stream) // 2
+        first, second = TopK(5), TopK(5)
+        for item in self.stream[:half]:
+            first.add(item)
+        for item in self.stream[half:]:
+            second.add(item)
+        merged = combine_sketches(first, second)
+        self.assertEqual([item for item, _ in merged.top()],
+                         [item for item, _ in self.counts.most_common(5)])
+        for item, estimate in merged.top():
+            self.assertGreaterEqual(estimate, self.counts[item])
+
+    def test_hyperloglog(self):
+        for distinct in [10, 1000, 50000]:
+            sketch = HyperLogLog(precision=12)
+            for i in range(distinct):
+                sketch.add(f'user{i}')
+                sketch.add(f'user{i}')
+            error = 3 * 1.04 / math.sqrt(1 << 12)
+            self.assertLessEqual(abs(sketch.estimate() - distinct), max(1, error * distinct))
+
+    def test_hyperloglog_merge(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for i in range(3000):
+            first.add(i)
+        for i in range(2000, 5000):
+            second.add(i)
+        merged = first.merge(second)
+        self.assertAlmostEqual(merged.estimate(), 5000, delta=5000 * 3 * 1.04 / 64)
+
+    def test_quantile_sketch_ranks(self):
+        values = np.random.default_rng(3).exponential(30, 100000)
+        sketch = QuantileSketch()
+        sketch.update(values)
+        self.assertEqual(sketch.count, len(values))
+        self.assertLess(sum(len(items) for items in sketch.compactors), 1000)
+        for q, estimate in zip([0.5, 0.9, 0.99], sketch.quantiles([0.5, 0.9, 0.99])):
+            self.assertAlmostEqual(np.mean(values <= estimate), q, delta=0.01)
+        self.assertEqual(sketch.quantiles([0, 1]), [values.min(), values.max()])
+
+    def test_quantile_sketch_merge(self):
+        values = np.random.default_rng(4).normal(100, 20, 40000)
+        shards = [QuantileSketch() for _ in range(4)]
+        for i, value in enumerate(values):
+            shards[i % 4].add(value)
+        merged = shards[0]
+        for sketch in shards[1:]:
+            merged = combine_sketches(merged, sketch)
+        self.assertEqual(merged.count, len(values))
+        for q, estimate in zip([0.5, 0.9, 0.99], merged.quantiles([0.5, 0.9, 0.99])):
+            self.assertAlmostEqual(np.mean(values <= estimate), q, delta=0.01)
+        counts, edges = merged.histogram(bins=10)
+        exact, _ = np.histogram(values, bins=edges)
+        self.assertLessEqual(np.abs(counts - exact).max(), 0.02 * len(values))
+
+    def test_quantile_sketch_json(self):
+        sketch = QuantileSketch(k=50)
+        sketch.update(range(1000))
+        restored = QuantileSketch.from_json(sketch.to_json())
+        self.assertEqual(restored.quantiles([0.1, 0.5, 0.9]), sketch.quantiles([0.1, 0.5, 0.9]))
+        self.assertEqual(QuantileSketch().quantile(0.5), None)
+
+
+class TestApproximateAnalyses(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.issues = [Issue(jissue) for jissue in generate_export(2000)]
+
+    def test_approximate_top_labels(self):
+        exact = sorted(map_label_counts(self.issues).items(), key=lambda x: x[1], reverse=True)[:5]
+        sketch = map_reduce(self.issues, map_label_sketch, combine_sketches, workers=2, threshold=0)
+        self.assertEqual(sorted(count for _, count in sketch.top(5)), sorted(count for _, count in exact))
+
+    def test_approximate_top_creators(self):
+        exact = Counter(issue.creator for issue in self.issues if issue.creator is not None)
+        sketch = map_reduce(self.issues, partial(map_creator_sketch, top_n=5), combine_sketches,
+                            workers=2, threshold=0)
+        # Creators are nearly uniform here, so only the error bound holds
+        bound = sum(exact.values()) / sketch.candidates.capacity
+        for creator, estimate in sketch.top(5):
+            self.assertGreaterEqual(estimate, exact[creator])
+            self.assertLessEqual(estimate, exact[creator] + bound)
+
+    def test_distinct_creators(self):
+        labels = set(map_label_trend(self.issues))
+        creators = map_reduce(self.issues, partial(map_distinct_creators, labels=labels), combine_sketches,
+                              workers=2, threshold=0)
+        for (label, month), sketch in creators.items():
+            exact = {issue.creator for issue in self.issues
+                     if label in issue.labels and issue.created_date
+                     and issue.created_date.strftime('%Y-%m') == month}
+            self.assertAlmostEqual(sketch.estimate(), len(exact), delta=max(1, 0.1 * len(exact)))
+
+    def test_label_trend_restricted_to_labels(self):
+        trend = map_label_trend(self.issues)
+        labels = set(list(trend)[:2])
+        self.assertEqual(map_label_trend(self.issues, labels=labels),
+                         {label: trend[label] for label in labels})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import data.data_loader as data_loader
+from data.data_loader import DataLoader
+from data.sqlite_store import SQLiteIssueStore
+from models.model import Issue
+
+mock_issues_data = [
+    {
+        "url": "https://github.com/user1/issue1",
+        "creator": "user1",
+        "labels": ["kind/bug", "status/triage"],
+        "state": "closed",
+        "assignees": ["user2"],
+        "title": "Issue 1 title",
+        "text": "Issue description",
+        "number": 1,
+        "created_date": "2024-11-01T00:00:00Z",
+        "updated_date": "2024-11-05T00:00:00Z",
+        "timeline_url": "https://github.com/user1/issue1/timeline",
+        "events": [
+            {"event_type": "commented", "author": "user3", "event_date": "2024-11-01T01:00:00Z", "comment": "A comment"},
+            {"event_type": "labeled", "author": "user2", "event_date": "2024-11-02T00:00:00Z", "label": "kind/bug"},
+            {"event_type": "closed", "author": "user2", "event_date": "2024-11-05T00:00:00Z"}
+        ]
+    },
+    {
+        "url": "https://github.com/user2/issue2",
+        "creator": "user2",
+        "labels": ["kind/feature"],
+        "state": "open",
+        "assignees": [],
+        "title": "Issue 2 title",
+        "text": "Feature request",
+        "number": 2,
+        "created_date": "2024-10-15T00:00:00Z",
+        "updated_date": "2024-10-16T00:00:00Z",
+        "timeline_url": "https://github.com/user2/issue2/timeline",
+        "events": []
+    }
+]
+
+
+def issue_as_dict(issue:Issue):
+    """Converts an issue (and its events) into a comparable dictionary."""
+    result = dict(vars(issue))
+    result['events'] = [vars(event) for event in issue.events]
+    return result
+
+
+class TestSQLiteIssueStore(unittest.TestCase):
+
+    def setUp(self):
+        data_loader._ISSUES = None
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmpdir.name, 'issues.json')
+        with open(self.json_path, 'w') as fout:
+            json.dump(mock_issues_data, fout)
+        self.store = SQLiteIssueStore(os.path.join(self.tmpdir.name, 'issues.sqlite'))
+
+    def tearDown(self):
+        self.store.close()
+        data_loader._ISSUES = None
+        self.tmpdir.cleanup()
+
+    def test_imports_only_once(self):
+        self.assertTrue(self.store.ensure_imported(self.json_path))
+        self.assertFalse(self.store.ensure_imported(self.json_path))
+        self.assertEqual(self.store.count_issues(), 2)
+
+    def test_query_reconstructs_issues(self):
+        self.store.ensure_imported(self.json_path)
+        expected = [issue_as_dict(Issue(jissue)) for jissue in mock_issues_data]
+        actual = [issue_as_dict(issue) for issue in self.store.query_issues()]
+        self.assertEqual(actual, expected)
+
+    def test_query_filters(self):
+        self.store.ensure_imported(self.json_path)
+        self.assertEqual([i.number for i in self.store.query_issues(label="kind/bug")], [1])
+        # user3 only commented on issue 1, user2 created issue 2 and closed issue 1
+        self.assertEqual([i.number for i in self.store.query_issues(user="user3")], [1])
+        self.assertEqual([i.number for i in self.store.query_issues(user="user2")], [1, 2])
+        self.assertEqual([i.number for i in self.store.query_issues(user="user2", label="kind/feature")], [2])
+        self.assertEqual(self.store.query_issues(user="nobody"), [])
+
+    def test_data_loader_sqlite_storage(self):
+        parameters = {
+            'ENPM611_PROJECT_DATA_PATH': self.json_path,
+            'ENPM611_PROJECT_STORAGE': 'sqlite',
+            'ENPM611_PROJECT_SQLITE_PATH': os.path.join(self.tmpdir.name, 'loader.sqlite'),
+        }
+        with patch('config.get_parameter', parameters.get):
+            loader = DataLoader()
+            self.assertEqual([i.number for i in loader.get_issues(label="kind/feature")], [2])
+            self.assertEqual(len(loader.get_issues()), 2)
+        self.assertTrue(os.path.isfile(parameters['ENPM611_PROJECT_SQLITE_PATH']))
+
+    def test_data_loader_json_filters(self):
+        with patch('config.get_parameter', {'ENPM611_PROJECT_DATA_PATH': self.json_path}.get):
+            loader = DataLoader()
+            self.assertEqual([i.number for i in loader.get_issues(user="user3")], [1])
+            self.assertEqual([i.number for i in loader.get_issues(label="kind/feature")], [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -152,6 +152,21 @@ class TestTimeBasedIssueAnalysis(unittest.TestCase):
         months = analysis.get_approx_months(days)
         self.assertEqual(months, 3)
 
+    def test_approx_months_column(self):
+        """Test the conversion of the days column to approximate months."""
+        analysis = TimeBasedIssueAnalysis()
+        issue = Issue({
+            "number": 4,
+            "creator": "user1",
+            "labels": ["bug"],
+            "state": "closed",
+            "created_date": "2024-07-14T13:13:00+00:00",
+            "events": [{"event_type": "closed", "author": "bram-tv", "event_date": "2024-10-12T13:13:00+00:00"}]
+        })
+        df = analysis.create_dataframe([issue, self.mock_issues[1]])
+        self.assertEqual(df["time_diff_in_days"].tolist(), [90, -61])
+        self.assertEqual(df["time_diff_in_months"].tolist(), [3, -2])
+
     def test_analyse_based_on_user(self):
         """Test user-specific analysis."""
         analysis = TimeBasedIssueAnalysis()
@@ -178,6 +193,41 @@ class TestTimeBasedIssueAnalysis(unittest.TestCase):
             # Ensure no plot is created for non-existent user
             mock_bar.assert_not_called()
 
+    def test_analyse_based_on_user_bars(self):
+        """Test that the user chart gets one segment per labels and time to close, colored by the time."""
+        analysis = TimeBasedIssueAnalysis()
+        closed_issues = [self.mock_issues[0], self.mock_issues[0], self.mock_issues[1]]
+        df = analysis.create_dataframe(closed_issues)
+
+        with patch("plotly.express.bar") as mock_bar:
+            analysis.analyse_based_on_user("user1", df)
+            bars = mock_bar.call_args[0][0]
+            self.assertEqual(mock_bar.call_args[1]["color"], "time_diff_in_days")
+            self.assertEqual(bars["labels"].tolist(), ["['bug']"])
+            self.assertEqual(bars["issues"].tolist(), [2])
+            self.assertEqual(bars["time_to_close"].tolist(), [2 * df["time_diff_in_days"].iloc[0]])
+
+    def test_analyse_closed_issues_per_creator(self):
+        """Test that the time-to-close chart gets one row per creator with its longest time."""
+        analysis = TimeBasedIssueAnalysis()
+        closed_issues = []
+        for number, (creator, days) in enumerate([("user1", 40), ("user1", 95), ("user2", 10), ("user1", 5)]):
+            closed_issues.append(Issue({
+                "number": number,
+                "creator": creator,
+                "labels": ["bug"],
+                "state": "closed",
+                "created_date": "2024-01-01T00:00:00+00:00",
+                "events": [{"event_type": "closed", "author": "user3",
+                            "event_date": (datetime(2024, 1, 1) + timedelta(days=days)).isoformat() + "+00:00"}]
+            }))
+        df = analysis.create_dataframe(closed_issues)
+
+        with patch("plotly.express.bar") as mock_bar:
+            analysis.analyse_closed_issues(df)
+            bars = mock_bar.call_args[0][0]
+            self.assertEqual(sorted(bars.columns), ["creator", "labels", "time_diff_in_months"])
+            self.assertEqual(sorted(zip(bars["creator"], bars["time_diff_in_months"])), [("user1", 3), ("user2", 0)])
 
 if __name__ == "__main__":
     unittest.main()
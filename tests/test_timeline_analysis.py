@@ -0,0 +1,113 @@
+import unittest
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+from analysis.timeline_analysis import (TimelineAnalysis, CLOSED, OPENED, open_backlog, state_intervals,
+                                        state_transitions)
+from data.columnar import ColumnarIssues
+from tests.helpers import AnalysisTestCase, make_issue
+
+
+class TestTimelineAnalysis(AnalysisTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issues = [
+            # Closed, reopened and closed twice (the second close is ignored)
+            make_issue(1, '2023-01-01T10:00:00Z', [('closed', '2023-01-03T10:00:00Z', 'user2'),
+                                                   ('reopened', '2023-01-05T00:00:00Z', 'user2'),
+                                                   ('commented', '2023-01-05T12:00:00Z', 'user3'),
+                                                   ('closed', '2023-01-06T00:00:00Z', 'user2'),
+                                                   ('closed', '2023-01-07T00:00:00Z', 'user2')],
+                       state='closed', labels=['kind/bug']),
+            # Still open
+            make_issue(2, '2023-01-02T10:00:00Z', [('commented', '2023-01-03T10:00:00Z', 'user3')],
+                       creator='user3', labels=['kind/feature']),
+            # Closed without a 'closed' event: closed at its last update
+            make_issue(3, '2023-01-02T10:00:00Z', [], state='closed', updated='2023-01-04T00:00:00Z',
+                       labels=['kind/bug']),
+            # Without a creation date
+            make_issue(4, None, [('closed', '2023-01-02T00:00:00Z', 'user2')], state='closed'),
+        ]
+        self.dataset = ColumnarIssues.from_issues(self.issues)
+
+    def test_state_transitions(self):
+        rows, dates, kinds = state_transitions(self.dataset)
+        self.assertEqual(rows.tolist(), [0, 0, 0, 0, 1, 2])
+        self.assertEqual(kinds.tolist(), [OPENED, CLOSED, OPENED, CLOSED, OPENED, OPENED])
+        self.assertEqual(str(dates[3]), '2023-01-06T00:00:00.000000')
+
+    def test_events_without_type(self):
+        # Without any 'reopened' event, events without a type are not reopenings
+        issues = [make_issue(1, '2023-01-01T00:00:00Z', [('closed', '2023-01-02T00:00:00Z', 'user2'),
+                                                        (None, '2023-01-03T00:00:00Z', 'user2'),
+                                                        ('closed', '2023-01-05T00:00:00Z', 'user2')],
+                             state='closed')]
+        rows, starts, ends = state_intervals(ColumnarIssues.from_issues(issues))
+        self.assertEqual(rows.tolist(), [0])
+        self.assertEqual(np.datetime_as_string(starts, unit='D').tolist(), ['2023-01-01'])
+        self.assertEqual(np.datetime_as_string(ends, unit='D').tolist(), ['2023-01-02'])
+
+    def test_state_intervals(self):
+        rows, starts, ends = state_intervals(self.dataset)
+        self.assertEqual(rows.tolist(), [0, 0, 1, 2])
+        self.assertEqual(np.datetime_as_string(starts, unit='D').tolist(),
+                         ['2023-01-01', '2023-01-05', '2023-01-02', '2023-01-02'])
+        self.assertEqual(np.datetime_as_string(ends, unit='D').tolist(),
+                         ['2023-01-03', '2023-01-06', 'NaT', '2023-01-04'])
+
+    def test_open_backlog(self):
+        _, starts, ends = state_intervals(self.dataset)
+        backlog = open_backlog(starts, ends)
+        self.assertEqual([str(day.date()) for day in backlog.index],
+                         ['2023-01-01', '2023-01-02', '2023-01-03', '2023-01-04', '2023-01-05', '2023-01-06'])
+        self.assertEqual(backlog.tolist(), [1, 3, 2, 1, 2, 1])
+        backlog = open_backlog(starts, ends, until=np.datetime64('2023-01-04'))
+        self.assertEqual(backlog.tolist(), [1, 3, 2, 1])
+        self.assertTrue(open_backlog(starts[:0], ends[:0]).empty)
+
+    def test_same_day_interval(self):
+        dataset = ColumnarIssues.from_issues([
+            make_issue(1, '2023-01-01T10:00:00Z', [('closed', '2023-01-01T11:00:00Z', 'user2')], state='closed')])
+        _, starts, ends = state_intervals(dataset)
+        self.assertEqual(open_backlog(starts, ends).tolist(), [0])
+
+    def test_matches_loop(self):
+        rng = np.random.default_rng(611)
+        issues = []
+        for number in range(200):
+            day = int(rng.integers(1, 28))
+            events = []
+            for event_day in sorted(rng.integers(day, 60, size=int(rng.integers(0, 6))).tolist()):
+                event_type = ['closed', 'reopened', 'commented'][int(rng.integers(0, 3))]
+                events.append((event_type, str(np.datetime64('2023-01-01') + event_day) + 'T12:00:00Z', 'user2'))
+            issues.append(make_issue(number, f'2023-01-{day:02d}T08:00:00Z', events))
+        _, starts, ends = state_intervals(ColumnarIssues.from_issues(issues))
+        backlog = open_backlog(starts, ends)
+        for day, count in backlog.items():
+            expected = 0
+            for issue in issues:
+                if issue.created_date.date() > day.date():
+                    continue
+                is_open = True
+                for event in issue.events:
+                    if event.event_date.date() <= day.date() and event.event_type in ('closed', 'reopened'):
+                        is_open = event.event_type == 'reopened'
+                expected += is_open
+            self.assertEqual(count, expected, day)
+
+    def test_run(self):
+        output = self.run_analysis(TimelineAnalysis)
+        self.assertIn('Open Issues on 2023-01-06: 1', output)
+        self.assertIn('Largest backlog: 3 open issues on 2023-01-02', output)
+
+    def test_run_with_filters(self):
+        self.assertIn("Open Issues with Label 'kind/bug' on 2023-01-06: 0", self.run_analysis(TimelineAnalysis, label='kind/bug'))
+        self.assertIn("Open Issues involving 'user3' on 2023-01-06: 1", self.run_analysis(TimelineAnalysis, user='user3'))
+        self.assertIn("Open Issues involving 'nobody': no issues found.", self.run_analysis(TimelineAnalysis, user='nobody'))
+
+
+if __name__ == "__main__":
+    unittest.main()
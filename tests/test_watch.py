@@ -0,0 +1,132 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import plotly.graph_objects as go
+
+import results
+from watch import ExportWatcher, watch
+
+
+class FakeTime:
+    """
+    Clock advanced by sleep, changing the export signature on a schedule.
+    """
+
+    def __init__(self, signatures):
+        """
+        Constructor
+        """
+        # List of (time from which the signature applies, signature)
+        self.signatures = signatures
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def signature(self):
+        return [signature for start, signature in self.signatures if start <= self.now][-1]
+
+
+class TestWatch(unittest.TestCase):
+
+    def watcher(self, fake, **kwargs):
+        watcher = ExportWatcher('issues.json', poll=1.0, clock=fake.clock, sleep=fake.sleep, **kwargs)
+        watcher.signature = fake.signature
+        return watcher
+
+    def test_debounce(self):
+        # A burst of writes from t=5 to t=9, settled afterwards
+        fake = FakeTime([(0, 'a'), (5, 'b'), (6, 'c'), (8, 'd'), (9, 'e')])
+        watcher = self.watcher(fake, debounce=3.0, min_interval=0.0)
+        watcher.mark_run()
+        watcher.wait_for_change()
+        self.assertEqual(fake.now, 12.0)
+        # Nothing changes until t=20
+        fake.signatures.append((20, 'f'))
+        watcher.mark_run()
+        watcher.wait_for_change()
+        self.assertEqual(fake.now, 23.0)
+
+    def test_min_interval(self):
+        fake = FakeTime([(0, 'a'), (1, 'b')])
+        watcher = self.watcher(fake, debounce=0.0, min_interval=30.0)
+        watcher.mark_run()
+        watcher.wait_for_change()
+        self.assertEqual(fake.now, 30.0)
+
+    def test_missing_export_and_change_during_run(self):
+        # The export is missing while it is rewritten, which does not trigger a run
+        fake = FakeTime([(0, 'a'), (2, None), (4, 'a')])
+        watcher = self.watcher(fake, debounce=1.0, min_interval=0.0)
+        watcher.mark_run()
+        fake.signatures.append((10, 'b'))
+        watcher.wait_for_change()
+        self.assertEqual(fake.now, 11.0)
+        # A change while the feature runs triggers the next run right away
+        watcher.mark_run()
+        fake.signatures.append((fake.now, 'c'))
+        watcher.wait_for_change()
+        self.assertEqual(fake.now, 12.0)
+
+    @patch('watch.DataLoader')
+    def test_watch_reloads_and_reruns(self, mock_loader):
+        watcher = MagicMock(path='issues.json')
+        run = MagicMock(side_effect=[ValueError('partial export'), None, None])
+        with patch('builtins.print'), patch('traceback.print_exc'):
+            watch(run, watcher, max_runs=3)
+        self.assertEqual(run.call_count, 3)
+        self.assertEqual(mock_loader.return_value.reload.call_count, 2)
+        self.assertEqual(watcher.wait_for_change.call_count, 2)
+        watcher.wait_for_change.side_effect = KeyboardInterrupt
+        with patch('builtins.print'):
+            watch(MagicMock(), watcher)
+
+
+class TestResults(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        results.set_output_dir(None)
+        self.tmpdir.cleanup()
+
+    def test_show_without_output_dir(self):
+        fig = MagicMock()
+        with patch('matplotlib.pyplot.show') as mock_show:
+            results.show('chart')
+            results.show_plotly(fig, 'chart')
+        mock_show.assert_called_once()
+        fig.show.assert_called_once()
+
+    def test_output_files(self):
+        results.set_output_dir(self.tmpdir.name)
+        fig = go.Figure(go.Bar(x=['a'], y=[1]))
+        with patch('matplotlib.pyplot.show') as mock_show, patch('builtins.print'):
+            with results.captured('feature_1'):
+                print('first run')
+                plt.figure()
+                plt.plot([1, 2], [3, 4])
+                results.show('chart')
+                results.show_plotly(fig, 'plotly chart')
+        mock_show.assert_not_called()
+        self.assertTrue(os.path.getsize(os.path.join(self.tmpdir.name, 'chart.png')) > 0)
+        self.assertTrue(os.path.getsize(os.path.join(self.tmpdir.name, 'plotly chart.html')) > 0)
+        # Each run replaces the text output of the previous one
+        with results.captured('feature_1'):
+            print('second run')
+        with open(os.path.join(self.tmpdir.name, 'feature_1.txt')) as fin:
+            self.assertEqual(fin.read(), 'second run\n')
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ['chart.png', 'feature_1.txt', 'plotly chart.html'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Watch mode (run.py --watch): runs the selected feature, then polls the
+export (ENPM611_PROJECT_DATA_PATH, a file, directory or glob pattern) for
+changes of the size or modification time of its files, and runs the
+feature again once the export changed.
+
+Exports are usually rewritten in bursts of writes, so a change only
+triggers a run once the files have not changed for a debounce period
+(ENPM611_PROJECT_WATCH_DEBOUNCE seconds), and runs start at most once per
+ENPM611_PROJECT_WATCH_MIN_INTERVAL seconds. The files are polled every
+ENPM611_PROJECT_WATCH_POLL seconds. Before each run, the DataLoader
+reloads the export (incrementally, with the issue cache).
+"""
+
+import time
+import traceback
+from typing import Callable
+
+import config as config
+import profiling
+from data.data_loader import DataLoader
+from data.issue_cache import source_signature
+
+
+def _get_seconds(name:str, default:float) -> float:
+    value = config.get_parameter(name)
+    try:
+        return float(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+class ExportWatcher:
+    """
+    Detects settled changes of the export files by polling their signature.
+    """
+
+    def __init__(self, path:str, poll:float=None, debounce:float=None, min_interval:float=None,
+                 clock:Callable[[], float]=time.monotonic, sleep:Callable[[float], None]=time.sleep):
+        """
+        Constructor
+        """
+        self.path:str = path
+        self.poll:float = poll if poll is not None else _get_seconds('ENPM611_PROJECT_WATCH_POLL', 1.0)
+        self.debounce:float = debounce if debounce is not None else _get_seconds('ENPM611_PROJECT_WATCH_DEBOUNCE', 2.0)
+        self.min_interval:float = min_interval if min_interval is not None \
+            else _get_seconds('ENPM611_PROJECT_WATCH_MIN_INTERVAL', 10.0)
+        self.clock = clock
+        self.sleep = sleep
+        # Signature of the export and time of the start of the last run
+        self.run_signature:str = None
+        self.run_time:float = None
+
+    def signature(self) -> str:
+        """
+        Signature of the export files, None while they are missing.
+        """
+        try:
+            return source_signature(self.path)
+        except OSError:
+            return None
+
+    def mark_run(self):
+        """
+        Records that a run starts on the export as it is now.
+        """
+        self.run_signature = self.signature()
+        self.run_time = self.clock()
+
+    def wait_for_change(self):
+        """
+        Blocks until the export differs from the one of the last run, has
+        not changed for the debounce period, and the minimum interval
+        since the start of the last run has passed.
+        """
+        seen = self.signature()
+        changed_at = self.clock()
+        while True:
+            self.sleep(self.poll)
+            current = self.signature()
+            now = self.clock()
+            if current != seen:
+                seen = current
+                changed_at = now
+                continue
+            if current is not None and current != self.run_signature and now - changed_at >= self.debounce \
+                    and (self.run_time is None or now - self.run_time >= self.min_interval):
+                return
+
+
+def watch(run:Callable[[], None], watcher:ExportWatcher=None, max_runs:int=None):
+    """
+    Runs run() and again after every settled change of the export, until
+    interrupted (or max_runs runs). A failing run, e.g. on an export that
+    is not valid JSON, is reported and waits for the next change.
+    """
+    loader = DataLoader()
+    watcher = watcher or ExportWatcher(loader.data_path)
+    runs = 0
+    try:
+        while True:
+            watcher.mark_run()
+            with profiling.timed('watch run'):
+                try:
+                    if runs > 0:
+                        loader.reload()
+                    run()
+                except Exception:
+                    traceback.print_exc()
+            runs += 1
+            if max_runs is not None and runs >= max_runs:
+                return
+            print(f'Watching {watcher.path} for changes (Ctrl+C to stop)...')
+            watcher.wait_for_change()
+    except KeyboardInterrupt:
+        print('Stopped watching.')